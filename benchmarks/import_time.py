@@ -0,0 +1,56 @@
+"""Measure the import time of cepan in fresh interpreters.
+
+Run it with python benchmarks/import_time.py [--runs N].
+The median cumulative import time of cepan is reported, along with the
+heavy dependencies that importing it pulled in, which should be none.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+_HEAVY_MODULES = ["boto3", "botocore", "numpy", "pandas", "pyarrow"]
+
+
+def measure(statement: str) -> Tuple[int, List[str]]:
+    """Return the import time of cepan in microseconds and the heavy modules
+    loaded after running statement in a new interpreter."""
+    code = f"{statement}; import sys; print(','.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == "cepan":
+            cumulative = int(fields[1])
+    modules = set(result.stdout.strip().split(","))
+    return cumulative, [m for m in _HEAVY_MODULES if m in modules]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for statement in [
+        "import cepan",
+        "import cepan; cepan.show_dimensions()",
+        "import cepan; cepan.Dimensions('SERVICE', ['EC2']).build_expression()",
+    ]:
+        times = []
+        heavy: List[str] = []
+        for _ in range(args.runs):
+            elapsed, heavy = measure(statement)
+            times.append(elapsed)
+        median = statistics.median(times) / 1000
+        print(f"{statement}: {median:.1f} ms, heavy modules: {heavy or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,59 @@
-from importlib import metadata
+from typing import Any
 
 from cepan._alias import show_service_alias
-from cepan._cost_and_usage import get_cost_and_usage
-from cepan._dimension import get_dimension_values, show_dimensions
+from cepan._arrow import iter_cost_and_usage_batches, write_cost_and_usage_parquet
+from cepan._async import (
+    get_cost_and_usage_async,
+    get_dimension_values_async,
+    get_tags_async,
+    iter_cost_and_usage_async,
+    set_async_max_concurrency,
+)
+from cepan._batch import CostAndUsageQuery, get_cost_and_usage_batch
+from cepan._cache import ResponseCache
+from cepan._cost_and_usage import get_cost_and_usage, iter_cost_and_usage
+from cepan._dimension import (
+    get_dimension_catalog,
+    get_dimension_values,
+    show_dimensions,
+)
 from cepan._filter import And, CostCategories, Dimensions, Not, Or, Tags
 from cepan._group_by import GroupBy
-from cepan._tag import get_tags
+from cepan._incremental import IncrementalCostAndUsage
+from cepan._multi_account import (
+    MultiAccountResult,
+    get_cost_and_usage_multi_account,
+)
+from cepan._rate_limit import RateLimiter, set_rate_limiter
+from cepan._resources import iter_cost_and_usage_with_resources
+from cepan._rollup import CostAndUsageView
+from cepan._tag import get_tag_catalog, get_tags
 from cepan._time_period import TimePeriod
-
-__version__: str = metadata.version(__name__)
+from cepan._utils import clear_client_cache
+from cepan._value_index import ValueIndex
 
 __all__ = [
     "show_service_alias",
     "show_dimensions",
     "get_dimension_values",
     "get_tags",
+    "get_dimension_catalog",
+    "get_tag_catalog",
+    "ValueIndex",
     "get_cost_and_usage",
+    "iter_cost_and_usage",
+    "iter_cost_and_usage_with_resources",
+    "CostAndUsageQuery",
+    "get_cost_and_usage_batch",
+    "MultiAccountResult",
+    "get_cost_and_usage_multi_account",
+    "iter_cost_and_usage_batches",
+    "write_cost_and_usage_parquet",
+    "get_dimension_values_async",
+    "get_tags_async",
+    "get_cost_and_usage_async",
+    "iter_cost_and_usage_async",
+    "set_async_max_concurrency",
     "TimePeriod",
     "Dimensions",
     "Tags",
@@ -24,5 +62,20 @@ __all__ = [
     "Or",
     "Not",
     "GroupBy",
+    "ResponseCache",
+    "IncrementalCostAndUsage",
+    "CostAndUsageView",
+    "clear_client_cache",
+    "RateLimiter",
+    "set_rate_limiter",
     "__version__",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # importlib.metadata is slow to import, so the version is read on first use.
+    if name == "__version__":
+        from importlib import metadata
+
+        return metadata.version(__name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
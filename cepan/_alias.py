@@ -1,6 +1,10 @@
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from cepan._output import _check_pandas
+
+if TYPE_CHECKING:
+    import pandas as pd
 
-import pandas as pd
 
 _SERVICE_ALIAS = {
     "Amazon Athena": [
@@ -133,7 +137,7 @@ _SERVICE_ALIAS = {
 _SERVICE_ALIAS_TABLE: Optional[Dict[str, str]] = None
 
 
-def show_service_alias() -> pd.DataFrame:
+def show_service_alias() -> "pd.DataFrame":
     """Show a list of aliases for aws service names.
 
     Returns
@@ -142,6 +146,9 @@ def show_service_alias() -> pd.DataFrame:
         DataFrame with the corresponding proper name and alias
 
     """
+    _check_pandas()
+    import pandas as pd
+
     pre_df: List[Dict[str, str]] = []
     for key, aliases in _SERVICE_ALIAS.items():
         pre_row: Dict[str, str] = {"service_name": key, "aliases": ",".join(aliases)}
@@ -0,0 +1,178 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+
+from cepan import exceptions
+from cepan._builder import _CostAndUsageBuilder
+from cepan._cache import ResponseCache
+from cepan._cost_and_usage import _MAX_FILTER_VALUES, _build_args, _iter_chunks
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._output import _build_record_batch, _check_pyarrow
+from cepan._time_period import TimePeriod
+
+if TYPE_CHECKING:
+    import boto3
+    import pyarrow as pa
+
+# The name of the column that partitions a dataset by month.
+_MONTH = "month"
+
+
+def iter_cost_and_usage_batches(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    chunk_size: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    *,
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Iterator["pa.RecordBatch"]:
+    """Iterate over cost and usage report in pyarrow RecordBatches.
+
+    The parameters are the same as iter_cost_and_usage.
+    Time, dimension, tag and cost category columns are dictionary encoded.
+    The dictionary of each batch only holds the values of the rows buffered
+    with it, so dictionaries do not grow with the result.
+    pyarrow must be installed.
+
+    Yields
+    ------
+    pyarrow.RecordBatch
+        Chunk of the result as a RecordBatch.
+    """
+    _check_pyarrow()
+    yield from _iter_chunks(
+        _build_args(time_period, granularity, filter, metrics, group_by),
+        metrics_dtype,
+        "string",
+        chunk_size,
+        split_time_period,
+        max_filter_values,
+        max_workers,
+        cache,
+        session,
+        _build_batch,
+    )
+
+
+def write_cost_and_usage_parquet(
+    path: str,
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    chunk_size: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    *,
+    partition_by: Optional[str] = _MONTH,
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+) -> None:
+    """Write cost and usage report to a Parquet dataset as pages arrive.
+
+    Each page is converted to a RecordBatch and written right away,
+    so memory usage does not grow with the size of the whole result.
+    The rows of split filters are written once their window of
+    split_time_period is summed, as in iter_cost_and_usage.
+    Dictionary encoded columns are written with Parquet dictionary pages.
+    pyarrow must be installed.
+
+    Parameters
+    ----------
+    path : str
+        The root directory of the dataset.
+        Existing files with the same names are overwritten.
+    partition_by : str, optional
+        Partitions the dataset in hive style directories.
+        "month" partitions by the month of Time, any other value by the
+        column of that group key. The dataset is not partitioned if
+        partition_by receive None. The default is "month".
+
+    The other parameters are the same as iter_cost_and_usage.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> ce.write_cost_and_usage_parquet(
+    ...     "cost/",
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2021, 1, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     group_by=ce.GroupBy(["LINKED_ACCOUNT", "SERVICE"]),
+    ... )
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    batches = iter_cost_and_usage_batches(
+        time_period,
+        granularity,
+        filter=filter,
+        metrics=metrics,
+        group_by=group_by,
+        metrics_dtype=metrics_dtype,
+        chunk_size=chunk_size,
+        split_time_period=split_time_period,
+        max_filter_values=max_filter_values,
+        max_workers=max_workers,
+        cache=cache,
+        session=session,
+    )
+    if partition_by == _MONTH:
+        batches = (_with_month(batch) for batch in batches)
+    first = next(batches, None)
+    if first is None:
+        return
+
+    partitioning = None
+    if partition_by is not None:
+        if partition_by not in first.schema.names:
+            raise exceptions.InvalidParameter(
+                f"{partition_by} is invalid, valid values are {_MONTH} or a group key."
+            )
+        field = first.schema.field(partition_by)
+        partitioning = ds.partitioning(pa.schema([field]), flavor="hive")
+
+    def all_batches() -> Iterator["pa.RecordBatch"]:
+        yield first
+        yield from batches
+
+    ds.write_dataset(
+        all_batches(),
+        path,
+        schema=first.schema,
+        format="parquet",
+        partitioning=partitioning,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def _build_batch(builder: _CostAndUsageBuilder, n_rows: int) -> "pa.RecordBatch":
+    return _build_record_batch(builder.columns, n_rows)
+
+
+def _with_month(batch: "pa.RecordBatch") -> "pa.RecordBatch":
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Only the dictionary of Time is sliced, then its indices are remapped.
+    time = batch.column(batch.schema.get_field_index("Time"))
+    months = pc.dictionary_encode(pc.utf8_slice_codeunits(time.dictionary, 0, 7))
+    month = pa.DictionaryArray.from_arrays(
+        pc.take(months.indices, time.indices), months.dictionary
+    )
+    return pa.RecordBatch.from_arrays(
+        batch.columns + [month], names=batch.schema.names + [_MONTH]
+    )
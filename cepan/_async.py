@@ -0,0 +1,275 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from cepan import _utils, exceptions
+from cepan._builder import _check_keys_dtype, _CostAndUsageBuilder
+from cepan._cache import ResponseCache
+from cepan._cost_and_usage import (
+    _MAX_FILTER_VALUES,
+    _build_args,
+    _plan_requests,
+    iter_cost_and_usage,
+)
+from cepan._dimension import get_dimension_values
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._output import _build_output, _check_output
+from cepan._sort_by import SortBy
+from cepan._tag import get_tags
+from cepan._time_period import TimePeriod
+from cepan._utils import _DEFAULT_MAX_WORKERS
+
+if TYPE_CHECKING:
+    import boto3
+
+_R = TypeVar("_R")
+
+_DEFAULT_MAX_CONCURRENCY = 16
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_MAX_CONCURRENCY = _DEFAULT_MAX_CONCURRENCY
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def set_async_max_concurrency(max_concurrency: int) -> None:
+    """Set how many blocking calls the async API runs at once.
+
+    All async functions share one thread pool, so the limit holds across
+    every coroutine of the process. Pending calls wait for a free thread.
+    The default is 16.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        The number of threads that send requests and parse responses.
+    """
+    global _EXECUTOR, _MAX_CONCURRENCY
+    if max_concurrency <= 0:
+        raise exceptions.InvalidParameter(
+            f"max_concurrency must be a positive integer, but {max_concurrency} was given."  # noqa
+        )
+    with _EXECUTOR_LOCK:
+        previous = _EXECUTOR
+        _EXECUTOR = None
+        _MAX_CONCURRENCY = max_concurrency
+    if previous is not None:
+        # Calls already submitted still complete.
+        previous.shutdown(wait=False)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=_MAX_CONCURRENCY, thread_name_prefix="cepan"
+            )
+        return _EXECUTOR
+
+
+async def _run(func: Callable[..., _R], *args: Any, **kwargs: Any) -> _R:
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(_get_executor(), call)
+
+
+async def get_cost_and_usage_async(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    session: Optional["boto3.Session"] = None,
+    *,
+    keys_dtype: str = "string",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    output: str = "pandas",
+    time_index: bool = False,
+) -> Any:
+    """Get cost and usage report without blocking the event loop.
+
+    The parameters are the same as get_cost_and_usage.
+    The requests of split time periods, filter shards and group fan-out
+    are sent concurrently, and pages are parsed off the event loop.
+    As in get_cost_and_usage, max_workers bounds the requests of one call
+    sent at once. set_async_max_concurrency bounds them across calls.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> df = await ce.get_cost_and_usage_async(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     split_time_period="DAILY",
+    ... )
+    """
+    _check_output(output, time_index)
+    _check_keys_dtype(keys_dtype)
+    client: boto3.client = await _run(_utils.client, "ce", session)
+    args = _build_args(time_period, granularity, filter, metrics, group_by)
+    plan = await _run(
+        _plan_requests, client, args, split_time_period, max_filter_values, max_workers
+    )
+    call_with_pagination = _utils.call_with_pagination
+    if cache is not None:
+        call_with_pagination = cache.call_with_pagination
+
+    def fetch(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return list(call_with_pagination(client, "get_cost_and_usage", request))
+
+    semaphore = asyncio.Semaphore(max_workers or _DEFAULT_MAX_WORKERS)
+
+    async def fetch_bounded(request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await _run(fetch, request)
+
+    pages = await asyncio.gather(
+        *(fetch_bounded(request) for request, _ in plan.requests)
+    )
+
+    def build() -> Any:
+        builder = _CostAndUsageBuilder(metrics_dtype, plan.merge, keys_dtype)
+        for responses, (_, constants) in zip(pages, plan.requests):
+            for response in responses:
+                builder.add_page(response, constants)
+        return _build_output(builder.columns, len(builder), output, time_index)
+
+    return await _run(build)
+
+
+async def iter_cost_and_usage_async(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    chunk_size: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    *,
+    keys_dtype: str = "string",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    output: str = "pandas",
+) -> AsyncIterator[Any]:
+    """Iterate over cost and usage report in DataFrame chunks asynchronously.
+
+    The parameters are the same as iter_cost_and_usage.
+    Each chunk is fetched and parsed off the event loop.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> async for df in ce.iter_cost_and_usage_async(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2021, 1, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     chunk_size=100000,
+    ... ):
+    ...     df.to_parquet(...)
+    """
+    chunks = iter_cost_and_usage(
+        time_period,
+        granularity,
+        filter=filter,
+        metrics=metrics,
+        group_by=group_by,
+        metrics_dtype=metrics_dtype,
+        keys_dtype=keys_dtype,
+        chunk_size=chunk_size,
+        split_time_period=split_time_period,
+        max_filter_values=max_filter_values,
+        max_workers=max_workers,
+        cache=cache,
+        session=session,
+        output=output,
+    )
+    while True:
+        chunk: Optional[Any] = await _run(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def get_dimension_values_async(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    dimension: str,
+    search_string: Optional[str] = None,
+    context: Optional[str] = None,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    sort_by: Union[List[SortBy], List[Dict[str, str]], None] = None,
+    max_results: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
+    """Get dimension values without blocking the event loop.
+
+    The parameters are the same as get_dimension_values.
+    Values of several dimensions can be fetched concurrently with asyncio.gather.
+    """
+    return await _run(
+        get_dimension_values,
+        time_period,
+        dimension,
+        search_string=search_string,
+        context=context,
+        filter=filter,
+        sort_by=sort_by,
+        max_results=max_results,
+        session=session,
+        output=output,
+    )
+
+
+async def get_tags_async(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    tag_key: str,
+    search_string: Optional[str] = None,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    sort_by: Union[List[SortBy], List[Dict[str, str]], None] = None,
+    max_results: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
+    """Get tag values without blocking the event loop.
+
+    The parameters are the same as get_tags.
+    Values of several tag keys can be fetched concurrently with asyncio.gather.
+    """
+    return await _run(
+        get_tags,
+        time_period,
+        tag_key,
+        search_string=search_string,
+        filter=filter,
+        sort_by=sort_by,
+        max_results=max_results,
+        session=session,
+        output=output,
+    )
@@ -0,0 +1,192 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from cepan import _utils
+from cepan._cache import ResponseCache
+from cepan._canonical import _canonicalize_metric, _request_fingerprint
+from cepan._cost_and_usage import _MAX_FILTER_VALUES, _build_args, get_cost_and_usage
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._time_period import TimePeriod, _parse_time
+
+if TYPE_CHECKING:
+    import boto3
+    import pandas as pd
+
+
+@dataclass
+class CostAndUsageQuery:
+    """A query of get_cost_and_usage_batch.
+
+    The fields are the same as the parameters of get_cost_and_usage.
+    """
+
+    time_period: Union[TimePeriod, Dict[str, str]]
+    granularity: str
+    filter: Union[Filter, Dict[str, Any], None] = None
+    metrics: List[str] = field(default_factory=lambda: ["UnblendedCost"])
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None
+
+
+def get_cost_and_usage_batch(
+    queries: List[CostAndUsageQuery],
+    metrics_dtype: str = "float64",
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    session: Optional["boto3.Session"] = None,
+) -> List["pd.DataFrame"]:
+    """Get the cost and usage reports of many queries with as few requests as possible.
+
+    Queries that differ only in metrics are merged into one request for all of
+    their metrics. Queries whose time periods overlap or are adjacent are merged
+    into one request for the union of the periods, as long as each period
+    still starts and ends on a boundary of the granularity.
+    The merged requests are sent concurrently and each result is sliced
+    back out of them.
+
+    Parameters
+    ----------
+    queries : List[CostAndUsageQuery]
+        The queries.
+    metrics_dtype: str, optional
+        The dtype of metrics. The default is float64.
+    max_filter_values: int, optional
+        Filters with longer value lists are split into several requests.
+        The default is 1000.
+    max_workers: int, optional
+        The maximum number of merged requests sent concurrently. The default is 4.
+    cache: ResponseCache, optional
+        Serves repeated requests from a persistent cache.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+
+    Returns
+    -------
+    List[pandas.DataFrame]
+        The result of each query, in the order of queries.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> january = ce.TimePeriod(start=datetime(2020, 1, 1), end=datetime(2020, 2, 1))
+    >>> february = ce.TimePeriod(start=datetime(2020, 2, 1), end=datetime(2020, 3, 1))
+    >>> costs, usages = ce.get_cost_and_usage_batch(
+    ...     [
+    ...         ce.CostAndUsageQuery(january, "DAILY", metrics=["UnblendedCost"]),
+    ...         ce.CostAndUsageQuery(february, "DAILY", metrics=["UsageQuantity"]),
+    ...     ]
+    ... )
+    """
+    built = [
+        _build_args(q.time_period, q.granularity, q.filter, q.metrics, q.group_by)
+        for q in queries
+    ]
+    requests, assignments = _merge_requests(built)
+
+    def fetch(args: Dict[str, Any]) -> "pd.DataFrame":
+        return get_cost_and_usage(
+            args["TimePeriod"],
+            args["Granularity"],
+            filter=args.get("Filter"),
+            metrics=args["Metrics"],
+            group_by=args.get("GroupBy"),
+            metrics_dtype=metrics_dtype,
+            max_filter_values=max_filter_values,
+            max_workers=max_workers,
+            cache=cache,
+            session=session,
+        )
+
+    results = list(_utils.map_concurrently(fetch, requests, max_workers))
+    return [
+        _slice_result(results[index], args) for args, index in zip(built, assignments)
+    ]
+
+
+def _merge_requests(
+    built: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Merge built requests and return which merged request answers each."""
+    groups: Dict[str, List[int]] = {}
+    for i, args in enumerate(built):
+        # Requests that only differ in time period and metrics can be merged.
+        rest = {k: v for k, v in args.items() if k not in ("TimePeriod", "Metrics")}
+        key = _request_fingerprint("get_cost_and_usage", rest)
+        groups.setdefault(key, []).append(i)
+
+    requests: List[Dict[str, Any]] = []
+    assignments = [0] * len(built)
+    for members in groups.values():
+        for merged in _merge_periods(built, members):
+            metrics: Dict[str, None] = {}
+            for i in merged:
+                canonical = map(_canonicalize_metric, built[i]["Metrics"])
+                metrics.update(dict.fromkeys(canonical))
+                assignments[i] = len(requests)
+            first = built[merged[0]]
+            requests.append(
+                dict(
+                    first,
+                    TimePeriod={
+                        "Start": min(built[i]["TimePeriod"]["Start"] for i in merged),
+                        "End": max(built[i]["TimePeriod"]["End"] for i in merged),
+                    },
+                    Metrics=list(metrics),
+                )
+            )
+    return requests, assignments
+
+
+def _merge_periods(built: List[Dict[str, Any]], members: List[int]) -> List[List[int]]:
+    """Group requests whose time periods overlap or are adjacent."""
+    merged: List[List[int]] = []
+    end = ""
+
+    def period(i: int) -> Tuple[str, str]:
+        return built[i]["TimePeriod"]["Start"], built[i]["TimePeriod"]["End"]
+
+    for i in sorted(members, key=period):
+        time_period = built[i]["TimePeriod"]
+        if merged:
+            # Each group is either mergeable or made of one repeated period.
+            last = built[merged[-1][0]]
+            if time_period == last["TimePeriod"] or (
+                _can_merge(built[i])
+                and _can_merge(last)
+                and time_period["Start"] <= end
+            ):
+                merged[-1].append(i)
+                end = max(end, time_period["End"])
+                continue
+        merged.append([i])
+        end = time_period["End"]
+    return merged
+
+
+def _can_merge(args: Dict[str, Any]) -> bool:
+    # A monthly result starts at the start of the period, so a period that
+    # does not start or end on the first of a month can not be sliced out
+    # of a longer one. Hourly requests are limited to short periods.
+    granularity = args["Granularity"]
+    if granularity == "DAILY":
+        return True
+    if granularity == "MONTHLY":
+        start = _parse_time(args["TimePeriod"]["Start"])
+        end = _parse_time(args["TimePeriod"]["End"])
+        return start.day == 1 and end.day == 1
+    return False
+
+
+def _slice_result(df: "pd.DataFrame", args: Dict[str, Any]) -> "pd.DataFrame":
+    if df.empty:
+        return df
+    time_period = args["TimePeriod"]
+    mask = (df["Time"] >= time_period["Start"]) & (df["Time"] < time_period["End"])
+    metrics = list(dict.fromkeys(map(_canonicalize_metric, args["Metrics"])))
+    keys = [d["Key"] for d in args.get("GroupBy", [])]
+    # Unit columns follow their metrics with the micros dtype.
+    metrics = [c for metric in metrics for c in (metric, metric + "Unit")]
+    columns = [c for c in ["Time"] + keys + metrics if c in df.columns]
+    return df.loc[mask.to_numpy(dtype=bool), columns].reset_index(drop=True)
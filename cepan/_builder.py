@@ -0,0 +1,364 @@
+import itertools
+import math
+import sys
+from array import array
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from cepan import exceptions
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+_KEYS_DTYPES = ("string", "category")
+
+# metrics_dtype of exact fixed-point metrics, stored as integer micro-units.
+_MICROS = "micros"
+_MICROS_SCALE = 6
+# Missing micros values are stored as the smallest int64.
+_MISSING_MICROS = -(2**63)
+
+
+def _check_keys_dtype(keys_dtype: str) -> None:
+    if keys_dtype not in _KEYS_DTYPES:
+        raise exceptions.InvalidParameter(
+            f"{keys_dtype} is invalid, valid values are string, category."
+        )
+
+
+class _KeyColumn:
+    """A dictionary encoded string column.
+
+    Each distinct value is stored once and rows only keep its code.
+    Missing values are encoded as -1.
+    With the category dtype, the codes become a pandas Categorical as is.
+    """
+
+    def __init__(self, n_missing: int = 0, dtype: str = "string") -> None:
+        self.dtype = dtype
+        self.codes: "array[int]" = array("i", [-1] * n_missing)
+        self.categories: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def encode(self, value: str) -> int:
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.categories)
+            # Keys repeat across columns, pages and queries.
+            value = sys.intern(value)
+            self._index[value] = code
+            self.categories.append(value)
+        return code
+
+    def append(self, value: str) -> None:
+        self.codes.append(self.encode(value))
+
+    def append_code(self, code: int) -> None:
+        self.codes.append(code)
+
+    def append_missing(self) -> None:
+        self.codes.append(-1)
+
+    def drop(self, n_rows: int) -> Optional["np.ndarray[Any, Any]"]:
+        """Drop the first n_rows rows and the values that only they used.
+
+        Returns the new code of each old code, or None if no value was
+        dropped. The last entry maps missing values to -1.
+        """
+        import numpy as np
+
+        del self.codes[:n_rows]
+        codes = np.frombuffer(self.codes, dtype=np.int32)
+        used = np.unique(codes[codes >= 0])
+        if len(used) == len(self.categories):
+            return None
+        remap = np.full(len(self.categories) + 1, -1, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        self.codes = array("i", remap[codes].tobytes())
+        self.categories = [self.categories[code] for code in used.tolist()]
+        self._index = {value: code for code, value in enumerate(self.categories)}
+        return remap
+
+    def build(self, n_rows: Optional[int] = None) -> "pd.api.extensions.ExtensionArray":
+        import numpy as np
+        import pandas as pd
+
+        if self.dtype == "category":
+            codes = np.frombuffer(self.codes, dtype=np.int32)[:n_rows].copy()
+            dtype = pd.CategoricalDtype(pd.Index(self.categories, dtype="string"))
+            return pd.Categorical.from_codes(codes, dtype=dtype)
+        return pd.array(self.to_numpy(n_rows), dtype="string")
+
+    def to_numpy(self, n_rows: Optional[int] = None) -> "np.ndarray[Any, Any]":
+        """Return the values as an object array, with None for missing values."""
+        import numpy as np
+
+        # The trailing None makes code -1 resolve to a missing value.
+        lookup = np.array(self.categories + [None], dtype=object)
+        codes = np.frombuffer(self.codes, dtype=np.int32)[:n_rows]
+        values: "np.ndarray[Any, Any]" = lookup[codes]
+        return values
+
+
+def _parse_micros(amount: str) -> int:
+    """Parse an amount into micro-units, rounding half to even."""
+    try:
+        return int(Decimal(amount).scaleb(_MICROS_SCALE).to_integral_value())
+    except InvalidOperation as e:
+        raise ValueError(f"{amount} is not a valid amount.") from e
+
+
+class _MetricColumn:
+    """A metric column whose amounts are parsed once while appending.
+
+    With the micros dtype, amounts are parsed exactly into int64 micro-units,
+    so sums over them are exact.
+    """
+
+    def __init__(self, dtype: str, n_missing: int = 0) -> None:
+        self.dtype = dtype
+        self.values: Union["array[Any]", List[Optional[str]]]
+        if dtype == "string":
+            self.values = [None] * n_missing
+        elif dtype == _MICROS:
+            self.values = array("q", [_MISSING_MICROS] * n_missing)
+        else:
+            self.values = array("d", [math.nan] * n_missing)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, amount: str) -> None:
+        if isinstance(self.values, list):
+            self.values.append(amount)
+        elif self.dtype == _MICROS:
+            self.values.append(_parse_micros(amount))
+        else:
+            self.values.append(float(amount))
+
+    def append_missing(self) -> None:
+        if isinstance(self.values, list):
+            self.values.append(None)
+        elif self.dtype == _MICROS:
+            self.values.append(_MISSING_MICROS)
+        else:
+            self.values.append(math.nan)
+
+    def add(self, row: int, amount: str) -> None:
+        """Add amount to the value of an existing row."""
+        if isinstance(self.values, list):
+            current = self.values[row]
+            if current is not None:
+                # Keep the string representation exact.
+                amount = format(Decimal(current) + Decimal(amount), "f")
+            self.values[row] = amount
+        elif self.dtype == _MICROS:
+            micros = self.values[row]
+            if micros == _MISSING_MICROS:
+                micros = 0
+            self.values[row] = micros + _parse_micros(amount)
+        else:
+            value = self.values[row]
+            if math.isnan(value):
+                self.values[row] = float(amount)
+            else:
+                self.values[row] = value + float(amount)
+
+    def drop(self, n_rows: int) -> None:
+        del self.values[:n_rows]
+
+    def build(
+        self, n_rows: Optional[int] = None
+    ) -> Union["np.ndarray[Any, Any]", "pd.api.extensions.ExtensionArray"]:
+        import numpy as np
+        import pandas as pd
+
+        if isinstance(self.values, list):
+            return pd.array(self.values[:n_rows], dtype="string")
+        if self.dtype == _MICROS:
+            micros = np.frombuffer(self.values, dtype=np.int64)[:n_rows].copy()
+            return pd.arrays.IntegerArray(micros, micros == _MISSING_MICROS)
+        values = np.frombuffer(self.values, dtype=np.float64)[:n_rows]
+        if self.dtype == "float64":
+            return values
+        return pd.array(values).astype(self.dtype)
+
+    def to_numpy(self, n_rows: Optional[int] = None) -> "np.ndarray[Any, Any]":
+        """Return the values as a float64 array, or as an object array of strings.
+
+        Micros are returned as an int64 array, or as an object array with None
+        for missing values if there are any.
+        """
+        import numpy as np
+
+        if isinstance(self.values, list):
+            return np.array(self.values[:n_rows], dtype=object)
+        if self.dtype == _MICROS:
+            micros = np.frombuffer(self.values, dtype=np.int64)[:n_rows].copy()
+            missing = micros == _MISSING_MICROS
+            if not missing.any():
+                return micros
+            values = micros.astype(object)
+            values[missing] = None
+            return values
+        return np.frombuffer(self.values, dtype=np.float64)[:n_rows].copy()
+
+
+_Column = Union[_KeyColumn, _MetricColumn]
+
+
+def _remap_code(remap: Optional["np.ndarray[Any, Any]"], code: int) -> int:
+    return code if remap is None else int(remap[code])
+
+
+class _CostAndUsageBuilder:
+    """Builds a DataFrame from get_cost_and_usage responses column by column.
+
+    Pages are appended as they arrive, so no intermediate row objects are
+    created and the DataFrame is assembled once with its final dtypes.
+
+    With merge, the metrics of rows with the same time and keys are summed
+    into one row. Rows are only merged until they are flushed.
+    keys_dtype is the dtype of Time and group key columns, string or category.
+    With the micros metrics_dtype, each metric is followed by a key column of
+    its unit, named with the suffix Unit.
+    """
+
+    def __init__(
+        self,
+        metrics_dtype: str = "float64",
+        merge: bool = False,
+        keys_dtype: str = "string",
+    ) -> None:
+        _check_keys_dtype(keys_dtype)
+        self.metrics_dtype = metrics_dtype
+        self.keys_dtype = keys_dtype
+        self._columns: Dict[str, _Column] = {}
+        self._n_rows = 0
+        self._merge_index: Optional[Dict[Tuple[Any, ...], int]] = None
+        if merge:
+            self._merge_index = {}
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    def add_page(
+        self,
+        response: Dict[str, Any],
+        constants: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Append the rows of a response.
+
+        constants are extra key columns whose values are the same in every row.
+        """
+        group_definitions: List[str] = [
+            definition["Key"] for definition in response.get("GroupDefinitions", [])
+        ]
+        extra = list(constants.items()) if constants else []
+        for row in response["ResultsByTime"]:
+            time = self._key_column("Time").encode(row["TimePeriod"]["Start"])
+            if row["Total"]:
+                self._append_row(time, extra, row["Total"])
+            for group in row["Groups"]:
+                keys = itertools.chain(zip(group_definitions, group["Keys"]), extra)
+                self._append_row(time, keys, group["Metrics"])
+
+    def build(self, n_rows: Optional[int] = None) -> "pd.DataFrame":
+        """Build a DataFrame from the first n_rows rows, or from all rows."""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {name: column.build(n_rows) for name, column in self._columns.items()}
+        )
+
+    def flush(self, n_rows: Optional[int] = None) -> "pd.DataFrame":
+        """Build a DataFrame like build and drop its rows from the builder.
+
+        Columns are kept for later chunks, but dictionaries only keep the
+        values of the rows left, so they do not grow with the whole result.
+        """
+        if n_rows is None or n_rows > self._n_rows:
+            n_rows = self._n_rows
+        df = self.build(n_rows)
+        self.drop(n_rows)
+        return df
+
+    def drop(self, n_rows: int) -> None:
+        """Drop the first n_rows rows and the key values that only they used."""
+        remaps: Dict[str, "np.ndarray[Any, Any]"] = {}
+        for name, column in self._columns.items():
+            remap = column.drop(n_rows)
+            if remap is not None:
+                remaps[name] = remap
+        self._n_rows -= n_rows
+        if self._merge_index is not None:
+            # The rows left can still be summed into, under their new codes.
+            merge_index: Dict[Tuple[Any, ...], int] = {}
+            for (time, *codes), row in self._merge_index.items():
+                if row < n_rows:
+                    continue
+                key = (
+                    _remap_code(remaps.get("Time"), time),
+                    *(
+                        (name, _remap_code(remaps.get(name), code))
+                        for name, code in codes
+                    ),
+                )
+                merge_index[key] = row - n_rows
+            self._merge_index = merge_index
+
+    @property
+    def columns(self) -> Dict[str, _Column]:
+        """The columns by name, in the order they appeared."""
+        return self._columns
+
+    def _append_row(
+        self,
+        time: int,
+        keys: Iterable[Tuple[str, str]],
+        metrics: Dict[str, Dict[str, str]],
+    ) -> None:
+        codes = [(key, self._key_column(key).encode(value)) for key, value in keys]
+        if self._merge_index is not None:
+            index_key = (time, *codes)
+            row = self._merge_index.get(index_key)
+            if row is not None:
+                for name, metric in metrics.items():
+                    self._metric_column(name).add(row, metric["Amount"])
+                    if self.metrics_dtype == _MICROS:
+                        unit = self._key_column(name + "Unit")
+                        unit.codes[row] = unit.encode(metric["Unit"])
+                return
+            self._merge_index[index_key] = self._n_rows
+
+        self._key_column("Time").append_code(time)
+        for key, code in codes:
+            self._key_column(key).append_code(code)
+        for name, metric in metrics.items():
+            self._metric_column(name).append(metric["Amount"])
+            if self.metrics_dtype == _MICROS:
+                self._key_column(name + "Unit").append(metric["Unit"])
+        self._n_rows += 1
+        for column in self._columns.values():
+            if len(column) < self._n_rows:
+                column.append_missing()
+
+    def _key_column(self, name: str) -> _KeyColumn:
+        column = self._columns.get(name)
+        if column is None:
+            column = _KeyColumn(self._n_rows, self.keys_dtype)
+            self._columns[name] = column
+        assert isinstance(column, _KeyColumn)
+        return column
+
+    def _metric_column(self, name: str) -> _MetricColumn:
+        column = self._columns.get(name)
+        if column is None:
+            column = _MetricColumn(self.metrics_dtype, self._n_rows)
+            self._columns[name] = column
+        assert isinstance(column, _MetricColumn)
+        return column
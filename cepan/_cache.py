@@ -0,0 +1,155 @@
+import datetime
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+from cepan import _utils
+from cepan._canonical import _request_fingerprint
+
+if TYPE_CHECKING:
+    import boto3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    expires_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (key, seq)
+);
+"""
+
+
+class ResponseCache:
+    """A persistent cache of Cost Explorer responses backed by SQLite.
+
+    Responses are keyed by the API name and the canonical request arguments,
+    so equivalent requests share their entries.
+    Results that contain no estimated period are final and are cached
+    indefinitely. Other results expire after estimated_ttl.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite database file. It is created if it does not exist.
+    estimated_ttl : datetime.timedelta, optional
+        How long results with estimated periods are kept. The default is 1 hour.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> cache = ce.ResponseCache("cepan.sqlite3")
+    >>> df = ce.get_cost_and_usage(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     cache=cache,
+    ... )
+    """
+
+    def __init__(
+        self,
+        path: str,
+        estimated_ttl: datetime.timedelta = datetime.timedelta(hours=1),
+    ) -> None:
+        self.path = path
+        self.estimated_ttl = estimated_ttl
+        with closing(self._connect()) as connection:
+            connection.executescript(_SCHEMA)
+
+    def call_with_pagination(
+        self,
+        client: "boto3.client",
+        func_name: str,
+        args: Dict[str, Any],
+    ) -> Iterator[Dict[str, Any]]:
+        """Like _utils.call_with_pagination, but served from the cache on a hit."""
+        key = _request_fingerprint(func_name, args)
+        cached = self._get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+        pending = f"pending:{uuid.uuid4()}"
+        estimated = False
+        completed = False
+        try:
+            pages = _utils.call_with_pagination(client, func_name, args)
+            for seq, response in enumerate(pages):
+                estimated |= _is_estimated(response)
+                self._put_page(pending, seq, response)
+                yield response
+            expires_at: Optional[float] = None
+            if estimated:
+                expires_at = time.time() + self.estimated_ttl.total_seconds()
+            self._commit(pending, key, expires_at)
+            completed = True
+        finally:
+            if not completed:
+                self._discard(pending)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM entries")
+            connection.execute("DELETE FROM pages")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _get(self, key: str) -> Optional[Iterator[Dict[str, Any]]]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                """
+                SELECT pages.body FROM entries
+                JOIN pages ON pages.key = entries.key
+                WHERE entries.key = ?
+                AND (entries.expires_at IS NULL OR entries.expires_at > ?)
+                ORDER BY pages.seq
+                """,
+                (key, time.time()),
+            ).fetchall()
+        if not rows:
+            return None
+        return (json.loads(body) for body, in rows)
+
+    def _put_page(self, key: str, seq: int, response: Dict[str, Any]) -> None:
+        body = json.dumps(response, default=str)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO pages (key, seq, body) VALUES (?, ?, ?)",
+                (key, seq, body),
+            )
+
+    def _commit(self, pending: str, key: str, expires_at: Optional[float]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+            connection.execute(
+                "UPDATE pages SET key = ? WHERE key = ?",
+                (key, pending),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at) VALUES (?, ?)",
+                (key, expires_at),
+            )
+
+    def _discard(self, pending: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM pages WHERE key = ?", (pending,))
+
+
+def _is_estimated(response: Dict[str, Any]) -> bool:
+    results = response.get("ResultsByTime")
+    if results is None:
+        # Only results by time tell whether they are final.
+        return True
+    return any(result.get("Estimated", True) for result in results)
@@ -0,0 +1,41 @@
+from typing import Any, Dict, List
+
+from cepan import _utils
+from cepan._filter import _canonicalize_expression
+
+_PAGINATION_TOKENS = ("NextToken", "NextPageToken")
+
+
+def _canonicalize_metric(metric: str) -> str:
+    # The API accepts both BLENDED_COST and BlendedCost.
+    if metric.isupper():
+        return "".join(word.capitalize() for word in metric.split("_"))
+    return metric
+
+
+def _canonicalize_request(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the canonical form of built request arguments.
+
+    Equivalent requests, such as filters that differ only in the order of
+    their children or in service aliases, have the same canonical form.
+    Pagination tokens are removed.
+    """
+    canonical = {k: v for k, v in args.items() if k not in _PAGINATION_TOKENS}
+    if canonical.get("Filter"):
+        canonical["Filter"] = _canonicalize_expression(canonical["Filter"])
+    if "Metrics" in canonical:
+        metrics: List[str] = canonical["Metrics"]
+        canonical["Metrics"] = sorted({_canonicalize_metric(m) for m in metrics})
+    if "GroupBy" in canonical:
+        # The order of groups decides the order of columns, so it is kept.
+        group_by: List[Dict[str, str]] = []
+        for definition in canonical["GroupBy"]:
+            if definition not in group_by:
+                group_by.append(definition)
+        canonical["GroupBy"] = group_by
+    return canonical
+
+
+def _request_fingerprint(func_name: str, args: Dict[str, Any]) -> str:
+    """Return a stable hash of an API name and its canonical request."""
+    return _utils.fingerprint([func_name, _canonicalize_request(args)])
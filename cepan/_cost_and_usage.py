@@ -1,12 +1,47 @@
-from typing import Any, Dict, List, Optional, Set, Union
+import itertools
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import boto3
-import pandas as pd
+from cepan import _utils, exceptions
+from cepan._builder import _check_keys_dtype, _CostAndUsageBuilder
+from cepan._cache import ResponseCache
+from cepan._canonical import _request_fingerprint
+from cepan._filter import Filter, _build_filter, _shard_filter
+from cepan._group_by import _MAX_GROUP_BY, GroupBy, _build_group_by, _split_group_by
+from cepan._output import _build_output, _check_output, _copy_output
+from cepan._time_period import (
+    _GRANULARITY_ORDER,
+    TimePeriod,
+    _build_time_period,
+    _check_hourly_time_period,
+    _split_time_period,
+)
 
-from cepan import _utils
-from cepan._filter import Filter, _build_filter
-from cepan._group_by import GroupBy, _build_group_by
-from cepan._time_period import TimePeriod, _build_time_period
+if TYPE_CHECKING:
+    import boto3
+
+_T = TypeVar("_T")
+
+# Filters with longer value lists are split into several requests by default.
+_MAX_FILTER_VALUES = 1000
+
+# Identical queries in flight at the same time share one fetch.
+_SINGLE_FLIGHT = _utils.SingleFlight()
+
+# Hourly data is kept for a short recent window and grows fast, so hourly
+# requests are split into daily windows unless split_time_period is given.
+_DEFAULT_SPLIT_TIME_PERIOD = {"HOURLY": "DAILY"}
 
 
 def get_cost_and_usage(
@@ -16,8 +51,16 @@ def get_cost_and_usage(
     metrics: List[str] = ["UnblendedCost"],
     group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
     metrics_dtype: str = "float64",
-    session: Optional[boto3.Session] = None,
-) -> pd.DataFrame:
+    session: Optional["boto3.Session"] = None,
+    *,
+    keys_dtype: str = "string",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    output: str = "pandas",
+    time_index: bool = False,
+) -> Any:
     """Get cost and usage report.
 
     See also:
@@ -31,6 +74,8 @@ def get_cost_and_usage(
         you can directly use variables of dictionary types that boto3 can use.
     granularity : str
         Sets the AWS cost granularity to MONTHLY or DAILY , or HOURLY.
+        HOURLY data is only kept for the last 14 days, so earlier
+        time periods raise InvalidParameter before any request is sent.
     filter : Union[Filter, Dict[str, Any]], optional
         Filters AWS costs by different dimensions.
         In addition to the Filter type,
@@ -41,16 +86,53 @@ def get_cost_and_usage(
         You can group AWS costs using up to two different groups.
         In addition to the Filter type,
         you can directly use variables of dictionary types that boto3 can use.
+        With more than two groups, one request is sent per combination of
+        the values of the extra groups, using up to max_workers threads.
+        Costs without a value of an extra group get an empty key.
     metrics_dtype: str, optional
         The dtype of metrics. The default is float64.
         If you want to keep the number of significant digits, specify the string type.
+        micros parses amounts exactly into Int64 micro-units, so sums are exact,
+        and adds a column of the unit of each metric, such as UnblendedCostUnit.
     boto3_session : boto3.Session(), optional
         Boto3 Session. The default boto3 session will be used if session receive None.
+    keys_dtype: str, optional
+        The dtype of Time and group key columns, string or category.
+        The default is string. category keeps each distinct value once,
+        which saves memory and speeds up groupby on large results.
+    split_time_period: str, optional
+        Splits time_period into calendar aligned DAILY or MONTHLY windows
+        and fetches them concurrently. The results are merged in time order.
+        It must not be finer than granularity.
+        HOURLY requests are split into DAILY windows if split_time_period
+        receive None, which sends one request per day and multiplies the
+        number of requests accordingly.
+    max_filter_values: int, optional
+        Filters with longer value lists are split into several requests,
+        whose results are summed. The default is 1000.
+        Only exact matches that every cost must satisfy are split,
+        so that no cost is counted twice. None disables splitting.
+    max_workers: int, optional
+        The maximum number of requests sent concurrently. The default is 4.
+    cache: ResponseCache, optional
+        Serves repeated requests from a persistent cache.
+        Each window of split_time_period is cached separately.
+    output : str, optional
+        The type of the result. pandas for a pandas.DataFrame, pyarrow for
+        a pyarrow.Table, polars for a polars.DataFrame, numpy for a NumPy
+        record array or tuples for a list of row tuples.
+        The default is pandas.
+    time_index : bool, optional
+        Returns Time as a DatetimeIndex instead of a column.
+        Hourly times are in UTC. Only the pandas output supports it.
+        The default is False.
 
     Returns
     -------
     pandas.DataFrame
-        Result as a Pandas DataFrame.
+        Result as a Pandas DataFrame, or in the type given by output.
+        Identical queries called concurrently, for example from several
+        threads, share one fetch and receive copies of its result.
 
     Examples
     --------
@@ -69,58 +151,427 @@ def get_cost_and_usage(
     ...     group_by=ce.GroupBy(["SERVICE", "AZ"]),
     ... )
     """
+    _check_output(output, time_index)
+    _check_keys_dtype(keys_dtype)
     client: boto3.client = _utils.client("ce", session)
+    args = _build_args(time_period, granularity, filter, metrics, group_by)
+
+    def fetch() -> Any:
+        plan = _plan_requests(
+            client, args, split_time_period, max_filter_values, max_workers
+        )
+        response_iterator = _fetch_pages(client, plan.requests, max_workers, cache)
+
+        builder = _CostAndUsageBuilder(metrics_dtype, plan.merge, keys_dtype)
+        for (_, constants), response in response_iterator:
+            builder.add_page(response, constants)
+        return _build_output(builder.columns, len(builder), output, time_index)
+
+    # Clients are cached per session, so they tell callers' sessions apart.
+    key = (
+        id(client),
+        _request_fingerprint("get_cost_and_usage", args),
+        metrics_dtype,
+        keys_dtype,
+        split_time_period,
+        max_filter_values,
+        output,
+        time_index,
+    )
+    result, shared = _SINGLE_FLIGHT.do(key, fetch)
+    # Each caller owns its result.
+    return _copy_output(result, output) if shared else result
+
+
+def iter_cost_and_usage(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    chunk_size: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    *,
+    keys_dtype: str = "string",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    output: str = "pandas",
+) -> Iterator[Any]:
+    """Iterate over cost and usage report in DataFrame chunks.
+
+    Unlike get_cost_and_usage, each chunk is yielded as soon as it is parsed,
+    so memory usage does not grow with the size of the whole result.
+
+    Parameters
+    ----------
+    time_period : Union[TimePeriod, Dict[str, str]]
+        Sets the start and end dates for retrieving AWS costs.
+        In addition to the TimePeriod type,
+        you can directly use variables of dictionary types that boto3 can use.
+    granularity : str
+        Sets the AWS cost granularity to MONTHLY or DAILY , or HOURLY.
+        HOURLY data is only kept for the last 14 days, so earlier
+        time periods raise InvalidParameter before any request is sent.
+    filter : Union[Filter, Dict[str, Any]], optional
+        Filters AWS costs by different dimensions.
+        In addition to the Filter type,
+        you can directly use variables of dictionary types that boto3 can use.
+    metrics : List[str], optional
+        Which metrics are returned in the query.
+    group_by : Union[GroupBy, List[Dict[str, str]]], optional
+        You can group AWS costs using up to two different groups.
+        In addition to the Filter type,
+        you can directly use variables of dictionary types that boto3 can use.
+        With more than two groups, one request is sent per combination of
+        the values of the extra groups, using up to max_workers threads.
+        Costs without a value of an extra group get an empty key.
+    metrics_dtype: str, optional
+        The dtype of metrics. The default is float64.
+        If you want to keep the number of significant digits, specify the string type.
+        micros parses amounts exactly into Int64 micro-units, so sums are exact,
+        and adds a column of the unit of each metric, such as UnblendedCostUnit.
+    chunk_size: int, optional
+        The number of rows in each chunk. The last chunk may be smaller.
+        One chunk per API page is yielded if chunk_size receive None.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+    keys_dtype: str, optional
+        The dtype of Time and group key columns, string or category.
+        The default is string. category keeps each distinct value once,
+        which saves memory and speeds up groupby on large results.
+    split_time_period: str, optional
+        Splits time_period into calendar aligned DAILY or MONTHLY windows
+        and fetches them concurrently. The results are merged in time order.
+        It must not be finer than granularity.
+        HOURLY requests are split into DAILY windows if split_time_period
+        receive None, which sends one request per day and multiplies the
+        number of requests accordingly.
+    max_filter_values: int, optional
+        Filters with longer value lists are split into several requests,
+        whose results are summed. The default is 1000.
+        Only exact matches that every cost must satisfy are split,
+        so that no cost is counted twice. None disables splitting.
+        The rows of a split filter are yielded once every request of their
+        window of split_time_period is summed, or at the end without
+        split_time_period, so split_time_period bounds memory usage.
+    max_workers: int, optional
+        The maximum number of requests sent concurrently. The default is 4.
+    cache: ResponseCache, optional
+        Serves repeated requests from a persistent cache.
+        Each window of split_time_period is cached separately.
+    output : str, optional
+        The type of each chunk, as in get_cost_and_usage. The default is pandas.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunk of the result as a Pandas DataFrame, or in the type given by output.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> for df in ce.iter_cost_and_usage(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2021, 1, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     group_by=ce.GroupBy(["LINKED_ACCOUNT", "USAGE_TYPE"]),
+    ...     chunk_size=100000,
+    ... ):
+    ...     df.to_parquet(...)
+    """
+    _check_output(output)
+    _check_keys_dtype(keys_dtype)
+
+    def build(builder: _CostAndUsageBuilder, n_rows: int) -> Any:
+        return _build_output(builder.columns, n_rows, output)
+
+    yield from _iter_chunks(
+        _build_args(time_period, granularity, filter, metrics, group_by),
+        metrics_dtype,
+        keys_dtype,
+        chunk_size,
+        split_time_period,
+        max_filter_values,
+        max_workers,
+        cache,
+        session,
+        build,
+    )
+
+
+def _iter_chunks(
+    args: Dict[str, Any],
+    metrics_dtype: str,
+    keys_dtype: str,
+    chunk_size: Optional[int],
+    split_time_period: Optional[str],
+    max_filter_values: Optional[int],
+    max_workers: Optional[int],
+    cache: Optional[ResponseCache],
+    session: Optional["boto3.Session"],
+    build: Callable[[_CostAndUsageBuilder, int], _T],
+    func_name: str = "get_cost_and_usage",
+) -> Iterator[_T]:
+    """Fetch the pages of a request and yield chunks of its rows.
+
+    build(builder, n_rows) builds a chunk from the first n_rows rows.
+    Rows of split filters are only built once every shard of their time
+    window is summed into them.
+    Rows are dropped from the builder once built, with the key values that
+    only they used, so memory usage does not grow with the result.
+    """
+    if chunk_size is not None and chunk_size <= 0:
+        raise exceptions.InvalidParameter(
+            f"chunk_size must be a positive integer, but {chunk_size} was given."
+        )
+    client: boto3.client = _utils.client("ce", session)
+    plan = _plan_requests(
+        client, args, split_time_period, max_filter_values, max_workers
+    )
+    response_iterator = _fetch_pages(
+        client, plan.requests, max_workers, cache, func_name
+    )
+
+    builder = _CostAndUsageBuilder(metrics_dtype, plan.merge, keys_dtype)
+
+    def flush(n_rows: int) -> _T:
+        chunk = build(builder, n_rows)
+        builder.drop(n_rows)
+        return chunk
+
+    def flush_full() -> Iterator[_T]:
+        if chunk_size is None:
+            if len(builder):
+                yield flush(len(builder))
+            return
+        while len(builder) >= chunk_size:
+            yield flush(chunk_size)
+
+    window = None
+    for (request, constants), response in response_iterator:
+        if plan.merge and request["TimePeriod"] != window:
+            # Requests are ordered by window, so the rows of earlier windows
+            # are summed over every shard once the next window starts.
+            yield from flush_full()
+            window = request["TimePeriod"]
+        builder.add_page(response, constants)
+        if not plan.merge:
+            yield from flush_full()
+    yield from flush_full()
+    if len(builder):
+        yield flush(len(builder))
+
+
+def _build_args(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None],
+    metrics: List[str],
+    group_by: Union[GroupBy, List[Dict[str, str]], None],
+) -> Dict[str, Any]:
     args: Dict[str, Any] = {
         "TimePeriod": _build_time_period(time_period, granularity == "HOURLY"),
         "Granularity": granularity,
         "Metrics": metrics,
     }
+    if granularity == "HOURLY":
+        _check_hourly_time_period(args["TimePeriod"])
     if filter:
         args["Filter"] = _build_filter(filter)
     if group_by:
         args["GroupBy"] = _build_group_by(group_by)
-    response_iterator = _utils.call_with_pagination(
-        client,
-        "get_cost_and_usage",
-        args,
-    )
+    return args
+
+
+# A request and the group key columns to add to each of its rows.
+_Request = Tuple[Dict[str, Any], Dict[str, str]]
+
+
+@dataclass
+class _Plan:
+    requests: List[_Request]
+    # Whether rows of different requests may have to be summed.
+    merge: bool = False
+
+
+def _fetch_pages(
+    client: "boto3.client",
+    requests: List[_Request],
+    max_workers: Optional[int],
+    cache: Optional[ResponseCache],
+    func_name: str = "get_cost_and_usage",
+) -> Iterator[Tuple[_Request, Dict[str, Any]]]:
+    """Yield each page with its request, in the order of the requests."""
+    call_with_pagination = _utils.call_with_pagination
+    if cache is not None:
+        call_with_pagination = cache.call_with_pagination
+
+    if len(requests) == 1:
+        for response in call_with_pagination(client, func_name, requests[0][0]):
+            yield requests[0], response
+        return
+
+    def fetch(request: _Request) -> Iterator[Tuple[_Request, Dict[str, Any]]]:
+        for response in call_with_pagination(client, func_name, request[0]):
+            yield request, response
+
+    # Pages are streamed, so a long request is not held in memory at once.
+    yield from _utils.chain_concurrently(fetch, requests, max_workers)
+
+
+def _plan_requests(
+    client: "boto3.client",
+    args: Dict[str, Any],
+    split_time_period: Optional[str],
+    max_filter_values: Optional[int],
+    max_workers: Optional[int],
+) -> _Plan:
+    plan = _Plan([(args, {})])
+    if split_time_period is None:
+        split_time_period = _DEFAULT_SPLIT_TIME_PERIOD.get(args["Granularity"])
+    if len(args.get("GroupBy", [])) > _MAX_GROUP_BY:
+        plan.requests = _fan_out_group_by(client, args, max_workers)
+    if max_filter_values is not None:
+        requests: List[_Request] = []
+        for request, constants in plan.requests:
+            if "Filter" not in request:
+                requests.append((request, constants))
+                continue
+            filters = _shard_filter(request["Filter"], max_filter_values)
+            plan.merge |= len(filters) > 1
+            for filter in filters:
+                requests.append((dict(request, Filter=filter), constants))
+        plan.requests = requests
+    if split_time_period is not None:
+        windows = _split_windows(args, split_time_period)
+        # Requests are ordered by window, so their rows arrive in time order.
+        plan.requests = [
+            (dict(request, TimePeriod=window), constants)
+            for window in windows
+            for request, constants in plan.requests
+        ]
+    return plan
+
+
+def _fan_out_group_by(
+    client: "boto3.client",
+    args: Dict[str, Any],
+    max_workers: Optional[int],
+) -> List[_Request]:
+    """Plan one request per combination of values of the extra group keys.
+
+    The API groups by the first two keys. The other keys are turned into
+    filters, and their values are added to the rows as constant columns.
+    """
+    group_by, extra = _split_group_by(args["GroupBy"])
+
+    def fetch_values(definition: Dict[str, str]) -> List[str]:
+        return _get_group_values(client, args, definition)
+
+    values = list(_utils.map_concurrently(fetch_values, extra, max_workers))
+    requests: List[_Request] = []
+    for combination in itertools.product(*values):
+        expressions: List[Dict[str, Any]] = []
+        if "Filter" in args:
+            expressions.append(args["Filter"])
+        for definition, value, known in zip(extra, combination, values):
+            expression = _group_value_filter(definition, value, known)
+            if expression is not None:
+                expressions.append(expression)
+        request = dict(args, GroupBy=group_by)
+        if expressions:
+            request["Filter"] = (
+                expressions[0] if len(expressions) == 1 else {"And": expressions}
+            )
+        constants = {
+            definition["Key"]: _group_value_key(definition, value)
+            for definition, value in zip(extra, combination)
+        }
+        requests.append((request, constants))
+    return requests
+
+
+def _get_group_values(
+    client: "boto3.client",
+    args: Dict[str, Any],
+    definition: Dict[str, str],
+) -> List[str]:
+    base: Dict[str, Any] = {"TimePeriod": args["TimePeriod"]}
+    if "Filter" in args:
+        base["Filter"] = args["Filter"]
+    values: List[str] = []
+    if definition["Type"] == "DIMENSION":
+        request = dict(base, Dimension=definition["Key"], Context="COST_AND_USAGE")
+        pages = _utils.call_with_pagination(client, "get_dimension_values", request)
+        for response in pages:
+            values.extend(row["Value"] for row in response["DimensionValues"])
+        # Costs without a value are fetched with the empty value.
+        values.append("")
+    elif definition["Type"] == "TAG":
+        request = dict(base, TagKey=definition["Key"])
+        for response in _utils.call_with_pagination(client, "get_tags", request):
+            values.extend(response["Tags"])
+        # Untagged costs are fetched with the empty value.
+        values.append("")
+    elif definition["Type"] == "COST_CATEGORY":
+        request = dict(base, CostCategoryName=definition["Key"])
+        pages = _utils.call_with_pagination(client, "get_cost_categories", request)
+        for response in pages:
+            values.extend(response["CostCategoryValues"])
+        # Uncategorized costs are fetched with the empty value.
+        values.append("")
+    else:
+        raise exceptions.InvalidParameter(
+            f"{definition['Type']} is invalid, valid values are DIMENSION, TAG, COST_CATEGORY."  # noqa
+        )
+    return list(dict.fromkeys(values))
+
+
+def _group_value_filter(
+    definition: Dict[str, str], value: str, values: List[str]
+) -> Optional[Dict[str, Any]]:
+    """Return the filter of one value of a group, or None if it matches all costs.
+
+    The empty value of a dimension matches the costs that have none of its values.
+    """
+    expression: Dict[str, Any] = {"Key": definition["Key"], "Values": [value]}
+    if definition["Type"] == "DIMENSION":
+        if value:
+            return {"Dimensions": expression}
+        expression["Values"] = [known for known in values if known]
+        if not expression["Values"]:
+            return None
+        return {"Not": {"Dimensions": expression}}
+    if not value:
+        expression = {"Key": definition["Key"], "MatchOptions": ["ABSENT"]}
+    if definition["Type"] == "TAG":
+        return {"Tags": expression}
+    return {"CostCategories": expression}
+
+
+def _group_value_key(definition: Dict[str, str], value: str) -> str:
+    # Matches the keys of groups returned by the API.
+    if definition["Type"] == "DIMENSION":
+        return value
+    return f"{definition['Key']}${value}"
+
 
-    pre_df: List[Dict[str, str]] = []
-    for response in response_iterator:
-        group_definitions: List[str] = []
-        metrics_columns: Set[str] = set()
-        for definition in response.get("GroupDefinitions", []):
-            group_definitions.append(definition["Key"])
-        for row in response["ResultsByTime"]:
-            time: str = row["TimePeriod"]["Start"]
-            if row["Total"]:
-                processed = _process_total_row(time, row["Total"])
-                pre_df.append(processed)
-                metrics_columns |= row["Total"].keys()
-            for group in row["Groups"]:
-                processed = _process_group_row(time, group, group_definitions)
-                pre_df.append(processed)
-                metrics_columns |= group["Metrics"].keys()
-    df = pd.DataFrame(pre_df, dtype="string")
-    if metrics_dtype == "string":
-        return df
-    type_map = {metrics_column: metrics_dtype for metrics_column in metrics_columns}
-    return df.astype(type_map)
-
-
-def _process_total_row(time: str, total_row: Dict[str, Any]) -> Dict[str, str]:
-    processed: Dict[str, str] = {"Time": time}
-    for key, val in total_row.items():
-        processed[key] = val["Amount"]
-    return processed
-
-
-def _process_group_row(
-    time: str, group_row: Dict[str, Any], group_definitions: List[str]
-) -> Dict[str, str]:
-    processed: Dict[str, str] = {"Time": time}
-    for definition, val in zip(group_definitions, group_row["Keys"]):
-        processed[definition] = val
-    for key, val in group_row["Metrics"].items():
-        processed[key] = val["Amount"]
-    return processed
+def _split_windows(
+    args: Dict[str, Any], split_time_period: str
+) -> List[Dict[str, str]]:
+    granularity = args["Granularity"]
+    if split_time_period not in ("DAILY", "MONTHLY"):
+        raise exceptions.InvalidParameter(
+            f"{split_time_period} is invalid, valid values are DAILY, MONTHLY."
+        )
+    if _GRANULARITY_ORDER[split_time_period] < _GRANULARITY_ORDER.get(granularity, 0):
+        raise exceptions.InvalidParameter(
+            f"split_time_period {split_time_period} is finer than granularity {granularity}."  # noqa
+        )
+    return _split_time_period(args["TimePeriod"], split_time_period)
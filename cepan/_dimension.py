@@ -1,13 +1,15 @@
-from typing import Any, Dict, List, Optional, Union
-
-import boto3
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from cepan import _utils, exceptions
+from cepan._builder import _Column, _KeyColumn
 from cepan._filter import Filter, _build_filter
+from cepan._output import _build_output, _check_output
 from cepan._sort_by import SortBy, _build_sort_by
 from cepan._time_period import TimePeriod, _build_time_period
 
+if TYPE_CHECKING:
+    import boto3
+
 _COST_AND_USAGE_DIMENSIONS = [
     "AZ",
     "DATABASE_ENGINE",
@@ -83,8 +85,9 @@ def get_dimension_values(
     filter: Union[Filter, Dict[str, Any], None] = None,
     sort_by: Union[List[SortBy], List[Dict[str, str]], None] = None,
     max_results: Optional[int] = None,
-    session: Optional[boto3.Session] = None,
-) -> pd.DataFrame:
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
     """Get dimension values.
 
     See also:
@@ -115,11 +118,13 @@ def get_dimension_values(
         The maximum number of objects that to be returned for this request.
     boto3_session : boto3.Session(), optional
         Boto3 Session. The default boto3 session will be used if session receive None.
+    output : str, optional
+        The type of the result, as in get_cost_and_usage. The default is pandas.
 
     Returns
     -------
     pandas.DataFrame
-        Result as a Pandas DataFrame.
+        Result as a Pandas DataFrame, or in the type given by output.
 
     Examples
     --------
@@ -136,6 +141,7 @@ def get_dimension_values(
     ...     search_string="Amazon",
     ... )
     """
+    _check_output(output)
     client: boto3.client = _utils.client("ce", session)
     args: Dict[str, Any] = {
         "TimePeriod": _build_time_period(time_period),
@@ -151,18 +157,100 @@ def get_dimension_values(
         args["SortBy"] = _build_sort_by(sort_by)
     if max_results and sort_by:
         args["MaxResults"] = max_results
-    response_iterator = _utils.call_with_pagination(
-        client,
-        "get_dimension_values",
-        args,
-    )
 
-    pre_df: List[Dict[str, str]] = []
-    for response in response_iterator:
-        for row in response["DimensionValues"]:
-            if not row["Value"]:
-                continue
-            pre_row: Dict[str, str] = {"dimension": dimension}
-            pre_row["value"] = row["Value"]
-            pre_df.append(pre_row)
-        return pd.DataFrame(pre_df, dtype="string")
+    columns: Dict[str, _Column] = {"dimension": _KeyColumn(), "value": _KeyColumn()}
+    for value in _fetch_dimension_values(client, args):
+        columns["dimension"].append(dimension)
+        columns["value"].append(value)
+    return _build_output(columns, len(columns["value"]), output)
+
+
+def get_dimension_catalog(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    dimensions: Optional[List[str]] = None,
+    context: str = "COST_AND_USAGE",
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    max_workers: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
+    """Get the values of many dimensions at once.
+
+    The values of each dimension are fetched concurrently, every page of them,
+    and returned in one long result.
+
+    Parameters
+    ----------
+    time_period : Union[TimePeriod, Dict[str, str]]
+        Sets the start and end dates for retrieving AWS costs.
+    dimensions : List[str], optional
+        The names of the dimensions.
+        All dimensions of context are fetched if dimensions receive None.
+    context : str, optional
+        The context for the call to get_dimension_values.
+        This can be RESERVATIONS, COST_AND_USAGE or SAVINGS_PLANS.
+        The default is COST_AND_USAGE.
+    filter : Union[Filter, Dict[str, Any]], optional
+        Filters AWS costs by different dimensions.
+    max_workers: int, optional
+        The maximum number of dimensions fetched concurrently. The default is 4.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+    output : str, optional
+        The type of the result, as in get_cost_and_usage. The default is pandas.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The dimension and value columns of every dimension, in the order of
+        dimensions, or in the type given by output.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> df = ce.get_dimension_catalog(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ...     dimensions=["SERVICE", "REGION", "LINKED_ACCOUNT"],
+    ... )
+    """
+    _check_output(output)
+    if dimensions is None:
+        dimensions = show_dimensions(context)
+    client: boto3.client = _utils.client("ce", session)
+    time_period = _build_time_period(time_period)
+    built_filter = _build_filter(filter) if filter else None
+
+    def fetch(dimension: str) -> List[str]:
+        args: Dict[str, Any] = {
+            "TimePeriod": time_period,
+            "Dimension": dimension,
+            "Context": context,
+        }
+        if built_filter:
+            args["Filter"] = built_filter
+        return _fetch_dimension_values(client, args)
+
+    keys = _KeyColumn()
+    values = _KeyColumn()
+    fetched = _utils.map_concurrently(fetch, dimensions, max_workers)
+    for dimension, fetched_values in zip(dimensions, fetched):
+        code = keys.encode(dimension)
+        for value in fetched_values:
+            keys.append_code(code)
+            values.append(value)
+    columns: Dict[str, _Column] = {"dimension": keys, "value": values}
+    return _build_output(columns, len(values), output)
+
+
+def _fetch_dimension_values(client: "boto3.client", args: Dict[str, Any]) -> List[str]:
+    """Return the non-empty values of every page of get_dimension_values."""
+    values: List[str] = []
+    for response in _utils.call_with_pagination(client, "get_dimension_values", args):
+        values.extend(
+            row["Value"] for row in response["DimensionValues"] if row["Value"]
+        )
+    return values
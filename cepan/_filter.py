@@ -1,20 +1,89 @@
+import itertools
+import json
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Protocol, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+)
 
+from cepan import _utils, exceptions
 from cepan._alias import _resolve_service_alias
 
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+    import pandas as pd
+
 
 class Filter(Protocol):
     def build_expression(self) -> Dict[str, Any]:
         ...
 
 
+class _Canonical:
+    """Equivalent filters have the same canonical form and fingerprint,
+    and any filter can be evaluated locally over a result.
+
+    A mixin of the Filter classes, which provide build_expression.
+    """
+
+    def canonical(self: Filter) -> Filter:
+        """Return the canonical form of the filter.
+
+        Aliases are resolved, values are deduplicated and sorted,
+        and nested And and Or are flattened and sorted.
+        """
+        return _parse_filter(_canonicalize_expression(self.build_expression()))
+
+    def fingerprint(self: Filter) -> str:
+        """Return a stable hash of the canonical form of the filter."""
+        return _utils.fingerprint(_canonicalize_expression(self.build_expression()))
+
+    def __hash__(self: Filter) -> int:
+        expression = _canonicalize_expression(self.build_expression())
+        return hash(_utils.fingerprint(expression))
+
+    def evaluate(self: Filter, df: "pd.DataFrame") -> "pd.Series":
+        """Return a boolean mask of the rows of a result that match the filter.
+
+        The filtered dimensions, tags and cost categories must be columns of df,
+        that is the result must be grouped by them.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            A result of get_cost_and_usage.
+
+        Returns
+        -------
+        pandas.Series
+            True for the rows that match the filter.
+
+        Examples
+        --------
+        >>> import cepan as ce
+        >>> f = ce.Dimensions("SERVICE", ["EC2"])
+        >>> ec2 = df[f.evaluate(df)]
+        """
+        return _evaluate_expression(self.build_expression(), df)
+
+
 @dataclass
-class _BaseFilter:
+class _BaseFilter(_Canonical):
     key: str
     values: List[str]
     match_options: Optional[List[str]] = None
 
+    __hash__ = _Canonical.__hash__
+
     def _build_base_expression(self) -> Dict[str, Any]:
         filter: Dict[str, Any] = {"Key": self.key, "Values": self.values}
         if self.match_options:
@@ -61,9 +130,11 @@ class CostCategories(_BaseFilter):
 
 
 @dataclass
-class _CompositeFilter:
+class _CompositeFilter(_Canonical):
     filters: List[Filter]
 
+    __hash__ = _Canonical.__hash__
+
     def _build_composite_expression(self) -> List[Dict[str, Any]]:
         return [f.build_expression() for f in self.filters]
 
@@ -83,11 +154,13 @@ class Or(_CompositeFilter):
 
 
 @dataclass
-class Not:
+class Not(_Canonical):
     """Return results that don't match a Filter object."""
 
     filter: Filter
 
+    __hash__ = _Canonical.__hash__
+
     def build_expression(self) -> Dict[str, Any]:
         return {"Not": self.filter.build_expression()}
 
@@ -96,3 +169,181 @@ def _build_filter(filter: Union[Filter, Dict[str, Any]]) -> Dict[str, Any]:
     if isinstance(filter, Dict):
         return filter
     return filter.build_expression()
+
+
+def _shard_filter(expression: Dict[str, Any], max_values: int) -> List[Dict[str, Any]]:
+    """Split a built filter whose value lists are longer than max_values.
+
+    Only exact matches that every cost must satisfy are split, that is the
+    filter itself or the children of And. The shards are then disjoint,
+    since a cost has one value per dimension, tag key or cost category.
+    """
+    for kind in ("Dimensions", "Tags", "CostCategories"):
+        if kind not in expression:
+            continue
+        leaf: Dict[str, Any] = expression[kind]
+        values: List[str] = list(dict.fromkeys(leaf.get("Values", [])))
+        exact = leaf.get("MatchOptions", ["EQUALS"]) == ["EQUALS"]
+        if len(values) <= max_values or not exact:
+            return [expression]
+        bounds = list(range(0, len(values), max_values)) + [len(values)]
+        return [
+            {kind: dict(leaf, Values=values[start:end])}
+            for start, end in zip(bounds, bounds[1:])
+        ]
+    if "And" in expression:
+        children = [_shard_filter(child, max_values) for child in expression["And"]]
+        return [{"And": list(shard)} for shard in itertools.product(*children)]
+    return [expression]
+
+
+def _canonicalize_expression(expression: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the canonical form of a built filter."""
+    for kind in ("Dimensions", "Tags", "CostCategories"):
+        if kind not in expression:
+            continue
+        leaf: Dict[str, Any] = dict(expression[kind])
+        values: List[str] = leaf.get("Values", [])
+        if kind == "Dimensions" and leaf["Key"] == "SERVICE":
+            values = [_resolve_service_alias(value) for value in values]
+        if "Values" in leaf:
+            leaf["Values"] = sorted(set(values))
+        match_options: List[str] = sorted(set(leaf.get("MatchOptions", [])))
+        if match_options and match_options != ["EQUALS"]:
+            leaf["MatchOptions"] = match_options
+        else:
+            leaf.pop("MatchOptions", None)
+        return {kind: leaf}
+    for kind in ("And", "Or"):
+        if kind not in expression:
+            continue
+        children: Dict[str, Dict[str, Any]] = {}
+        for child in expression[kind]:
+            child = _canonicalize_expression(child)
+            # And and Or are associative, so nested ones are flattened.
+            grandchildren = child[kind] if kind in child else [child]
+            for grandchild in grandchildren:
+                children[json.dumps(grandchild, sort_keys=True)] = grandchild
+        if len(children) == 1:
+            return next(iter(children.values()))
+        return {kind: [children[key] for key in sorted(children)]}
+    if "Not" in expression:
+        child = _canonicalize_expression(expression["Not"])
+        if "Not" in child:
+            return dict(child["Not"])
+        return {"Not": child}
+    return expression
+
+
+def _parse_filter(expression: Dict[str, Any]) -> Filter:
+    """Convert a built filter back to Filter objects."""
+    leaves: Dict[str, Callable[..., Filter]] = {
+        "Dimensions": Dimensions,
+        "Tags": Tags,
+        "CostCategories": CostCategories,
+    }
+    for kind, leaf_class in leaves.items():
+        if kind in expression:
+            leaf = expression[kind]
+            return leaf_class(
+                leaf["Key"], list(leaf.get("Values", [])), leaf.get("MatchOptions")
+            )
+    if "And" in expression:
+        return And([_parse_filter(child) for child in expression["And"]])
+    if "Or" in expression:
+        return Or([_parse_filter(child) for child in expression["Or"]])
+    if "Not" in expression:
+        return Not(_parse_filter(expression["Not"]))
+    raise exceptions.InvalidParameter(f"{expression} is not a valid filter.")
+
+
+def _filter_references(expression: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """Return the kinds and keys of the leaves of a built filter."""
+    for kind in ("Dimensions", "Tags", "CostCategories"):
+        if kind in expression:
+            return {(kind, expression[kind]["Key"])}
+    references: Set[Tuple[str, str]] = set()
+    for kind in ("And", "Or"):
+        for child in expression.get(kind, []):
+            references |= _filter_references(child)
+    if "Not" in expression:
+        references |= _filter_references(expression["Not"])
+    return references
+
+
+def _evaluate_expression(expression: Dict[str, Any], df: "pd.DataFrame") -> "pd.Series":
+    """Evaluate a built filter over a result DataFrame."""
+    import pandas as pd
+
+    for kind in ("Dimensions", "Tags", "CostCategories"):
+        if kind in expression:
+            return _evaluate_leaf(kind, expression[kind], df)
+    if "And" in expression:
+        mask = pd.Series(True, index=df.index)
+        for child in expression["And"]:
+            mask &= _evaluate_expression(child, df)
+        return mask
+    if "Or" in expression:
+        mask = pd.Series(False, index=df.index)
+        for child in expression["Or"]:
+            mask |= _evaluate_expression(child, df)
+        return mask
+    if "Not" in expression:
+        return ~_evaluate_expression(expression["Not"], df)
+    raise exceptions.InvalidParameter(f"{expression} is not a valid filter.")
+
+
+def _evaluate_leaf(kind: str, leaf: Dict[str, Any], df: "pd.DataFrame") -> "pd.Series":
+    import numpy as np
+    import pandas as pd
+
+    key: str = leaf["Key"]
+    if key not in df.columns:
+        raise exceptions.InvalidParameter(
+            f"{key} is not a column of the result, group by it to filter locally."
+        )
+    # A column has few distinct values, so only those are matched.
+    codes, uniques = pd.factorize(df[key])
+    values = [str(value) for value in uniques]
+    if kind != "Dimensions":
+        # Tag and cost category groups are returned as Key$value.
+        values = [value.partition("$")[2] for value in values]
+    matched = _match(kind, leaf, values)
+    # Code -1 is a missing value, which only matches ABSENT.
+    absent = "ABSENT" in (leaf.get("MatchOptions") or [])
+    lookup = np.append(matched, absent)
+    return pd.Series(lookup[codes], index=df.index)
+
+
+def _match(
+    kind: str, leaf: Dict[str, Any], values: List[str]
+) -> "npt.NDArray[np.bool_]":
+    import numpy as np
+
+    options = set(leaf.get("MatchOptions") or ["EQUALS"])
+    if "ABSENT" in options:
+        return np.array([value == "" for value in values], dtype=bool)
+    patterns: List[str] = leaf.get("Values", [])
+    if kind == "Dimensions" and leaf["Key"] == "SERVICE":
+        patterns = [_resolve_service_alias(pattern) for pattern in patterns]
+    if "GREATER_THAN_OR_EQUAL" in options:
+        threshold = min(float(pattern) for pattern in patterns)
+        return np.array([float(value) >= threshold for value in values], dtype=bool)
+    if "CASE_INSENSITIVE" in options:
+        values = [value.casefold() for value in values]
+        patterns = [pattern.casefold() for pattern in patterns]
+    if "STARTS_WITH" in options:
+        return np.array(
+            [value.startswith(tuple(patterns)) for value in values], dtype=bool
+        )
+    if "ENDS_WITH" in options:
+        return np.array(
+            [value.endswith(tuple(patterns)) for value in values], dtype=bool
+        )
+    if "CONTAINS" in options:
+        return np.array(
+            [any(pattern in value for pattern in patterns) for value in values],
+            dtype=bool,
+        )
+    targets = set(patterns)
+    return np.array([value in targets for value in values], dtype=bool)
@@ -1,5 +1,10 @@
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+from cepan import _utils
+
+# The maximum number of groups the API accepts in one request.
+_MAX_GROUP_BY = 2
 
 
 @dataclass
@@ -27,6 +32,25 @@ class GroupBy:
                 group_by.append({"Type": "COST_CATEGORY", "Key": cost_category})
         return group_by
 
+    def canonical(self) -> "GroupBy":
+        """Return the group by with duplicated keys removed."""
+
+        def deduplicate(keys: Optional[List[str]]) -> Optional[List[str]]:
+            return list(dict.fromkeys(keys)) if keys else None
+
+        return GroupBy(
+            dimensions=deduplicate(self.dimensions),
+            tags=deduplicate(self.tags),
+            cost_categories=deduplicate(self.cost_categories),
+        )
+
+    def fingerprint(self) -> str:
+        """Return a stable hash of the canonical form of the group by."""
+        return _utils.fingerprint(self.canonical().build())
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint())
+
 
 def _build_group_by(
     _group_by: Union[GroupBy, List[Dict[str, str]]]
@@ -34,3 +58,17 @@ def _build_group_by(
     if isinstance(_group_by, List):
         return _group_by
     return _group_by.build()
+
+
+def _split_group_by(
+    group_by: List[Dict[str, str]]
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Split group definitions into the ones the API accepts and the rest.
+
+    Duplicated definitions are removed.
+    """
+    deduplicated: List[Dict[str, str]] = []
+    for definition in group_by:
+        if definition not in deduplicated:
+            deduplicated.append(definition)
+    return deduplicated[:_MAX_GROUP_BY], deduplicated[_MAX_GROUP_BY:]
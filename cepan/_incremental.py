@@ -0,0 +1,230 @@
+import datetime
+import json
+import sqlite3
+from contextlib import closing
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
+
+from cepan import _utils, exceptions
+from cepan._builder import _CostAndUsageBuilder
+from cepan._canonical import _request_fingerprint
+from cepan._cost_and_usage import _build_args
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._time_period import (
+    TimePeriod,
+    _build_time_period,
+    _date_format,
+    _parse_time,
+)
+
+if TYPE_CHECKING:
+    import boto3
+    import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    key TEXT PRIMARY KEY,
+    start TEXT NOT NULL,
+    high_water_mark TEXT NOT NULL,
+    group_definitions TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT NOT NULL,
+    start TEXT NOT NULL,
+    estimated INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (key, start)
+);
+"""
+
+
+class IncrementalCostAndUsage:
+    """A local copy of cost and usage results that is refreshed incrementally.
+
+    Each query records a high-water mark, the end of the last fetched period.
+    A sync only fetches periods after the mark minus restatement_window,
+    plus any earlier period that was still estimated, and upserts them.
+    The stored periods of a query are kept contiguous, so a time period
+    that leaves a gap before or after them fetches the gap as well.
+
+    Parameters
+    ----------
+    path : str
+        The path of the SQLite database file. It is created if it does not exist.
+    restatement_window : datetime.timedelta, optional
+        How far before the high-water mark periods are refetched,
+        since AWS may restate recent costs. The default is 3 days.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> store = ce.IncrementalCostAndUsage("cepan.sqlite3")
+    >>> df = store.sync(
+    ...     time_period=ce.TimePeriod(start=datetime(2020, 1, 1)),
+    ...     granularity="DAILY",
+    ...     group_by=ce.GroupBy(["SERVICE"]),
+    ... )
+    """
+
+    def __init__(
+        self,
+        path: str,
+        restatement_window: datetime.timedelta = datetime.timedelta(days=3),
+    ) -> None:
+        self.path = path
+        self.restatement_window = restatement_window
+        with closing(self._connect()) as connection:
+            connection.executescript(_SCHEMA)
+
+    def sync(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        granularity: str,
+        filter: Union[Filter, Dict[str, Any], None] = None,
+        metrics: List[str] = ["UnblendedCost"],
+        group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+        metrics_dtype: str = "float64",
+        session: Optional["boto3.Session"] = None,
+    ) -> "pd.DataFrame":
+        """Fetch new and restated periods and return the stored result.
+
+        Parameters
+        ----------
+        time_period : Union[TimePeriod, Dict[str, str]]
+            Sets the start and end dates of the result.
+            The end becomes the new high-water mark.
+        granularity : str
+            Sets the AWS cost granularity to MONTHLY or DAILY.
+        filter : Union[Filter, Dict[str, Any]], optional
+            Filters AWS costs by different dimensions.
+        metrics : List[str], optional
+            Which metrics are returned in the query.
+        group_by : Union[GroupBy, List[Dict[str, str]]], optional
+            You can group AWS costs using up to two different groups.
+        metrics_dtype: str, optional
+            The dtype of metrics. The default is float64.
+        boto3_session : boto3.Session(), optional
+            Boto3 Session. The default boto3 session is used if session receive None.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Result within time_period as a Pandas DataFrame.
+        """
+        if granularity not in ("DAILY", "MONTHLY"):
+            raise exceptions.InvalidParameter(
+                f"{granularity} is invalid, valid values are DAILY, MONTHLY."
+            )
+        built = _build_time_period(time_period)
+        args = _build_args(built, granularity, filter, metrics, group_by)
+        key = _request_fingerprint("get_cost_and_usage", dict(args, TimePeriod=None))
+
+        fetched = self._fetch_period(key, built, granularity)
+        if fetched["Start"] < fetched["End"]:
+            args["TimePeriod"] = fetched
+            client: boto3.client = _utils.client("ce", session)
+            pages = _utils.call_with_pagination(client, "get_cost_and_usage", args)
+            self._upsert(key, fetched, pages)
+
+        builder = _CostAndUsageBuilder(metrics_dtype)
+        builder.add_page(self._load(key, built))
+        return builder.build()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _fetch_period(
+        self, key: str, time_period: Dict[str, str], granularity: str
+    ) -> Dict[str, str]:
+        start, end = time_period["Start"], time_period["End"]
+        with closing(self._connect()) as connection:
+            query = connection.execute(
+                "SELECT start, high_water_mark FROM queries WHERE key = ?", (key,)
+            ).fetchone()
+            estimated = connection.execute(
+                "SELECT MIN(start) FROM results WHERE key = ? AND estimated",
+                (key,),
+            ).fetchone()
+        if query is None:
+            return {"Start": start, "End": end}
+        stored_start, high_water_mark = query
+        if start < stored_start:
+            # Fetch up to the stored periods, so no gap is left before them.
+            return {"Start": start, "End": max(end, stored_start)}
+
+        mark = _parse_time(high_water_mark) - self.restatement_window
+        if estimated[0] is not None:
+            mark = min(mark, _parse_time(estimated[0]))
+        if granularity == "MONTHLY":
+            mark = datetime.datetime(mark.year, mark.month, 1)
+        fetch_start = mark.strftime(_date_format)
+        if start > high_water_mark:
+            # Fetch from the mark, so no gap is left after the stored periods.
+            return {"Start": fetch_start, "End": end}
+        return {"Start": max(fetch_start, start), "End": end}
+
+    def _upsert(
+        self,
+        key: str,
+        time_period: Dict[str, str],
+        pages: Iterable[Dict[str, Any]],
+    ) -> None:
+        """Replace the stored periods within the fetched time_period."""
+        # A period may be split across pages, so merge its groups first.
+        results: Dict[str, Dict[str, Any]] = {}
+        group_definitions: List[Dict[str, str]] = []
+        for response in pages:
+            group_definitions = response.get("GroupDefinitions", group_definitions)
+            for row in response["ResultsByTime"]:
+                start = row["TimePeriod"]["Start"]
+                if start not in results:
+                    results[start] = dict(row, Groups=[])
+                results[start]["Groups"].extend(row["Groups"])
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM results WHERE key = ? AND start >= ? AND start < ?",
+                (key, time_period["Start"], time_period["End"]),
+            )
+            connection.executemany(
+                "INSERT INTO results (key, start, estimated, body) VALUES (?, ?, ?, ?)",
+                [
+                    (key, start, bool(row.get("Estimated")), json.dumps(row))
+                    for start, row in results.items()
+                ],
+            )
+            connection.execute(
+                """
+                INSERT INTO queries (key, start, high_water_mark, group_definitions)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                start = MIN(start, excluded.start),
+                high_water_mark = MAX(high_water_mark, excluded.high_water_mark),
+                group_definitions = excluded.group_definitions
+                """,
+                (
+                    key,
+                    time_period["Start"],
+                    time_period["End"],
+                    json.dumps(group_definitions),
+                ),
+            )
+
+    def _load(self, key: str, time_period: Dict[str, str]) -> Dict[str, Any]:
+        with closing(self._connect()) as connection:
+            query = connection.execute(
+                "SELECT group_definitions FROM queries WHERE key = ?", (key,)
+            ).fetchone()
+            rows = connection.execute(
+                """
+                SELECT body FROM results
+                WHERE key = ? AND start >= ? AND start < ?
+                ORDER BY start
+                """,
+                (key, time_period["Start"], time_period["End"]),
+            ).fetchall()
+        return {
+            "GroupDefinitions": json.loads(query[0]) if query else [],
+            "ResultsByTime": [json.loads(body) for body, in rows],
+        }
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from cepan import _utils, exceptions
+from cepan._builder import _check_keys_dtype, _CostAndUsageBuilder
+from cepan._cost_and_usage import (
+    _MAX_FILTER_VALUES,
+    _build_args,
+    _fetch_pages,
+    _plan_requests,
+    _Request,
+)
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._output import _build_output, _check_output
+from cepan._time_period import TimePeriod
+
+if TYPE_CHECKING:
+    import boto3
+
+# A session, or the name of a profile to create one from.
+_Source = Union["boto3.Session", str]
+
+# The pages of a source, whether they must be merged, and the error if it failed.
+_Fetched = Tuple[List[Tuple[_Request, Dict[str, Any]]], bool, Optional[Exception]]
+
+
+@dataclass
+class MultiAccountResult:
+    """The result of get_cost_and_usage_multi_account.
+
+    data is the combined result of the sources that succeeded, in the type
+    given by output. errors maps each source that failed to its exception.
+    """
+
+    data: Any
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+
+def get_cost_and_usage_multi_account(
+    sessions: Union[Dict[str, _Source], List[_Source]],
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    keys_dtype: str = "string",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    source_column: str = "source",
+    output: str = "pandas",
+) -> MultiAccountResult:
+    """Get the same cost and usage report from many accounts concurrently.
+
+    The query is run once per session, each with the cached client and the
+    rate limiter of its session. The rows of all sessions are combined into one result, with a
+    column naming the session they came from. A session whose query fails
+    is left out of the result and its error is returned instead, so the
+    other sessions are not affected.
+
+    Parameters
+    ----------
+    sessions : Union[Dict[str, Union[boto3.Session, str]], List[Union[boto3.Session, str]]]
+        The boto3 Sessions, or the names of profiles to create them from.
+        In a dict, the keys name the sources. In a list, sources are named
+        by their profile names, which must be unique.
+    source_column : str, optional
+        The name of the column of the source of each row. The default is source.
+    max_workers: int, optional
+        The maximum number of sessions queried concurrently, and of requests
+        sent concurrently for each of them. The default is 4.
+
+    The other parameters are the same as get_cost_and_usage.
+
+    Returns
+    -------
+    MultiAccountResult
+        The combined result and the errors of the sessions that failed.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> result = ce.get_cost_and_usage_multi_account(
+    ...     ["payer", "member-1", "member-2"],
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     group_by=ce.GroupBy(["SERVICE"]),
+    ... )
+    >>> result.data.groupby("source")["UnblendedCost"].sum()
+    """  # noqa
+    _check_output(output)
+    _check_keys_dtype(keys_dtype)
+    sources, errors = _resolve_sources(sessions)
+    args = _build_args(time_period, granularity, filter, metrics, group_by)
+
+    def fetch(source: Tuple[str, "boto3.Session"]) -> _Fetched:
+        _, session = source
+        try:
+            client: boto3.client = _utils.client("ce", session)
+            plan = _plan_requests(
+                client, args, split_time_period, max_filter_values, max_workers
+            )
+            pages = list(_fetch_pages(client, plan.requests, max_workers, None))
+        except Exception as e:
+            return [], False, e
+        return pages, plan.merge, None
+
+    fetched = list(_utils.map_concurrently(fetch, sources, max_workers))
+    builder = _CostAndUsageBuilder(
+        metrics_dtype, any(merge for _, merge, _ in fetched), keys_dtype
+    )
+    for (name, _), (pages, _, error) in zip(sources, fetched):
+        if error is not None:
+            errors[name] = error
+            continue
+        for (_, constants), response in pages:
+            builder.add_page(response, dict(constants, **{source_column: name}))
+    return MultiAccountResult(
+        _build_output(builder.columns, len(builder), output), errors
+    )
+
+
+def _resolve_sources(
+    sessions: Union[Dict[str, _Source], List[_Source]],
+) -> Tuple[List[Tuple[str, "boto3.Session"]], Dict[str, Exception]]:
+    """Return the named sessions, and the errors of profiles that failed."""
+    if isinstance(sessions, dict):
+        named = list(sessions.items())
+    else:
+        named = [
+            (source if isinstance(source, str) else source.profile_name, source)
+            for source in sessions
+        ]
+        names = [name for name, _ in named]
+        if len(set(names)) < len(names):
+            raise exceptions.InvalidParameter(
+                "Sessions have the same profile names, name them with a dict."
+            )
+    # Sessions are created up front, because creating them is not thread safe.
+    sources: List[Tuple[str, "boto3.Session"]] = []
+    errors: Dict[str, Exception] = {}
+    for name, source in named:
+        if not isinstance(source, str):
+            sources.append((name, source))
+            continue
+        try:
+            sources.append((name, _utils.profile_session(source)))
+        except Exception as e:
+            # A missing profile only fails its own source.
+            errors[name] = e
+    return sources, errors
@@ -0,0 +1,146 @@
+import importlib.util
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+from cepan import exceptions
+from cepan._builder import _MICROS, _MISSING_MICROS, _Column, _KeyColumn
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+# pandas and pyarrow are optional and only imported when their output is built.
+_HAS_PANDAS = importlib.util.find_spec("pandas") is not None
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+_OUTPUTS = ["pandas", "pyarrow", "polars", "numpy", "tuples"]
+
+
+def _check_output(output: str, time_index: bool = False) -> None:
+    if output not in _OUTPUTS:
+        raise exceptions.InvalidParameter(
+            f"{output} is invalid, valid values are {', '.join(_OUTPUTS)}."
+        )
+    if time_index and output != "pandas":
+        raise exceptions.InvalidParameter(
+            f"time_index is only supported by pandas output, not {output}."
+        )
+    if output == "pandas":
+        _check_pandas()
+    if output in ("pyarrow", "polars"):
+        _check_pyarrow()
+
+
+def _check_pandas() -> None:
+    if not _HAS_PANDAS:
+        raise ImportError(
+            "pandas is required for DataFrame output. "
+            "Install it with pip install cepan[pandas]."
+        )
+
+
+def _check_pyarrow() -> None:
+    if not _HAS_PYARROW:
+        raise ImportError(
+            "pyarrow is required for Arrow and Parquet output. "
+            "Install it with pip install cepan[arrow]."
+        )
+
+
+def _build_output(
+    columns: Dict[str, _Column], n_rows: int, output: str, time_index: bool = False
+) -> Any:
+    """Build the first n_rows rows of columns in the output format.
+
+    Every format is built from the same columns, so the values are
+    converted once, straight into the target.
+    With time_index, Time becomes the DatetimeIndex of a pandas DataFrame.
+    """
+    import numpy as np
+
+    if output == "pandas":
+        import pandas as pd
+
+        time = columns.get("Time")
+        if time_index and isinstance(time, _KeyColumn):
+            return pd.DataFrame(
+                {
+                    name: column.build(n_rows)
+                    for name, column in columns.items()
+                    if name != "Time"
+                },
+                index=_build_time_index(time, n_rows),
+            )
+        return pd.DataFrame(
+            {name: column.build(n_rows) for name, column in columns.items()}
+        )
+    if output == "pyarrow":
+        import pyarrow as pa
+
+        return pa.Table.from_batches([_build_record_batch(columns, n_rows)])
+    if output == "polars":
+        try:
+            import polars as pl
+        except ImportError as e:
+            raise ImportError("polars is required for polars output.") from e
+        return pl.from_arrow(_build_record_batch(columns, n_rows))
+    arrays = [column.to_numpy(n_rows) for column in columns.values()]
+    if output == "numpy":
+        if not arrays:
+            return np.rec.array([], dtype=[])
+        dtype = [(name, array.dtype) for name, array in zip(columns, arrays)]
+        return np.rec.fromarrays(arrays, dtype=dtype)
+    rows: List[Tuple[Any, ...]] = list(zip(*(array.tolist() for array in arrays)))
+    return rows
+
+
+def _copy_output(result: Any, output: str) -> Any:
+    """Return a copy of a result that can be modified independently."""
+    if output == "pyarrow":
+        # Arrow tables are immutable.
+        return result
+    if output == "polars":
+        return result.clone()
+    if output == "tuples":
+        return list(result)
+    return result.copy()
+
+
+def _build_time_index(column: _KeyColumn, n_rows: int) -> "pd.DatetimeIndex":
+    import numpy as np
+    import pandas as pd
+
+    # Times are few distinct values, so only those are parsed.
+    times = pd.to_datetime(pd.Index(column.categories, dtype=object))
+    codes = np.frombuffer(column.codes, dtype=np.int32)[:n_rows]
+    return pd.DatetimeIndex(times.take(codes), name="Time")
+
+
+def _build_record_batch(columns: Dict[str, _Column], n_rows: int) -> "pa.RecordBatch":
+    import pyarrow as pa
+
+    arrays = [_build_array(column, n_rows) for column in columns.values()]
+    return pa.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+def _build_array(column: _Column, n_rows: int) -> "pa.Array":
+    import numpy as np
+    import pyarrow as pa
+
+    if isinstance(column, _KeyColumn):
+        # Slicing copies the codes, so the builder can drop them afterwards.
+        codes = np.frombuffer(column.codes[:n_rows], dtype=np.int32)
+        indices = pa.array(codes, mask=codes < 0, type=pa.int32())
+        dictionary = pa.array(column.categories, type=pa.string())
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+    if isinstance(column.values, list):
+        return pa.array(column.values[:n_rows], type=pa.string())
+    if column.dtype == _MICROS:
+        micros = np.frombuffer(column.values[:n_rows], dtype=np.int64)
+        return pa.array(micros, mask=micros == _MISSING_MICROS, type=pa.int64())
+    values = np.frombuffer(column.values[:n_rows], dtype=np.float64)
+    array = pa.array(values, from_pandas=True)
+    try:
+        return array.cast(pa.from_numpy_dtype(np.dtype(column.dtype)))
+    except TypeError:
+        # pandas extension dtypes such as Float64 are written as float64.
+        return array
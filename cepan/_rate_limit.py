@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import boto3
+
+_THROTTLING_ERROR_CODES = {
+    "LimitExceededException",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+}
+
+
+class RateLimiter:
+    """A token bucket rate limiter with adaptive backoff.
+
+    Every cepan API request takes a token first. When Cost Explorer throttles
+    a request, the rate is halved and the request is retried with jittered
+    exponential backoff. Each successful request raises the rate again,
+    up to max_rate.
+    Cost Explorer quotas apply per account, so each session has its own
+    rate limiter.
+
+    Parameters
+    ----------
+    max_rate : float, optional
+        The maximum number of requests per second. The default is 5.
+    burst : float, optional
+        The number of requests that can be sent at once. The default is 5.
+    min_rate : float, optional
+        The rate never drops below this. The default is 0.2.
+    max_attempts : int, optional
+        The maximum number of attempts of a request. The default is 8.
+    base_delay : float, optional
+        The base of the exponential backoff in seconds. The default is 0.5.
+    max_delay : float, optional
+        The maximum backoff in seconds. The default is 30.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> ce.set_rate_limiter(ce.RateLimiter(max_rate=2.0, burst=2.0))
+    """
+
+    def __init__(
+        self,
+        max_rate: float = 5.0,
+        burst: float = 5.0,
+        min_rate: float = 0.2,
+        max_attempts: int = 8,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate = max_rate
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            # Tokens may go negative, which queues the callers in order.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+    def call(
+        self, func: Callable[..., Dict[str, Any]], args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Call func with args, retrying throttled requests."""
+        from botocore.exceptions import ClientError
+
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                response = func(**args)
+            except ClientError as e:
+                attempt += 1
+                code = e.response.get("Error", {}).get("Code")
+                if code not in _THROTTLING_ERROR_CODES or attempt >= self.max_attempts:
+                    raise
+                self._on_throttle()
+                delay = min(self.max_delay, self.base_delay * 2**attempt)
+                time.sleep(random.uniform(0, delay))
+                continue
+            self._on_success()
+            return response
+
+    def _copy(self) -> "RateLimiter":
+        """Return a new rate limiter with the same settings."""
+        return type(self)(
+            max_rate=self.max_rate,
+            burst=self.burst,
+            min_rate=self.min_rate,
+            max_attempts=self.max_attempts,
+            base_delay=self.base_delay,
+            max_delay=self.max_delay,
+        )
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def _on_throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+
+_RATE_LIMITER = RateLimiter()
+
+# The rate limiters of sessions, which are dropped with them.
+_SESSION_RATE_LIMITERS: "weakref.WeakKeyDictionary[Any, RateLimiter]" = (
+    weakref.WeakKeyDictionary()
+)
+_SESSION_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def set_rate_limiter(
+    rate_limiter: RateLimiter, session: Optional["boto3.Session"] = None
+) -> None:
+    """Replace the rate limiter of a session, or the default one.
+
+    The default rate limiter is used by the default session. Other sessions
+    each get their own copy of its settings, so one account being throttled
+    does not slow down the others. Replacing the default rate limiter
+    resets the rate limiters of all sessions.
+
+    Parameters
+    ----------
+    rate_limiter : RateLimiter
+        The new rate limiter.
+    boto3_session : boto3.Session(), optional
+        The session whose rate limiter is replaced.
+        The default rate limiter is replaced if session receive None.
+    """
+    global _RATE_LIMITER
+    with _SESSION_RATE_LIMITERS_LOCK:
+        if session is not None:
+            _SESSION_RATE_LIMITERS[session] = rate_limiter
+            return
+        _RATE_LIMITER = rate_limiter
+        _SESSION_RATE_LIMITERS.clear()
+
+
+def _get_rate_limiter(session: Optional["boto3.Session"] = None) -> RateLimiter:
+    if session is None:
+        return _RATE_LIMITER
+    with _SESSION_RATE_LIMITERS_LOCK:
+        rate_limiter = _SESSION_RATE_LIMITERS.get(session)
+        if rate_limiter is None:
+            rate_limiter = _RATE_LIMITER._copy()
+            _SESSION_RATE_LIMITERS[session] = rate_limiter
+        return rate_limiter
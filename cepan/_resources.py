@@ -0,0 +1,108 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+
+from cepan import exceptions
+from cepan._builder import _check_keys_dtype, _CostAndUsageBuilder
+from cepan._cache import ResponseCache
+from cepan._cost_and_usage import _MAX_FILTER_VALUES, _build_args, _iter_chunks
+from cepan._filter import Filter
+from cepan._group_by import GroupBy
+from cepan._output import _build_output, _check_output
+from cepan._time_period import TimePeriod
+
+if TYPE_CHECKING:
+    import boto3
+
+# Resource level costs are grouped by resource unless group_by is given.
+_RESOURCE_GROUP_BY = [{"Type": "DIMENSION", "Key": "RESOURCE_ID"}]
+
+
+def iter_cost_and_usage_with_resources(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    granularity: str,
+    filter: Union[Filter, Dict[str, Any]],
+    metrics: List[str] = ["UnblendedCost"],
+    group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    metrics_dtype: str = "float64",
+    chunk_size: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    *,
+    keys_dtype: str = "category",
+    split_time_period: Optional[str] = None,
+    max_filter_values: Optional[int] = _MAX_FILTER_VALUES,
+    max_workers: Optional[int] = None,
+    cache: Optional[ResponseCache] = None,
+    output: str = "pandas",
+) -> Iterator[Any]:
+    """Iterate over resource level cost and usage report in chunks.
+
+    See also:
+    https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ce.html#CostExplorer.Client.get_cost_and_usage_with_resources
+
+    Rows are parsed page by page and dropped once their chunk is yielded,
+    so memory usage does not grow with the number of rows.
+    Resource level data is only available for the last 14 days.
+
+    Parameters
+    ----------
+    filter : Union[Filter, Dict[str, Any]]
+        Filters AWS costs by different dimensions. The API requires a filter,
+        for example on SERVICE.
+    group_by : Union[GroupBy, List[Dict[str, str]]], optional
+        Groups AWS costs. Costs are grouped by RESOURCE_ID if group_by receive None.
+    keys_dtype: str, optional
+        The dtype of Time and group key columns, string or category.
+        The default is category, which stores each resource id once per chunk
+        instead of repeating it in every row. The dictionary of a chunk only
+        holds the resources of the rows buffered with it.
+
+    The other parameters are the same as iter_cost_and_usage.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Chunk of the result as a Pandas DataFrame, or in the type given by output.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> for df in ce.iter_cost_and_usage_with_resources(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2021, 3, 1),
+    ...         end=datetime(2021, 3, 14),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     filter=ce.Dimensions("SERVICE", ["EC2"]),
+    ...     chunk_size=100000,
+    ... ):
+    ...     df.to_parquet(...)
+    """
+    if not filter:
+        raise exceptions.InvalidParameter(
+            "filter is required by get_cost_and_usage_with_resources."
+        )
+    _check_output(output)
+    _check_keys_dtype(keys_dtype)
+
+    def build(builder: _CostAndUsageBuilder, n_rows: int) -> Any:
+        return _build_output(builder.columns, n_rows, output)
+
+    yield from _iter_chunks(
+        _build_args(
+            time_period,
+            granularity,
+            filter,
+            metrics,
+            group_by if group_by else _RESOURCE_GROUP_BY,
+        ),
+        metrics_dtype,
+        keys_dtype,
+        chunk_size,
+        split_time_period,
+        max_filter_values,
+        max_workers,
+        cache,
+        session,
+        build,
+        "get_cost_and_usage_with_resources",
+    )
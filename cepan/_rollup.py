@@ -0,0 +1,265 @@
+import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from cepan._builder import _MICROS
+from cepan._canonical import _canonicalize_metric
+from cepan._cost_and_usage import get_cost_and_usage
+from cepan._filter import (
+    Filter,
+    _build_filter,
+    _canonicalize_expression,
+    _evaluate_expression,
+    _filter_references,
+)
+from cepan._group_by import GroupBy, _build_group_by
+from cepan._time_period import (
+    _GRANULARITY_ORDER,
+    TimePeriod,
+    _build_time_period,
+    _date_format,
+    _parse_time,
+)
+
+if TYPE_CHECKING:
+    import boto3
+    import pandas as pd
+
+_FILTER_KINDS = {
+    "DIMENSION": "Dimensions",
+    "TAG": "Tags",
+    "COST_CATEGORY": "CostCategories",
+}
+
+
+class CostAndUsageView:
+    """A fine-grained cost and usage result that answers coarser queries locally.
+
+    The view is fetched once. Queries whose granularity, group by, metrics,
+    filter and time period can be derived from it are answered by
+    aggregating the view, without calling the API.
+    A query may narrow the filter of the view with conditions on its groups,
+    which are evaluated locally.
+    Other queries fall back to get_cost_and_usage.
+
+    Parameters
+    ----------
+    time_period : Union[TimePeriod, Dict[str, str]]
+        Sets the start and end dates of the view.
+    granularity : str
+        Sets the granularity of the view to MONTHLY or DAILY , or HOURLY.
+    filter : Union[Filter, Dict[str, Any]], optional
+        Filters AWS costs by different dimensions.
+    metrics : List[str], optional
+        Which metrics the view holds.
+    group_by : Union[GroupBy, List[Dict[str, str]]], optional
+        The groups the view holds. Queries can group by any subset of them.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> view = ce.CostAndUsageView(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 4, 1),
+    ...     ),
+    ...     granularity="DAILY",
+    ...     group_by=ce.GroupBy(["SERVICE", "LINKED_ACCOUNT"]),
+    ... )
+    >>> df = view.get_cost_and_usage(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 4, 1),
+    ...     ),
+    ...     granularity="MONTHLY",
+    ...     group_by=ce.GroupBy(["SERVICE"]),
+    ... )
+    """
+
+    def __init__(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        granularity: str,
+        filter: Union[Filter, Dict[str, Any], None] = None,
+        metrics: List[str] = ["UnblendedCost"],
+        group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+        session: Optional["boto3.Session"] = None,
+    ) -> None:
+        self.time_period = _build_time_period(time_period, granularity == "HOURLY")
+        self.granularity = granularity
+        self.filter = _build_filter(filter) if filter else None
+        self.metrics = metrics
+        self.group_by = _build_group_by(group_by) if group_by else []
+        self.session = session
+        self._data: Optional[pd.DataFrame] = None
+
+    @property
+    def data(self) -> "pd.DataFrame":
+        """The fine-grained result. It is fetched on first access."""
+        if self._data is None:
+            self.refresh()
+        assert self._data is not None
+        return self._data
+
+    def refresh(self) -> None:
+        """Fetch the fine-grained result again."""
+        self._data = get_cost_and_usage(
+            self.time_period,
+            self.granularity,
+            filter=self.filter,
+            metrics=self.metrics,
+            group_by=self.group_by,
+            session=self.session,
+        )
+
+    def can_answer(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        granularity: str,
+        filter: Union[Filter, Dict[str, Any], None] = None,
+        metrics: List[str] = ["UnblendedCost"],
+        group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+    ) -> bool:
+        """Return whether the query can be derived from the view."""
+        if _GRANULARITY_ORDER[granularity] < _GRANULARITY_ORDER[self.granularity]:
+            return False
+        view_metrics = {_canonicalize_metric(m) for m in self.metrics}
+        if not {_canonicalize_metric(m) for m in metrics} <= view_metrics:
+            return False
+        if group_by:
+            if any(d not in self.group_by for d in _build_group_by(group_by)):
+                return False
+        answerable, _ = self._local_filter(filter)
+        if not answerable:
+            return False
+        built = _build_time_period(time_period, granularity == "HOURLY")
+        return self._can_slice(_parse_time(built["Start"]), _parse_time(built["End"]))
+
+    def get_cost_and_usage(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        granularity: str,
+        filter: Union[Filter, Dict[str, Any], None] = None,
+        metrics: List[str] = ["UnblendedCost"],
+        group_by: Union[GroupBy, List[Dict[str, str]], None] = None,
+        metrics_dtype: str = "float64",
+    ) -> "pd.DataFrame":
+        """Get cost and usage report from the view, or from the API.
+
+        The parameters are the same as get_cost_and_usage.
+        """
+        # The view keeps float64 metrics, which can not be summed exactly.
+        if metrics_dtype == _MICROS or not self.can_answer(
+            time_period, granularity, filter, metrics, group_by
+        ):
+            return get_cost_and_usage(
+                time_period,
+                granularity,
+                filter=filter,
+                metrics=metrics,
+                group_by=group_by,
+                metrics_dtype=metrics_dtype,
+                session=self.session,
+            )
+
+        built = _build_time_period(time_period, granularity == "HOURLY")
+        start = _parse_time(built["Start"])
+        end = _parse_time(built["End"])
+        df = self.data
+        if df.empty:
+            import pandas as pd
+
+            return pd.DataFrame()
+        keys = [d["Key"] for d in _build_group_by(group_by)] if group_by else []
+        metric_columns = [
+            c
+            for c in dict.fromkeys(_canonicalize_metric(m) for m in metrics)
+            if c in df.columns
+        ]
+
+        # Times are few distinct values, so map them rather than parse each row.
+        labels: Dict[str, Optional[str]] = {}
+        for time in df["Time"].unique():
+            parsed = _parse_time(time)
+            if start <= parsed < end:
+                labels[time] = _bucket(time, parsed, start, granularity)
+        bucket = df["Time"].map(labels).astype("string")
+        mask = bucket.notna()
+        _, residual = self._local_filter(filter)
+        if residual is not None:
+            mask &= _evaluate_expression(residual, df)
+        selected = df.loc[mask, keys + metric_columns].assign(Time=bucket[mask])
+        result = (
+            selected.groupby(["Time"] + keys, sort=False, dropna=False)[metric_columns]
+            .sum()
+            .reset_index()
+        )
+        if metrics_dtype != "float64":
+            result = result.astype({c: metrics_dtype for c in metric_columns})
+        return result
+
+    def _local_filter(
+        self, filter: Union[Filter, Dict[str, Any], None]
+    ) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        # Returns whether the filter can be applied to the view,
+        # and the conditions left to evaluate over it.
+        view = _canonicalize_expression(self.filter) if self.filter else None
+        if filter is None:
+            return view is None, None
+        query = _canonicalize_expression(_build_filter(filter))
+        if query == view:
+            return True, None
+        conditions = _conjuncts(query)
+        if view is not None:
+            required = _conjuncts(view)
+            if any(condition not in conditions for condition in required):
+                return False, None
+            conditions = [c for c in conditions if c not in required]
+        residual = conditions[0] if len(conditions) == 1 else {"And": conditions}
+        grouped = {(_FILTER_KINDS[d["Type"]], d["Key"]) for d in self.group_by}
+        return _filter_references(residual) <= grouped, residual
+
+    def _can_slice(self, start: datetime.datetime, end: datetime.datetime) -> bool:
+        view_start = _parse_time(self.time_period["Start"])
+        view_end = _parse_time(self.time_period["End"])
+        if start < view_start or end > view_end or start >= end:
+            return False
+        # The query must not cut a period of the view in two.
+        return _is_boundary(start, view_start, self.granularity) and _is_boundary(
+            end, view_end, self.granularity
+        )
+
+
+def _conjuncts(expression: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return list(expression["And"]) if "And" in expression else [expression]
+
+
+def _is_boundary(
+    time: datetime.datetime, view_bound: datetime.datetime, granularity: str
+) -> bool:
+    if time == view_bound:
+        return True
+    if time.minute or time.second or time.microsecond:
+        return False
+    if granularity == "HOURLY":
+        return True
+    if time.hour:
+        return False
+    return granularity == "DAILY" or time.day == 1
+
+
+def _bucket(
+    time: str,
+    parsed: datetime.datetime,
+    start: datetime.datetime,
+    granularity: str,
+) -> str:
+    if granularity == "HOURLY":
+        return time
+    if granularity == "DAILY":
+        return parsed.strftime(_date_format)
+    # A partial first month starts at the start of the query, as in the API.
+    month = datetime.datetime(parsed.year, parsed.month, 1)
+    return max(month, start).strftime(_date_format)
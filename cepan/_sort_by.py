@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Union
 
+from cepan import _utils
+
 
 @dataclass
 class SortBy:
@@ -18,6 +20,13 @@ class SortBy:
             sort_by["SortOrder"] = self.sort_order
         return sort_by
 
+    def fingerprint(self) -> str:
+        """Return a stable hash of the sort definition."""
+        return _utils.fingerprint(self.build())
+
+    def __hash__(self) -> int:
+        return hash((self.key, self.sort_order))
+
 
 def _build_sort_by(
     sort_by: Union[List[SortBy], List[Dict[str, str]]]
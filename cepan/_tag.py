@@ -1,13 +1,15 @@
-from typing import Any, Dict, List, Optional, Union
-
-import boto3
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
 from cepan import _utils
+from cepan._builder import _Column, _KeyColumn
 from cepan._filter import Filter, _build_filter
+from cepan._output import _build_output, _check_output
 from cepan._sort_by import SortBy, _build_sort_by
 from cepan._time_period import TimePeriod, _build_time_period
 
+if TYPE_CHECKING:
+    import boto3
+
 
 def get_tags(
     time_period: Union[TimePeriod, Dict[str, str]],
@@ -16,8 +18,9 @@ def get_tags(
     filter: Union[Filter, Dict[str, Any], None] = None,
     sort_by: Union[List[SortBy], List[Dict[str, str]], None] = None,
     max_results: Optional[int] = None,
-    session: Optional[boto3.Session] = None,
-) -> pd.DataFrame:
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
     """Get tag values.
 
     See also:
@@ -45,11 +48,13 @@ def get_tags(
         The maximum number of objects that to be returned for this request.
     boto3_session : boto3.Session(), optional
         Boto3 Session. The default boto3 session will be used if session receive None.
+    output : str, optional
+        The type of the result, as in get_cost_and_usage. The default is pandas.
 
     Returns
     -------
     pandas.DataFrame
-        Result as a Pandas DataFrame.
+        Result as a Pandas DataFrame, or in the type given by output.
 
     Examples
     --------
@@ -65,6 +70,7 @@ def get_tags(
     ...     tag_key="Owner",
     ... )
     """
+    _check_output(output)
     client: boto3.client = _utils.client("ce", session)
     args: Dict[str, Any] = {
         "TimePeriod": _build_time_period(time_period),
@@ -78,18 +84,95 @@ def get_tags(
         args["SortBy"] = _build_sort_by(sort_by)
     if max_results and sort_by:
         args["MaxResults"] = max_results
-    response_iterator = _utils.call_with_pagination(
-        client,
-        "get_tags",
-        args,
-    )
-
-    pre_df: List[Dict[str, str]] = []
-    for response in response_iterator:
-        for row in response["Tags"]:
-            if not row:
-                continue
-            pre_row: Dict[str, str] = {"tag_key": tag_key}
-            pre_row["value"] = row
-            pre_df.append(pre_row)
-        return pd.DataFrame(pre_df, dtype="string")
+
+    columns: Dict[str, _Column] = {"tag_key": _KeyColumn(), "value": _KeyColumn()}
+    for value in _fetch_tags(client, args):
+        columns["tag_key"].append(tag_key)
+        columns["value"].append(value)
+    return _build_output(columns, len(columns["value"]), output)
+
+
+def get_tag_catalog(
+    time_period: Union[TimePeriod, Dict[str, str]],
+    tag_keys: Optional[List[str]] = None,
+    filter: Union[Filter, Dict[str, Any], None] = None,
+    max_workers: Optional[int] = None,
+    session: Optional["boto3.Session"] = None,
+    output: str = "pandas",
+) -> Any:
+    """Get the values of many tag keys at once.
+
+    The values of each tag key are fetched concurrently, every page of them,
+    and returned in one long result.
+
+    Parameters
+    ----------
+    time_period : Union[TimePeriod, Dict[str, str]]
+        Sets the start and end dates for retrieving AWS costs.
+    tag_keys : List[str], optional
+        The keys of the tags.
+        All tag keys in time_period are fetched if tag_keys receive None.
+    filter : Union[Filter, Dict[str, Any]], optional
+        Filters AWS costs by different dimensions.
+    max_workers: int, optional
+        The maximum number of tag keys fetched concurrently. The default is 4.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+    output : str, optional
+        The type of the result, as in get_cost_and_usage. The default is pandas.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The tag_key and value columns of every tag key, in the order of
+        tag_keys, or in the type given by output.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> df = ce.get_tag_catalog(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ... )
+    """
+    _check_output(output)
+    client: boto3.client = _utils.client("ce", session)
+    time_period = _build_time_period(time_period)
+    built_filter = _build_filter(filter) if filter else None
+
+    def args(tag_key: Optional[str]) -> Dict[str, Any]:
+        args: Dict[str, Any] = {"TimePeriod": time_period}
+        if tag_key is not None:
+            args["TagKey"] = tag_key
+        if built_filter:
+            args["Filter"] = built_filter
+        return args
+
+    if tag_keys is None:
+        # Without a tag key, get_tags returns the tag keys.
+        tag_keys = _fetch_tags(client, args(None))
+
+    def fetch(tag_key: str) -> List[str]:
+        return _fetch_tags(client, args(tag_key))
+
+    keys = _KeyColumn()
+    values = _KeyColumn()
+    fetched = _utils.map_concurrently(fetch, tag_keys, max_workers)
+    for tag_key, fetched_values in zip(tag_keys, fetched):
+        code = keys.encode(tag_key)
+        for value in fetched_values:
+            keys.append_code(code)
+            values.append(value)
+    columns: Dict[str, _Column] = {"tag_key": keys, "value": values}
+    return _build_output(columns, len(values), output)
+
+
+def _fetch_tags(client: "boto3.client", args: Dict[str, Any]) -> List[str]:
+    """Return the non-empty values of every page of get_tags."""
+    values: List[str] = []
+    for response in _utils.call_with_pagination(client, "get_tags", args):
+        values.extend(value for value in response["Tags"] if value)
+    return values
@@ -1,10 +1,18 @@
 import datetime
 from dataclasses import dataclass
-from typing import Dict, Union
+from typing import Dict, List, Union
+
+from cepan import _utils, exceptions
 
 _date_format = "%Y-%m-%d"
 _time_format = "%Y-%m-%dT%H:%M:%SZ"
 
+# Coarseness of granularities.
+_GRANULARITY_ORDER = {"HOURLY": 0, "DAILY": 1, "MONTHLY": 2}
+
+# Cost Explorer keeps hourly data for this many days.
+_HOURLY_RETENTION_DAYS = 14
+
 
 @dataclass
 class TimePeriod:
@@ -23,10 +31,75 @@ class TimePeriod:
             "End": self.end.strftime(format),
         }
 
+    def fingerprint(self, is_hourly: bool = False) -> str:
+        """Return a stable hash of the time period as it is sent."""
+        return _utils.fingerprint(self.build(is_hourly))
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
 
 def _build_time_period(
     time_period: Union[TimePeriod, Dict[str, str]], is_hourly: bool = False
 ) -> Dict[str, str]:
     if isinstance(time_period, Dict):
+        if is_hourly:
+            # Hourly requests need times. A date is the start of its day.
+            return {
+                key: value if "T" in value else f"{value}T00:00:00Z"
+                for key, value in time_period.items()
+            }
         return time_period
-    return time_period.build()
+    return time_period.build(is_hourly)
+
+
+def _check_hourly_time_period(time_period: Dict[str, str]) -> None:
+    """Raise InvalidParameter if a built HOURLY time period starts too early.
+
+    Requests for hourly data older than its retention fail, so they are
+    rejected before any of them is sent.
+    """
+    retention = datetime.timedelta(days=_HOURLY_RETENTION_DAYS)
+    earliest = (_utcnow() - retention).date()
+    if _parse_time(time_period["Start"]).date() < earliest:
+        raise exceptions.InvalidParameter(
+            f"HOURLY data is only kept for the last {_HOURLY_RETENTION_DAYS} days, "
+            f"but time_period starts at {time_period['Start']}."
+        )
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    if "T" in value:
+        return datetime.datetime.strptime(value, _time_format)
+    return datetime.datetime.strptime(value, _date_format)
+
+
+def _next_boundary(time: datetime.datetime, unit: str) -> datetime.datetime:
+    if unit == "DAILY":
+        day = datetime.datetime(time.year, time.month, time.day)
+        return day + datetime.timedelta(days=1)
+    if time.month == 12:
+        return datetime.datetime(time.year + 1, 1, 1)
+    return datetime.datetime(time.year, time.month + 1, 1)
+
+
+def _split_time_period(time_period: Dict[str, str], unit: str) -> List[Dict[str, str]]:
+    """Split a built time period into calendar aligned windows.
+
+    The unit is DAILY or MONTHLY. Windows keep the format of the original period.
+    """
+    format = _time_format if "T" in time_period["Start"] else _date_format
+    start = _parse_time(time_period["Start"])
+    end = _parse_time(time_period["End"])
+    windows: List[Dict[str, str]] = []
+    while start < end:
+        boundary = min(_next_boundary(start, unit), end)
+        windows.append(
+            {"Start": start.strftime(format), "End": boundary.strftime(format)}
+        )
+        start = boundary
+    return windows
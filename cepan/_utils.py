@@ -1,25 +1,143 @@
-from typing import Any, Callable, Dict, Iterator, Optional
+import hashlib
+import itertools
+import json
+import queue
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
-import boto3
+from cepan._rate_limit import RateLimiter, _get_rate_limiter
+
+if TYPE_CHECKING:
+    import boto3
+    from botocore.config import Config
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+_DEFAULT_MAX_WORKERS = 4
+
+# Marks the end of the results of an item in chain_concurrently.
+_END = object()
+
+# Clients are cached per session and dropped with it.
+_CLIENT_CACHE: "weakref.WeakKeyDictionary[Any, OrderedDict[Tuple[Any, ...], Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+# Each session keeps the clients of its most recently used credentials and configs.
+_MAX_CLIENTS_PER_SESSION = 8
+
+# The session of each client created for a session, to find its rate limiter.
+_CLIENT_SESSIONS: "weakref.WeakKeyDictionary[Any, weakref.ref[Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+_SESSION_CACHE: Dict[str, "boto3.Session"] = {}
 
 
 def client(
     service: str,
-    session: Optional[boto3.Session] = None,
-) -> boto3.client:
-    if session is None:
-        return boto3.client(service)
+    session: Optional["boto3.Session"] = None,
+    config: Optional["Config"] = None,
+) -> "boto3.client":
+    """Return a cached client, creating it on first use.
+
+    Clients are cached per session, credentials, region and config.
+    Sessions are referenced weakly, and each keeps its least recently used
+    clients up to a bound, so fresh sessions, credentials and configs do
+    not accumulate clients.
+    Creation is serialized because boto3 sessions are not thread safe.
+    """
+    import boto3
+
+    with _CLIENT_CACHE_LOCK:
+        owner, key = _client_key(service, session, config)
+        clients = _CLIENT_CACHE.get(owner)
+        if clients is None:
+            clients = _CLIENT_CACHE[owner] = OrderedDict()
+        cached = clients.get(key)
+        if cached is not None:
+            clients.move_to_end(key)
+            return cached
+        if session is None:
+            created = boto3.client(service, config=config)
+        else:
+            created = session.client(service, config=config)
+            _CLIENT_SESSIONS[created] = weakref.ref(session)
+        clients[key] = created
+        if len(clients) > _MAX_CLIENTS_PER_SESSION:
+            clients.popitem(last=False)
+        return created
+
+
+def profile_session(profile_name: str) -> "boto3.Session":
+    """Return a cached session of a profile, creating it on first use.
+
+    Caching the session lets its clients be reused across calls.
+    """
+    import boto3
+
+    with _CLIENT_CACHE_LOCK:
+        session = _SESSION_CACHE.get(profile_name)
+        if session is None:
+            session = boto3.Session(profile_name=profile_name)
+            _SESSION_CACHE[profile_name] = session
+        return session
+
+
+def clear_client_cache() -> None:
+    """Clear cached boto3 clients.
+
+    Clients are reused across calls for each session, credentials, region
+    and config. Clear them after changing credentials in place, for example.
+    Sessions created for profile names are cleared as well.
+    """
+    with _CLIENT_CACHE_LOCK:
+        _CLIENT_CACHE.clear()
+        _CLIENT_SESSIONS.clear()
+        _SESSION_CACHE.clear()
+
+
+def _client_key(
+    service: str,
+    session: Optional["boto3.Session"],
+    config: Optional["Config"],
+) -> Tuple["boto3.Session", Tuple[Any, ...]]:
+    import boto3
 
-    return session.client(service)
+    if session is None:
+        # boto3.client uses the default session, so key by it.
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+    # Sessions, credentials and configs are compared by identity.
+    return session, (session.get_credentials(), session.region_name, config, service)
 
 
 def call_with_pagination(
-    client: boto3.client,
+    client: "boto3.client",
     func_name: str,
     args: Dict[str, Any],
 ) -> Iterator[Dict[str, Any]]:
     func: Callable[..., Dict[str, Any]] = getattr(client, func_name)
-    response: Dict[str, Any] = func(**args)
+    rate_limiter = _client_rate_limiter(client)
+    response: Dict[str, Any] = rate_limiter.call(func, args)
     yield response
     token_key: Optional[str] = None
     if "NextToken" in response:
@@ -28,5 +146,134 @@ def call_with_pagination(
         token_key = "NextPageToken"
     while token_key in response:
         args[token_key] = response[token_key]
-        response = func(**args)
+        response = rate_limiter.call(func, args)
         yield response
+
+
+def _client_rate_limiter(client: "boto3.client") -> RateLimiter:
+    """Return the rate limiter of the session of a client."""
+    with _CLIENT_CACHE_LOCK:
+        session_ref = _CLIENT_SESSIONS.get(client)
+    return _get_rate_limiter(None if session_ref is None else session_ref())
+
+
+def map_concurrently(
+    func: Callable[[_T], _R],
+    items: Iterable[_T],
+    max_workers: Optional[int] = None,
+) -> Iterator[_R]:
+    """Apply func to items on a thread pool and yield results in order.
+
+    At most max_workers results are in flight or buffered at any time.
+    """
+    if max_workers is None:
+        max_workers = _DEFAULT_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures: Deque["Future[_R]"] = deque()
+        for item in items:
+            if len(futures) >= max_workers:
+                yield futures.popleft().result()
+            futures.append(executor.submit(func, item))
+        while futures:
+            yield futures.popleft().result()
+
+
+def chain_concurrently(
+    func: Callable[[_T], Iterable[_R]],
+    items: Iterable[_T],
+    max_workers: Optional[int] = None,
+) -> Iterator[_R]:
+    """Iterate over func(item) of each item on a thread pool and chain them in order.
+
+    Up to max_workers items are iterated over concurrently, and each of them
+    buffers at most one result ahead of the caller, so results are streamed
+    instead of being collected per item.
+    """
+    if max_workers is None:
+        max_workers = _DEFAULT_MAX_WORKERS
+    closed = threading.Event()
+
+    def put(results: "queue.Queue[Any]", result: Any) -> bool:
+        # Stop waiting once the caller stops reading.
+        while not closed.is_set():
+            try:
+                results.put(result, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(item: _T, results: "queue.Queue[Any]") -> None:
+        try:
+            for result in func(item):
+                if not put(results, (result, None)):
+                    return
+        except BaseException as e:
+            put(results, (None, e))
+            return
+        put(results, _END)
+
+    remaining = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending: Deque["queue.Queue[Any]"] = deque()
+
+        def submit(n_items: int) -> None:
+            for item in itertools.islice(remaining, n_items):
+                results: "queue.Queue[Any]" = queue.Queue(maxsize=1)
+                executor.submit(produce, item, results)
+                pending.append(results)
+
+        try:
+            submit(max_workers)
+            while pending:
+                entry = pending[0].get()
+                if entry is _END:
+                    pending.popleft()
+                    submit(1)
+                    continue
+                result, error = entry
+                if error is not None:
+                    raise error
+                yield result
+        finally:
+            closed.set()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one.
+
+    The first caller of a key runs the call. Callers that arrive while it
+    is in flight wait for it and receive the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "Future[Any]"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], _R]) -> Tuple[_R, bool]:
+        """Run func once per key in flight and return its result and
+        whether the result is shared with another caller."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result, False
+
+
+def fingerprint(data: Any) -> str:
+    """Return a stable hash of JSON serializable data."""
+    serialized = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode()).hexdigest()
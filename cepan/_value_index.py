@@ -0,0 +1,178 @@
+import bisect
+import datetime
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from cepan import _utils, exceptions
+from cepan._dimension import _fetch_dimension_values
+from cepan._tag import _fetch_tags
+from cepan._time_period import TimePeriod, _build_time_period
+
+if TYPE_CHECKING:
+    import boto3
+
+_MATCHES = ("contains", "prefix")
+
+# The largest code point, which sorts after any continuation of a prefix.
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class _Values:
+    """The values of one dimension or tag key, sorted for lookups."""
+
+    def __init__(self, values: List[str], expires_at: float) -> None:
+        self.expires_at = expires_at
+        self.values = sorted(set(values))
+        # Case insensitive lookups search the casefolded values.
+        self.casefolded = [value.casefold() for value in self.values]
+        folded = sorted(zip(self.casefolded, self.values))
+        self.folded = [key for key, _ in folded]
+        self.folded_values = [value for _, value in folded]
+
+    def search(self, search_string: str, match: str, case_sensitive: bool) -> List[str]:
+        if not case_sensitive:
+            search_string = search_string.casefold()
+        if match == "prefix":
+            keys = self.values if case_sensitive else self.folded
+            values = self.values if case_sensitive else self.folded_values
+            # Values with the prefix are one sorted range.
+            start = bisect.bisect_left(keys, search_string)
+            end = bisect.bisect_right(keys, search_string + _MAX_CHAR, lo=start)
+            return sorted(values[start:end])
+        keys = self.values if case_sensitive else self.casefolded
+        return [value for key, value in zip(keys, self.values) if search_string in key]
+
+
+class ValueIndex:
+    """A local index of dimension and tag values for autocompletion.
+
+    The values of each time period, dimension or tag key and context are
+    fetched once with every page, then searched locally on each lookup.
+    Values are fetched again once they are older than ttl.
+
+    Parameters
+    ----------
+    ttl : datetime.timedelta, optional
+        How long fetched values are used. The default is 1 hour.
+    boto3_session : boto3.Session(), optional
+        Boto3 Session. The default boto3 session will be used if session receive None.
+
+    Examples
+    --------
+    >>> import cepan as ce
+    >>> from datetime import datetime
+    >>> index = ce.ValueIndex()
+    >>> index.search(
+    ...     time_period=ce.TimePeriod(
+    ...         start=datetime(2020, 1, 1),
+    ...         end=datetime(2020, 2, 1),
+    ...     ),
+    ...     dimension="SERVICE",
+    ...     search_string="ec2",
+    ... )
+    """
+
+    def __init__(
+        self,
+        ttl: datetime.timedelta = datetime.timedelta(hours=1),
+        session: Optional["boto3.Session"] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.session = session
+        self._entries: Dict[Tuple[str, ...], _Values] = {}
+        self._lock = threading.Lock()
+        self._single_flight = _utils.SingleFlight()
+
+    def search(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        dimension: Optional[str] = None,
+        tag_key: Optional[str] = None,
+        search_string: str = "",
+        context: str = "COST_AND_USAGE",
+        match: str = "contains",
+        case_sensitive: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """Return the values of a dimension or tag key that match search_string.
+
+        Parameters
+        ----------
+        time_period : Union[TimePeriod, Dict[str, str]]
+            Sets the start and end dates of the values.
+        dimension : str, optional
+            The name of the dimension. Either dimension or tag_key is required.
+        tag_key : str, optional
+            The key of the tag.
+        search_string : str, optional
+            The string to search the values for. All values match an empty string.
+        context : str, optional
+            The context of dimension, as in get_dimension_values.
+            The default is COST_AND_USAGE.
+        match : str, optional
+            contains matches values that contain search_string, prefix values that
+            start with it. The default is contains.
+        case_sensitive : bool, optional
+            Whether the case of search_string must match. The default is False.
+        limit : int, optional
+            The maximum number of values returned.
+
+        Returns
+        -------
+        List[str]
+            The matching values in sorted order.
+        """
+        if match not in _MATCHES:
+            raise exceptions.InvalidParameter(
+                f"{match} is invalid, valid values are {', '.join(_MATCHES)}."
+            )
+        values = self._values(time_period, dimension, tag_key, context)
+        found = values.search(search_string, match, case_sensitive)
+        return found if limit is None else found[:limit]
+
+    def clear(self) -> None:
+        """Drop all fetched values, so they are fetched again on the next search."""
+        with self._lock:
+            self._entries.clear()
+
+    def _values(
+        self,
+        time_period: Union[TimePeriod, Dict[str, str]],
+        dimension: Optional[str],
+        tag_key: Optional[str],
+        context: str,
+    ) -> _Values:
+        if (dimension is None) == (tag_key is None):
+            raise exceptions.InvalidParameter(
+                "Either dimension or tag_key must be specified."
+            )
+        built = _build_time_period(time_period)
+        key: Tuple[str, ...]
+        if dimension is not None:
+            key = (built["Start"], built["End"], "DIMENSION", dimension, context)
+        else:
+            assert tag_key is not None
+            key = (built["Start"], built["End"], "TAG", tag_key)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.time():
+            return entry
+
+        def fetch() -> _Values:
+            client: boto3.client = _utils.client("ce", self.session)
+            args: Dict[str, Any]
+            if dimension is not None:
+                args = {"TimePeriod": built, "Dimension": dimension, "Context": context}
+                values = _fetch_dimension_values(client, args)
+            else:
+                args = {"TimePeriod": built, "TagKey": tag_key}
+                values = _fetch_tags(client, args)
+            fetched = _Values(values, time.time() + self.ttl.total_seconds())
+            with self._lock:
+                self._entries[key] = fetched
+            return fetched
+
+        # Concurrent lookups of an expired key share one fetch.
+        fetched, _ = self._single_flight.do(key, fetch)
+        return fetched
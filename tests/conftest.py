@@ -0,0 +1,15 @@
+import pytest
+
+import cepan as ce
+
+
+@pytest.fixture(autouse=True)
+def aws_environment(monkeypatch):
+    # Avoid looking up real credentials and reusing clients across tests.
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    ce.clear_client_cache()
+    ce.set_rate_limiter(ce.RateLimiter(max_rate=1000.0, burst=1000.0))
+    yield
+    ce.clear_client_cache()
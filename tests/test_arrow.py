@@ -0,0 +1,108 @@
+import pytest
+
+import cepan as ce
+from cepan import exceptions
+
+pa = pytest.importorskip("pyarrow")
+ds = pytest.importorskip("pyarrow.dataset")
+
+
+def _page(days, token=None):
+    page = {
+        "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": start, "End": end},
+                "Total": {},
+                "Groups": [
+                    {
+                        "Keys": [service],
+                        "Metrics": {"UnblendedCost": {"Amount": "1.5", "Unit": "USD"}},
+                    }
+                    for service in ["EC2", "S3"]
+                ],
+                "Estimated": False,
+            }
+            for start, end in days
+        ],
+    }
+    if token:
+        page["NextPageToken"] = token
+    return page
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        _page([("2020-01-31", "2020-02-01")], token="Next"),
+        _page([("2020-02-01", "2020-02-02"), ("2020-02-02", "2020-02-03")]),
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+def test_iter_cost_and_usage_batches(client_mock):
+    batches = list(
+        ce.iter_cost_and_usage_batches(
+            {"Start": "2020-01-31", "End": "2020-02-03"},
+            "DAILY",
+            group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+        )
+    )
+    assert [batch.num_rows for batch in batches] == [2, 4]
+    schema = batches[0].schema
+    assert schema.names == ["Time", "SERVICE", "UnblendedCost"]
+    assert pa.types.is_dictionary(schema.field("Time").type)
+    assert pa.types.is_dictionary(schema.field("SERVICE").type)
+    assert schema.field("UnblendedCost").type == pa.float64()
+
+    table = pa.Table.from_batches(batches)
+    assert table.column("Time").to_pylist() == [
+        "2020-01-31",
+        "2020-01-31",
+        "2020-02-01",
+        "2020-02-01",
+        "2020-02-02",
+        "2020-02-02",
+    ]
+    assert table.column("SERVICE").to_pylist() == ["EC2", "S3"] * 3
+    # The dictionary is shared across batches.
+    assert batches[1].column(1).dictionary.to_pylist() == ["EC2", "S3"]
+
+
+def test_write_cost_and_usage_parquet_by_month(client_mock, tmp_path):
+    ce.write_cost_and_usage_parquet(
+        str(tmp_path),
+        {"Start": "2020-01-31", "End": "2020-02-03"},
+        "DAILY",
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "month=2020-01",
+        "month=2020-02",
+    ]
+    table = ds.dataset(str(tmp_path), partitioning="hive").to_table()
+    assert table.num_rows == 6
+    assert sum(table.column("UnblendedCost").to_pylist()) == 9.0
+
+
+def test_write_cost_and_usage_parquet_by_group_key(client_mock, tmp_path):
+    ce.write_cost_and_usage_parquet(
+        str(tmp_path),
+        {"Start": "2020-01-31", "End": "2020-02-03"},
+        "DAILY",
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+        partition_by="SERVICE",
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["SERVICE=EC2", "SERVICE=S3"]
+
+
+def test_write_cost_and_usage_parquet_invalid_partition(client_mock, tmp_path):
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.write_cost_and_usage_parquet(
+            str(tmp_path),
+            {"Start": "2020-01-31", "End": "2020-02-03"},
+            "DAILY",
+            partition_by="REGION",
+        )
@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import cepan as ce
+from cepan import _async, exceptions
+
+
+@pytest.fixture(autouse=True)
+def executor():
+    yield
+    ce.set_async_max_concurrency(_async._DEFAULT_MAX_CONCURRENCY)
+
+
+def _page(start, end, amount):
+    return {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": start, "End": end},
+                "Total": {"UnblendedCost": {"Amount": amount, "Unit": "USD"}},
+                "Groups": [],
+                "Estimated": False,
+            }
+        ],
+    }
+
+
+def test_get_cost_and_usage_async(mocker):
+    client_mock = mocker.Mock()
+    threads = set()
+
+    def get_cost_and_usage(**kwargs):
+        threads.add(threading.get_ident())
+        time_period = kwargs["TimePeriod"]
+        amount = time_period["Start"][-1]
+        return _page(time_period["Start"], time_period["End"], amount)
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+
+    df = asyncio.run(
+        ce.get_cost_and_usage_async(
+            {"Start": "2020-01-01", "End": "2020-01-04"},
+            "DAILY",
+            split_time_period="DAILY",
+        )
+    )
+    assert df["Time"].tolist() == ["2020-01-01", "2020-01-02", "2020-01-03"]
+    assert df["UnblendedCost"].tolist() == [1.0, 2.0, 3.0]
+    assert client_mock.get_cost_and_usage.call_count == 3
+    # Requests are not sent from the thread of the event loop.
+    assert threading.get_ident() not in threads
+
+
+def test_get_cost_and_usage_async_concurrency(mocker):
+    ce.set_async_max_concurrency(2)
+    client_mock = mocker.Mock()
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def get_cost_and_usage(**kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        time_period = kwargs["TimePeriod"]
+        return _page(time_period["Start"], time_period["End"], "1")
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+
+    async def query_all():
+        return await asyncio.gather(
+            *(
+                ce.get_cost_and_usage_async(
+                    {"Start": "2020-01-01", "End": "2020-01-05"},
+                    "DAILY",
+                    split_time_period="DAILY",
+                )
+                for _ in range(3)
+            )
+        )
+
+    results = asyncio.run(query_all())
+    assert [len(df) for df in results] == [4, 4, 4]
+    assert running["max"] == 2
+
+
+def test_get_cost_and_usage_async_max_workers(mocker):
+    client_mock = mocker.Mock()
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def get_cost_and_usage(**kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        time_period = kwargs["TimePeriod"]
+        return _page(time_period["Start"], time_period["End"], "1")
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+
+    df = asyncio.run(
+        ce.get_cost_and_usage_async(
+            {"Start": "2020-01-01", "End": "2020-01-07"},
+            "DAILY",
+            split_time_period="DAILY",
+            max_workers=2,
+        )
+    )
+    assert len(df) == 6
+    # The thread pool has room for more, but one call sends max_workers.
+    assert running["max"] == 2
+
+
+def test_iter_cost_and_usage_async(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        dict(_page("2020-01-01", "2020-01-02", "1"), NextPageToken="Next"),
+        _page("2020-01-02", "2020-01-03", "2"),
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+
+    async def collect():
+        return [
+            df
+            async for df in ce.iter_cost_and_usage_async(
+                {"Start": "2020-01-01", "End": "2020-01-03"}, "DAILY"
+            )
+        ]
+
+    chunks = asyncio.run(collect())
+    assert [df["UnblendedCost"].tolist() for df in chunks] == [[1.0], [2.0]]
+
+
+def test_get_dimension_values_and_tags_async(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_dimension_values.return_value = {
+        "DimensionValues": [{"Value": "EC2", "Attributes": {}}],
+    }
+    client_mock.get_tags.return_value = {"Tags": ["alice"]}
+    mocker.patch("boto3.client", return_value=client_mock)
+    time_period = {"Start": "2020-01-01", "End": "2020-01-02"}
+
+    async def query_all():
+        return await asyncio.gather(
+            ce.get_dimension_values_async(time_period, "SERVICE"),
+            ce.get_tags_async(time_period, "Owner"),
+        )
+
+    dimensions, tags = asyncio.run(query_all())
+    assert dimensions["value"].tolist() == ["EC2"]
+    assert tags["value"].tolist() == ["alice"]
+
+
+def test_set_async_max_concurrency_invalid():
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.set_async_max_concurrency(0)
@@ -0,0 +1,132 @@
+import datetime
+
+import pytest
+
+import cepan as ce
+from cepan._batch import _merge_requests
+
+
+def _results(start, end, metrics):
+    results = []
+    day = datetime.date.fromisoformat(start)
+    while day < datetime.date.fromisoformat(end):
+        next_day = day + datetime.timedelta(days=1)
+        results.append(
+            {
+                "TimePeriod": {"Start": day.isoformat(), "End": next_day.isoformat()},
+                "Total": {
+                    metric: {"Amount": str(day.day), "Unit": "USD"}
+                    for metric in metrics
+                },
+                "Groups": [],
+                "Estimated": False,
+            }
+        )
+        day = next_day
+    return results
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+
+    def get_cost_and_usage(**kwargs):
+        time_period = kwargs["TimePeriod"]
+        return {
+            "ResultsByTime": _results(
+                time_period["Start"], time_period["End"], kwargs["Metrics"]
+            ),
+        }
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+def test_get_cost_and_usage_batch(client_mock):
+    queries = [
+        ce.CostAndUsageQuery(
+            {"Start": "2020-01-01", "End": "2020-01-04"},
+            "DAILY",
+            metrics=["BLENDED_COST"],
+        ),
+        ce.CostAndUsageQuery(
+            {"Start": "2020-01-03", "End": "2020-01-06"},
+            "DAILY",
+            metrics=["UnblendedCost"],
+        ),
+        ce.CostAndUsageQuery(
+            {"Start": "2020-01-06", "End": "2020-01-07"},
+            "DAILY",
+            metrics=["BlendedCost"],
+        ),
+        ce.CostAndUsageQuery(
+            {"Start": "2020-01-01", "End": "2020-01-03"},
+            "DAILY",
+            filter=ce.Dimensions("SERVICE", ["EC2"]),
+        ),
+    ]
+    first, second, third, fourth = ce.get_cost_and_usage_batch(queries)
+
+    assert first.columns.tolist() == ["Time", "BlendedCost"]
+    assert first["Time"].tolist() == ["2020-01-01", "2020-01-02", "2020-01-03"]
+    assert second.columns.tolist() == ["Time", "UnblendedCost"]
+    assert second["UnblendedCost"].tolist() == [3.0, 4.0, 5.0]
+    assert third["BlendedCost"].tolist() == [6.0]
+    assert fourth["Time"].tolist() == ["2020-01-01", "2020-01-02"]
+
+    # The first three are merged into one request.
+    requests = [kwargs for _, kwargs in client_mock.get_cost_and_usage.call_args_list]
+    assert len(requests) == 2
+    merged = next(r for r in requests if "Filter" not in r)
+    assert merged["TimePeriod"] == {"Start": "2020-01-01", "End": "2020-01-07"}
+    assert merged["Metrics"] == ["BlendedCost", "UnblendedCost"]
+
+
+@pytest.mark.parametrize(
+    "periods,granularity,expected",
+    [
+        # Disjoint periods are not merged.
+        (
+            [("2020-01-01", "2020-01-02"), ("2020-01-03", "2020-01-04")],
+            "DAILY",
+            [0, 1],
+        ),
+        (
+            [("2020-01-01", "2020-02-01"), ("2020-02-01", "2020-03-01")],
+            "MONTHLY",
+            [0, 0],
+        ),
+        # A partial month can not be sliced out of a longer period.
+        (
+            [("2020-01-01", "2020-02-15"), ("2020-02-01", "2020-03-01")],
+            "MONTHLY",
+            [0, 1],
+        ),
+        (
+            [("2020-01-15", "2020-02-01"), ("2020-01-15", "2020-02-01")],
+            "MONTHLY",
+            [0, 0],
+        ),
+        (
+            [
+                ("2020-01-01T00:00:00Z", "2020-01-01T12:00:00Z"),
+                ("2020-01-01T12:00:00Z", "2020-01-02T00:00:00Z"),
+            ],
+            "HOURLY",
+            [0, 1],
+        ),
+    ],
+)
+def test_merge_requests(periods, granularity, expected):
+    built = [
+        {
+            "TimePeriod": {"Start": start, "End": end},
+            "Granularity": granularity,
+            "Metrics": ["UnblendedCost"],
+        }
+        for start, end in periods
+    ]
+    requests, assignments = _merge_requests(built)
+    assert assignments == expected
+    assert len(requests) == len(set(expected))
@@ -0,0 +1,259 @@
+import pandas as pd
+import pytest
+
+from cepan import exceptions
+from cepan._builder import _CostAndUsageBuilder, _KeyColumn, _MetricColumn
+
+group_response = {
+    "GroupDefinitions": [
+        {"Type": "DIMENSION", "Key": "REGION"},
+        {"Type": "DIMENSION", "Key": "AZ"},
+    ],
+    "ResultsByTime": [
+        {
+            "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+            "Total": {},
+            "Groups": [
+                {
+                    "Keys": ["NoRegion", "NoAZ"],
+                    "Metrics": {"AmortizedCost": {"Amount": "0.001", "Unit": "USD"}},
+                },
+                {
+                    "Keys": ["ap-northeast-1", "NoAZ"],
+                    "Metrics": {"AmortizedCost": {"Amount": "0.003", "Unit": "USD"}},
+                },
+            ],
+            "Estimated": False,
+        },
+        {
+            "TimePeriod": {"Start": "2020-01-02", "End": "2020-01-03"},
+            "Total": {},
+            "Groups": [
+                {
+                    "Keys": ["NoRegion", "NoAZ"],
+                    "Metrics": {"AmortizedCost": {"Amount": "0.005", "Unit": "USD"}},
+                },
+            ],
+            "Estimated": False,
+        },
+    ],
+}
+
+
+def test_key_column():
+    column = _KeyColumn(n_missing=1)
+    column.append("a")
+    column.append("b")
+    column.append("a")
+    assert column.categories == ["a", "b"]
+    assert list(column.codes) == [-1, 0, 1, 0]
+    built = column.build()
+    assert built.dtype == "string"
+    assert built.isna().tolist() == [True, False, False, False]
+    assert built[1:].tolist() == ["a", "b", "a"]
+
+
+def test_key_column_category():
+    column = _KeyColumn(n_missing=1, dtype="category")
+    column.append("a")
+    column.append("b")
+    column.append("a")
+    built = column.build()
+    assert isinstance(built, pd.Categorical)
+    assert built.categories.tolist() == ["a", "b"]
+    assert built.isna().tolist() == [True, False, False, False]
+    assert built[1:].tolist() == ["a", "b", "a"]
+    # Codes are copied, so rows can be dropped afterwards.
+    column.drop(2)
+    assert built.codes.tolist() == [-1, 0, 1, 0]
+
+
+def test_builder_category():
+    builder = _CostAndUsageBuilder(keys_dtype="category")
+    builder.add_page(group_response)
+    first = builder.flush(2)
+    second = builder.flush()
+    for name in ["Time", "REGION", "AZ"]:
+        assert first[name].dtype == "category"
+    assert first["AmortizedCost"].dtype == "float64"
+    # Dictionaries only keep the values of the rows left after a flush.
+    assert second["REGION"].cat.categories.tolist() == ["NoRegion"]
+    assert second["REGION"].tolist() == ["NoRegion"]
+    expected = _CostAndUsageBuilder()
+    expected.add_page(group_response)
+    assert (
+        pd.concat([first, second], ignore_index=True)
+        .astype({"Time": "string", "REGION": "string", "AZ": "string"})
+        .equals(expected.build())
+    )
+
+
+def test_builder_invalid_keys_dtype():
+    with pytest.raises(exceptions.InvalidParameter):
+        _CostAndUsageBuilder(keys_dtype="object")
+
+
+def test_builder_group_response():
+    builder = _CostAndUsageBuilder()
+    builder.add_page(group_response)
+    assert len(builder) == 3
+    df = builder.build()
+    assert df.columns.tolist() == ["Time", "REGION", "AZ", "AmortizedCost"]
+    assert df["Time"].tolist() == ["2020-01-01", "2020-01-01", "2020-01-02"]
+    assert df["REGION"].tolist() == ["NoRegion", "ap-northeast-1", "NoRegion"]
+    assert df["AmortizedCost"].tolist() == [0.001, 0.003, 0.005]
+    assert df["REGION"].dtype == "string"
+    assert df["AmortizedCost"].dtype == "float64"
+
+
+@pytest.mark.parametrize(
+    "dtype",
+    ["float64", "float32", "string"],
+)
+def test_builder_metrics_dtype(dtype):
+    builder = _CostAndUsageBuilder(dtype)
+    builder.add_page(group_response)
+    df = builder.build()
+    assert df["AmortizedCost"].dtype == dtype
+
+
+def test_builder_missing_columns():
+    # Columns that only appear in later rows are padded with missing values.
+    builder = _CostAndUsageBuilder()
+    builder.add_page(
+        {
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                    "Total": {"AmortizedCost": {"Amount": "1.0", "Unit": "USD"}},
+                    "Groups": [],
+                    "Estimated": False,
+                },
+            ],
+        }
+    )
+    builder.add_page(group_response)
+    df = builder.build()
+    assert df.shape == (4, 4)
+    assert pd.isna(df["REGION"][0])
+    assert df["AmortizedCost"].tolist() == [1.0, 0.001, 0.003, 0.005]
+
+
+def test_builder_empty():
+    builder = _CostAndUsageBuilder()
+    builder.add_page({"ResultsByTime": []})
+    assert builder.build().shape == (0, 0)
+
+
+def test_builder_flush():
+    builder = _CostAndUsageBuilder()
+    builder.add_page(group_response)
+    head = builder.flush(2)
+    assert head["AmortizedCost"].tolist() == [0.001, 0.003]
+    assert len(builder) == 1
+    builder.add_page(group_response)
+    tail = builder.flush()
+    assert tail["REGION"].tolist() == [
+        "NoRegion",
+        "NoRegion",
+        "ap-northeast-1",
+        "NoRegion",
+    ]
+    assert len(builder) == 0
+
+
+def test_builder_merge():
+    builder = _CostAndUsageBuilder(merge=True)
+    builder.add_page(group_response)
+    builder.add_page(group_response)
+    df = builder.build()
+    assert len(df) == 3
+    assert df["AmortizedCost"].tolist() == pytest.approx([0.002, 0.006, 0.01])
+
+    builder = _CostAndUsageBuilder("string", merge=True)
+    builder.add_page(group_response)
+    builder.add_page(group_response)
+    assert builder.build()["AmortizedCost"].tolist() == ["0.002", "0.006", "0.010"]
+
+
+def test_builder_merge_after_drop():
+    builder = _CostAndUsageBuilder(merge=True)
+    builder.add_page(group_response)
+    builder.drop(1)
+    # The rows left are still summed into.
+    builder.add_page(group_response)
+    df = builder.build()
+    assert df["REGION"].tolist() == ["ap-northeast-1", "NoRegion", "NoRegion"]
+    assert df["AmortizedCost"].tolist() == pytest.approx([0.006, 0.01, 0.001])
+
+
+def test_builder_merge_after_compaction():
+    def response(*regions):
+        return {
+            "GroupDefinitions": [{"Type": "DIMENSION", "Key": "REGION"}],
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                    "Total": {},
+                    "Groups": [
+                        {
+                            "Keys": [region],
+                            "Metrics": {
+                                "AmortizedCost": {"Amount": "1", "Unit": "USD"}
+                            },
+                        }
+                        for region in regions
+                    ],
+                    "Estimated": False,
+                }
+            ],
+        }
+
+    builder = _CostAndUsageBuilder(merge=True)
+    builder.add_page(response("a", "b"))
+    builder.drop(1)
+    # b gets a new code, under which its row is still summed into.
+    assert builder.columns["REGION"].categories == ["b"]
+    builder.add_page(response("b", "c"))
+    df = builder.build()
+    assert df["REGION"].tolist() == ["b", "c"]
+    assert df["AmortizedCost"].tolist() == [2.0, 1.0]
+
+
+def test_builder_dictionary_bounded():
+    builder = _CostAndUsageBuilder(keys_dtype="category")
+    for _ in range(3):
+        builder.add_page(group_response)
+        builder.flush()
+    assert builder.columns["REGION"].categories == []
+    assert builder.columns["Time"].categories == []
+
+
+def test_builder_micros():
+    builder = _CostAndUsageBuilder("micros", merge=True)
+    builder.add_page(group_response)
+    builder.add_page(group_response)
+    df = builder.build()
+    assert df.columns.tolist() == [
+        "Time",
+        "REGION",
+        "AZ",
+        "AmortizedCost",
+        "AmortizedCostUnit",
+    ]
+    assert df["AmortizedCost"].dtype == "Int64"
+    # Sums of micros are exact.
+    assert df["AmortizedCost"].tolist() == [2000, 6000, 10000]
+    assert df["AmortizedCostUnit"].tolist() == ["USD", "USD", "USD"]
+
+
+def test_metric_column_micros():
+    column = _MetricColumn("micros", n_missing=1)
+    column.append("0.0000015")
+    column.append("0.0000025")
+    column.append("12345678.123456")
+    assert column.build().tolist()[1:] == [2, 2, 12345678123456]
+    assert pd.isna(column.build()[0])
+    assert column.to_numpy().tolist()[0] is None
+    column.drop(1)
+    assert column.to_numpy().dtype == "int64"
@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+
+import cepan as ce
+from cepan._cache import ResponseCache
+
+
+def _page(estimated, token=None):
+    page = {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                "Total": {"AmortizedCost": {"Amount": "1.0", "Unit": "USD"}},
+                "Groups": [],
+                "Estimated": estimated,
+            }
+        ],
+    }
+    if token:
+        page["NextPageToken"] = token
+    return page
+
+
+def test_response_cache_final(mocker, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        _page(False, token="Next"),
+        _page(False),
+    ]
+    args = {"Granularity": "DAILY"}
+    first = list(cache.call_with_pagination(client_mock, "get_cost_and_usage", args))
+    args = {"Granularity": "DAILY"}
+    second = list(cache.call_with_pagination(client_mock, "get_cost_and_usage", args))
+    assert first == second
+    assert client_mock.get_cost_and_usage.call_count == 2
+
+    # The cache persists across instances.
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    third = list(cache.call_with_pagination(client_mock, "get_cost_and_usage", args))
+    assert third == first
+    assert client_mock.get_cost_and_usage.call_count == 2
+
+
+def test_response_cache_estimated(mocker, tmp_path):
+    cache = ResponseCache(
+        str(tmp_path / "cache.sqlite3"), estimated_ttl=datetime.timedelta(minutes=1)
+    )
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _page(True)
+    time_mock = mocker.patch("time.time", return_value=1000.0)
+
+    list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    assert client_mock.get_cost_and_usage.call_count == 1
+
+    time_mock.return_value = 1061.0
+    list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    assert client_mock.get_cost_and_usage.call_count == 2
+
+
+def test_response_cache_incomplete(mocker, tmp_path):
+    # Pages of an interrupted pagination are not cached.
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        _page(False, token="Next"),
+        RuntimeError("connection error"),
+        _page(False, token="Next"),
+        _page(False),
+    ]
+    with pytest.raises(RuntimeError):
+        list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    pages = list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    assert len(pages) == 2
+    assert client_mock.get_cost_and_usage.call_count == 4
+
+
+def test_response_cache_clear(mocker, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _page(False)
+    list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    cache.clear()
+    list(cache.call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    assert client_mock.get_cost_and_usage.call_count == 2
+
+
+def test_get_cost_and_usage_with_cache(mocker, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _page(False)
+    mocker.patch("boto3.client", return_value=client_mock)
+    time_period = {"Start": "2020-01-01", "End": "2020-01-03"}
+    first = ce.get_cost_and_usage(
+        time_period, "DAILY", split_time_period="DAILY", cache=cache
+    )
+    second = ce.get_cost_and_usage(
+        time_period, "DAILY", split_time_period="DAILY", cache=cache
+    )
+    assert first.equals(second)
+    assert client_mock.get_cost_and_usage.call_count == 2
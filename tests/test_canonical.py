@@ -0,0 +1,59 @@
+from cepan._canonical import _canonicalize_request, _request_fingerprint
+from cepan._filter import And, Dimensions, Tags
+
+
+def test_canonicalize_request():
+    args = {
+        "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+        "Granularity": "DAILY",
+        "Metrics": ["UNBLENDED_COST", "BlendedCost", "UnblendedCost"],
+        "Filter": And(
+            [Tags("Owner", ["bob", "alice"]), Dimensions("SERVICE", ["EC2"])]
+        ).build_expression(),
+        "GroupBy": [
+            {"Type": "DIMENSION", "Key": "SERVICE"},
+            {"Type": "DIMENSION", "Key": "SERVICE"},
+            {"Type": "DIMENSION", "Key": "AZ"},
+        ],
+        "NextPageToken": "Next",
+    }
+    assert _canonicalize_request(args) == {
+        "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+        "Granularity": "DAILY",
+        "Metrics": ["BlendedCost", "UnblendedCost"],
+        "Filter": {
+            "And": [
+                {
+                    "Dimensions": {
+                        "Key": "SERVICE",
+                        "Values": ["Amazon Elastic Compute Cloud - Compute"],
+                    }
+                },
+                {"Tags": {"Key": "Owner", "Values": ["alice", "bob"]}},
+            ]
+        },
+        "GroupBy": [
+            {"Type": "DIMENSION", "Key": "SERVICE"},
+            {"Type": "DIMENSION", "Key": "AZ"},
+        ],
+    }
+
+
+def test_request_fingerprint():
+    args = {
+        "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+        "Filter": Dimensions("SERVICE", ["EC2", "Athena"]).build_expression(),
+    }
+    same = {
+        "Filter": Dimensions(
+            "SERVICE", ["Amazon Athena", "Amazon Elastic Compute Cloud - Compute"]
+        ).build_expression(),
+        "TimePeriod": {"End": "2020-01-02", "Start": "2020-01-01"},
+        "NextPageToken": "Next",
+    }
+    assert _request_fingerprint("get_cost_and_usage", args) == _request_fingerprint(
+        "get_cost_and_usage", same
+    )
+    assert _request_fingerprint("get_cost_and_usage", args) != _request_fingerprint(
+        "get_tags", args
+    )
@@ -1,8 +1,12 @@
 import datetime
+import threading
 
+import pandas as pd
 import pytest
 
 import cepan as ce
+from cepan import exceptions
+from cepan._cost_and_usage import _group_value_filter, _plan_requests
 from cepan._filter import Dimensions
 from cepan._group_by import GroupBy
 from cepan._time_period import TimePeriod
@@ -275,3 +279,539 @@ def test_get_cost_and_usage_dtype(mocker, dtype):
         TimePeriod(datetime.datetime(2020, 1, 1)), "", metrics_dtype=dtype
     )
     assert df["AmortizedCost"].dtype == dtype
+
+
+def _daily_page(days, token=None):
+    page = {
+        "ResultsByTime": [
+            {
+                "TimePeriod": {
+                    "Start": f"2020-01-{day:02d}",
+                    "End": f"2020-01-{day + 1:02d}",
+                },
+                "Total": {
+                    "AmortizedCost": {"Amount": str(day), "Unit": "USD"},
+                },
+                "Groups": [],
+                "Estimated": False,
+            }
+            for day in days
+        ],
+    }
+    if token:
+        page["NextPageToken"] = token
+    return page
+
+
+@pytest.mark.parametrize(
+    "chunk_size,expected_lengths",
+    [
+        (None, [2, 3]),
+        (2, [2, 2, 1]),
+        (5, [5]),
+        (10, [5]),
+    ],
+)
+def test_iter_cost_and_usage(mocker, chunk_size, expected_lengths):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        _daily_page([1, 2], token="Next"),
+        _daily_page([3, 4, 5]),
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+    chunks = list(
+        ce.iter_cost_and_usage(
+            TimePeriod(datetime.datetime(2020, 1, 1)), "DAILY", chunk_size=chunk_size
+        )
+    )
+    assert [len(chunk) for chunk in chunks] == expected_lengths
+    amounts = [amount for chunk in chunks for amount in chunk["AmortizedCost"]]
+    assert amounts == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert all(chunk["AmortizedCost"].dtype == "float64" for chunk in chunks)
+
+
+def test_iter_cost_and_usage_invalid_chunk_size():
+    with pytest.raises(exceptions.InvalidParameter):
+        next(
+            ce.iter_cost_and_usage(
+                TimePeriod(datetime.datetime(2020, 1, 1)), "DAILY", chunk_size=0
+            )
+        )
+
+
+def test_get_cost_and_usage_split_time_period(mocker):
+    # Windows are fetched concurrently but merged in time order.
+    def get_cost_and_usage(**kwargs):
+        start = int(kwargs["TimePeriod"]["Start"][-2:])
+        end = int(kwargs["TimePeriod"]["End"][-2:])
+        return _daily_page(range(start, end))
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-01-06"},
+        "DAILY",
+        split_time_period="DAILY",
+        max_workers=2,
+    )
+    assert client_mock.get_cost_and_usage.call_count == 5
+    assert df["AmortizedCost"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_get_cost_and_usage_hourly(mocker):
+    mocker.patch(
+        "cepan._time_period._utcnow", return_value=datetime.datetime(2020, 1, 10)
+    )
+
+    # Hourly requests are split into daily windows by default.
+    def get_cost_and_usage(**kwargs):
+        start = datetime.datetime.strptime(
+            kwargs["TimePeriod"]["Start"], "%Y-%m-%dT%H:%M:%SZ"
+        )
+        results = []
+        for hour in range(0, 24, 12):
+            time = start + datetime.timedelta(hours=hour)
+            results.append(
+                {
+                    "TimePeriod": {
+                        "Start": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "End": (time + datetime.timedelta(hours=1)).strftime(
+                            "%Y-%m-%dT%H:%M:%SZ"
+                        ),
+                    },
+                    "Total": {"AmortizedCost": {"Amount": "1", "Unit": "USD"}},
+                    "Groups": [],
+                    "Estimated": False,
+                }
+            )
+        return {"ResultsByTime": results}
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_cost_and_usage(
+        TimePeriod(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 4)),
+        "HOURLY",
+        metrics=["AmortizedCost"],
+        time_index=True,
+    )
+    periods = [
+        kwargs["TimePeriod"]
+        for _, kwargs in client_mock.get_cost_and_usage.call_args_list
+    ]
+    assert sorted(p["Start"] for p in periods) == [
+        "2020-01-01T00:00:00Z",
+        "2020-01-02T00:00:00Z",
+        "2020-01-03T00:00:00Z",
+    ]
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df.index.name == "Time"
+    assert df.index.is_monotonic_increasing
+    assert df.index[1] == pd.Timestamp("2020-01-01T12:00:00Z")
+    assert df.columns.tolist() == ["AmortizedCost"]
+    assert len(df) == 6
+
+
+def test_get_cost_and_usage_hourly_retention(mocker):
+    mocker.patch(
+        "cepan._time_period._utcnow", return_value=datetime.datetime(2020, 2, 1)
+    )
+    client_mock = mocker.Mock()
+    mocker.patch("boto3.client", return_value=client_mock)
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage({"Start": "2020-01-01", "End": "2020-01-04"}, "HOURLY")
+    # Periods outside the retention are rejected before any request.
+    client_mock.get_cost_and_usage.assert_not_called()
+
+
+def test_get_cost_and_usage_time_index_output():
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-01-02"},
+            "DAILY",
+            output="numpy",
+            time_index=True,
+        )
+
+
+@pytest.mark.parametrize(
+    "granularity,split_time_period",
+    [("MONTHLY", "DAILY"), ("DAILY", "HOURLY"), ("DAILY", "WEEKLY")],
+)
+def test_get_cost_and_usage_invalid_split_time_period(
+    mocker, granularity, split_time_period
+):
+    mocker.patch("boto3.client")
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-02-01"},
+            granularity,
+            split_time_period=split_time_period,
+        )
+
+
+def test_get_cost_and_usage_group_by_fan_out(mocker):
+    def get_cost_and_usage(**kwargs):
+        # The extra groups are sent as filters.
+        expressions = kwargs["Filter"]["And"]
+        assert expressions[0]["Dimensions"]["Key"] == "SERVICE"
+        # Costs without a region match none of the regions.
+        region = expressions[1].get("Dimensions", {}).get("Values", [""])[0]
+        owner = expressions[2]["Tags"].get("Values", [""])[0]
+        return {
+            "GroupDefinitions": kwargs["GroupBy"],
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                    "Total": {},
+                    "Groups": [
+                        {
+                            "Keys": ["111111111111", "t3.micro"],
+                            "Metrics": {
+                                "AmortizedCost": {
+                                    "Amount": f"{len(region + owner)}",
+                                    "Unit": "USD",
+                                }
+                            },
+                        }
+                    ],
+                    "Estimated": False,
+                }
+            ],
+        }
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    client_mock.get_dimension_values.return_value = {
+        "DimensionValues": [
+            {"Value": "us-east-1", "Attributes": {}},
+            {"Value": "ap-northeast-1", "Attributes": {}},
+            {"Value": "us-east-1", "Attributes": {}},
+        ],
+    }
+    client_mock.get_tags.return_value = {"Tags": ["alice"]}
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        "DAILY",
+        filter=Dimensions("SERVICE", ["EC2"]),
+        group_by=GroupBy(
+            dimensions=["LINKED_ACCOUNT", "INSTANCE_TYPE", "REGION"], tags=["Owner"]
+        ),
+    )
+
+    # Duplicated values are requested once, and costs without a region or
+    # untagged costs are included.
+    assert client_mock.get_cost_and_usage.call_count == 6
+    remainder = client_mock.get_cost_and_usage.call_args_list[-1].kwargs["Filter"]
+    assert remainder["And"][1] == {
+        "Not": {
+            "Dimensions": {"Key": "REGION", "Values": ["us-east-1", "ap-northeast-1"]}
+        }
+    }
+    group_by = client_mock.get_cost_and_usage.call_args.kwargs["GroupBy"]
+    assert group_by == [
+        {"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"},
+        {"Type": "DIMENSION", "Key": "INSTANCE_TYPE"},
+    ]
+    assert df.columns.tolist() == [
+        "Time",
+        "LINKED_ACCOUNT",
+        "INSTANCE_TYPE",
+        "REGION",
+        "Owner",
+        "AmortizedCost",
+    ]
+    assert df["REGION"].tolist() == [
+        "us-east-1",
+        "us-east-1",
+        "ap-northeast-1",
+        "ap-northeast-1",
+        "",
+        "",
+    ]
+    assert df["Owner"].tolist() == ["Owner$alice", "Owner$"] * 3
+    assert df["AmortizedCost"].tolist() == [14.0, 9.0, 19.0, 14.0, 5.0, 0.0]
+
+
+@pytest.mark.parametrize(
+    "categories,expected",
+    [
+        (["team-a"], ["Team$team-a", "Team$"]),
+        # Without any value, every cost is uncategorized.
+        ([], ["Team$"]),
+    ],
+)
+def test_get_cost_and_usage_group_by_fan_out_cost_category(
+    mocker, categories, expected
+):
+    def get_cost_and_usage(**kwargs):
+        team = kwargs["Filter"]["CostCategories"].get("Values", [""])[0]
+        return {
+            "GroupDefinitions": kwargs["GroupBy"],
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                    "Total": {},
+                    "Groups": [
+                        {
+                            "Keys": ["111111111111", "EC2"],
+                            "Metrics": {
+                                "AmortizedCost": {
+                                    "Amount": f"{len(team) + 1}",
+                                    "Unit": "USD",
+                                }
+                            },
+                        }
+                    ],
+                    "Estimated": False,
+                }
+            ],
+        }
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    client_mock.get_cost_categories.return_value = {"CostCategoryValues": categories}
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        "DAILY",
+        group_by=GroupBy(
+            dimensions=["LINKED_ACCOUNT", "SERVICE"], cost_categories=["Team"]
+        ),
+    )
+
+    # Uncategorized costs are fetched with the ABSENT match option.
+    filters = [
+        kwargs["Filter"] for _, kwargs in client_mock.get_cost_and_usage.call_args_list
+    ]
+    assert filters[-1] == {
+        "CostCategories": {"Key": "Team", "MatchOptions": ["ABSENT"]}
+    }
+    assert df["Team"].tolist() == expected
+    assert df["AmortizedCost"].tolist() == [float(len(team) - 4) for team in expected]
+
+
+def test_plan_requests_window_major(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_dimension_values.return_value = {
+        "DimensionValues": [{"Value": "a"}, {"Value": "b"}]
+    }
+    args = {
+        "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-03"},
+        "Granularity": "DAILY",
+        "Metrics": ["UnblendedCost"],
+        "GroupBy": GroupBy(["SERVICE", "REGION", "AZ"]).build(),
+    }
+    plan = _plan_requests(client_mock, args, "DAILY", None, None)
+    # Every request of a window comes before the next window.
+    assert [
+        (request["TimePeriod"]["Start"], constants["AZ"])
+        for request, constants in plan.requests
+    ] == [
+        ("2020-01-01", "a"),
+        ("2020-01-01", "b"),
+        ("2020-01-01", ""),
+        ("2020-01-02", "a"),
+        ("2020-01-02", "b"),
+        ("2020-01-02", ""),
+    ]
+
+
+@pytest.mark.parametrize(
+    "definition,value,values,expected",
+    [
+        (
+            {"Type": "DIMENSION", "Key": "REGION"},
+            "us-east-1",
+            ["us-east-1", ""],
+            {"Dimensions": {"Key": "REGION", "Values": ["us-east-1"]}},
+        ),
+        (
+            {"Type": "DIMENSION", "Key": "REGION"},
+            "",
+            ["us-east-1", ""],
+            {"Not": {"Dimensions": {"Key": "REGION", "Values": ["us-east-1"]}}},
+        ),
+        # Without any value, every cost has no value.
+        ({"Type": "DIMENSION", "Key": "REGION"}, "", [""], None),
+        (
+            {"Type": "TAG", "Key": "Owner"},
+            "",
+            ["alice", ""],
+            {"Tags": {"Key": "Owner", "MatchOptions": ["ABSENT"]}},
+        ),
+    ],
+)
+def test_group_value_filter(definition, value, values, expected):
+    assert _group_value_filter(definition, value, values) == expected
+
+
+def test_get_cost_and_usage_max_filter_values(mocker):
+    def get_cost_and_usage(**kwargs):
+        accounts = kwargs["Filter"]["Dimensions"]["Values"]
+        return {
+            "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+            "ResultsByTime": [
+                {
+                    "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                    "Total": {},
+                    "Groups": [
+                        {
+                            "Keys": [service],
+                            "Metrics": {
+                                "AmortizedCost": {
+                                    "Amount": str(len(accounts)),
+                                    "Unit": "USD",
+                                }
+                            },
+                        }
+                        for service in ["EC2", "S3"]
+                    ],
+                    "Estimated": False,
+                }
+            ],
+        }
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    accounts = [str(account) for account in range(5)]
+    for metrics_dtype, expected in [("float64", [5.0, 5.0]), ("string", ["5", "5"])]:
+        df = ce.get_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-01-02"},
+            "DAILY",
+            filter=Dimensions("LINKED_ACCOUNT", accounts),
+            group_by=GroupBy(["SERVICE"]),
+            metrics_dtype=metrics_dtype,
+            max_filter_values=2,
+        )
+        # The shards are disjoint, so their costs are summed.
+        assert df["SERVICE"].tolist() == ["EC2", "S3"]
+        assert df["AmortizedCost"].tolist() == expected
+    assert client_mock.get_cost_and_usage.call_count == 6
+
+
+@pytest.mark.parametrize("chunk_size,expected", [(None, [2, 2]), (3, [3, 1])])
+def test_iter_cost_and_usage_max_filter_values(mocker, chunk_size, expected):
+    def get_cost_and_usage(**kwargs):
+        accounts = kwargs["Filter"]["Dimensions"]["Values"]
+        return {
+            "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+            "ResultsByTime": [
+                {
+                    "TimePeriod": kwargs["TimePeriod"],
+                    "Total": {},
+                    "Groups": [
+                        {
+                            "Keys": [service],
+                            "Metrics": {
+                                "AmortizedCost": {
+                                    "Amount": str(len(accounts)),
+                                    "Unit": "USD",
+                                }
+                            },
+                        }
+                        for service in ["EC2", "S3"]
+                    ],
+                    "Estimated": False,
+                }
+            ],
+        }
+
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    chunks = list(
+        ce.iter_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-01-03"},
+            "DAILY",
+            filter=Dimensions("LINKED_ACCOUNT", [str(i) for i in range(5)]),
+            group_by=GroupBy(["SERVICE"]),
+            chunk_size=chunk_size,
+            split_time_period="DAILY",
+            max_filter_values=2,
+        )
+    )
+    assert client_mock.get_cost_and_usage.call_count == 6
+    # Chunks hold rows summed over every shard of their window.
+    assert [len(chunk) for chunk in chunks] == expected
+    df = pd.concat(chunks, ignore_index=True)
+    assert df["Time"].tolist() == [
+        "2020-01-01",
+        "2020-01-01",
+        "2020-01-02",
+        "2020-01-02",
+    ]
+    assert df["AmortizedCost"].tolist() == [5.0] * 4
+
+
+def test_get_cost_and_usage_single_flight(mocker):
+    client_mock = mocker.Mock()
+    release = threading.Event()
+
+    def get_cost_and_usage(**kwargs):
+        release.wait(5)
+        return _daily_page([1])
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    time_period = {"Start": "2020-01-01", "End": "2020-01-02"}
+
+    results = []
+
+    def query():
+        results.append(
+            ce.get_cost_and_usage(time_period, "DAILY", metrics=["AmortizedCost"])
+        )
+
+    threads = [threading.Thread(target=query) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # Let every thread join the request in flight.
+    threads[0].join(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert client_mock.get_cost_and_usage.call_count == 1
+    assert len(results) == 4
+    assert all(df.equals(results[0]) for df in results)
+    # Callers do not share the same DataFrame.
+    assert len({id(df) for df in results}) == 4
+
+
+def test_get_cost_and_usage_keys_dtype(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _daily_page([1, 2])
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-01-03"},
+        "DAILY",
+        metrics=["AmortizedCost"],
+        keys_dtype="category",
+    )
+    assert df["Time"].dtype == "category"
+    assert df["Time"].tolist() == ["2020-01-01", "2020-01-02"]
+
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-01-03"}, "DAILY", keys_dtype="object"
+        )
+    assert client_mock.get_cost_and_usage.call_count == 1
+
+
+def test_get_cost_and_usage_positional_session(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _daily_page([1, 2])
+    session_mock = mocker.Mock()
+    session_mock.client.return_value = client_mock
+    # session keeps its position, the newer parameters are keyword only.
+    args = [{"Start": "2020-01-01", "End": "2020-01-03"}, "DAILY", None]
+    args += [["AmortizedCost"], None, "float64", session_mock]
+    df = ce.get_cost_and_usage(*args)
+    assert df["AmortizedCost"].tolist() == [1.0, 2.0]
+    assert next(ce.iter_cost_and_usage(*args[:6], None, session_mock)).equals(df)
+    with pytest.raises(TypeError):
+        ce.get_cost_and_usage(*args, "category")
@@ -87,3 +87,57 @@ def test_get_dimensions(mocker):
     )
     assert len(df.index) == 1
     assert len(df.columns) == 2
+
+
+def test_get_dimensions_pagination(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_dimension_values.side_effect = [
+        {
+            "DimensionValues": [{"Value": "ap-northeast-1", "Attributes": {}}],
+            "NextPageToken": "Next",
+        },
+        {"DimensionValues": [{"Value": "us-east-1", "Attributes": {}}]},
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_dimension_values(
+        TimePeriod(start=datetime.datetime(2020, 1, 1)),
+        "REGION",
+    )
+    assert df["value"].tolist() == ["ap-northeast-1", "us-east-1"]
+    assert client_mock.get_dimension_values.call_count == 2
+
+
+def test_get_dimension_catalog(mocker):
+    client_mock = mocker.Mock()
+
+    def get_dimension_values(**kwargs):
+        if "NextPageToken" not in kwargs and kwargs["Dimension"] == "REGION":
+            return {
+                "DimensionValues": [{"Value": "ap-northeast-1", "Attributes": {}}],
+                "NextPageToken": "Next",
+            }
+        return {
+            "DimensionValues": [
+                {"Value": "", "Attributes": {}},
+                {"Value": kwargs["Dimension"].lower(), "Attributes": {}},
+            ],
+        }
+
+    client_mock.get_dimension_values.side_effect = get_dimension_values
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_dimension_catalog(
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        dimensions=["REGION", "SERVICE"],
+        filter=Dimensions("LINKED_ACCOUNT", ["123"]),
+    )
+    assert df["dimension"].tolist() == ["REGION", "REGION", "SERVICE"]
+    assert df["value"].tolist() == ["ap-northeast-1", "region", "service"]
+    requests = [c.kwargs for c in client_mock.get_dimension_values.call_args_list]
+    assert all(r["Context"] == "COST_AND_USAGE" for r in requests)
+    assert all("Filter" in r for r in requests)
+
+    client_mock.get_dimension_values.reset_mock()
+    df = ce.get_dimension_catalog(
+        {"Start": "2020-01-01", "End": "2020-01-02"}, context="SAVINGS_PLANS"
+    )
+    assert df["dimension"].unique().tolist() == _SAVINGS_PLANS_DIMENSIONS
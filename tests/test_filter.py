@@ -1,5 +1,7 @@
+import pandas as pd
 import pytest
 
+from cepan import exceptions
 from cepan._filter import (
     And,
     CostCategories,
@@ -9,6 +11,7 @@ from cepan._filter import (
     Tags,
     _BaseFilter,
     _CompositeFilter,
+    _shard_filter,
 )
 
 
@@ -135,3 +138,171 @@ def test_not():
     assert f.build_expression() == {
         "Not": {"Dimensions": {"Key": "key", "Values": ["value"]}}
     }
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        # Short value lists are kept.
+        (
+            Dimensions("key", ["a", "b"]).build_expression(),
+            [{"Dimensions": {"Key": "key", "Values": ["a", "b"]}}],
+        ),
+        # Duplicated values are removed before splitting.
+        (
+            Dimensions("key", ["a", "b", "a", "c"]).build_expression(),
+            [
+                {"Dimensions": {"Key": "key", "Values": ["a", "b"]}},
+                {"Dimensions": {"Key": "key", "Values": ["c"]}},
+            ],
+        ),
+        (
+            And(
+                [
+                    Tags("key", ["a", "b", "c"]),
+                    Dimensions("key", ["x"]),
+                ]
+            ).build_expression(),
+            [
+                {
+                    "And": [
+                        {"Tags": {"Key": "key", "Values": ["a", "b"]}},
+                        {"Dimensions": {"Key": "key", "Values": ["x"]}},
+                    ]
+                },
+                {
+                    "And": [
+                        {"Tags": {"Key": "key", "Values": ["c"]}},
+                        {"Dimensions": {"Key": "key", "Values": ["x"]}},
+                    ]
+                },
+            ],
+        ),
+        # Shards of Or, Not and partial matches would overlap.
+        (
+            Or([Dimensions("key", ["a", "b", "c"])]).build_expression(),
+            [{"Or": [{"Dimensions": {"Key": "key", "Values": ["a", "b", "c"]}}]}],
+        ),
+        (
+            Not(Dimensions("key", ["a", "b", "c"])).build_expression(),
+            [{"Not": {"Dimensions": {"Key": "key", "Values": ["a", "b", "c"]}}}],
+        ),
+        (
+            Dimensions("key", ["a", "b", "c"], ["CONTAINS"]).build_expression(),
+            [
+                {
+                    "Dimensions": {
+                        "Key": "key",
+                        "Values": ["a", "b", "c"],
+                        "MatchOptions": ["CONTAINS"],
+                    }
+                }
+            ],
+        ),
+    ],
+)
+def test_shard_filter(expression, expected):
+    assert _shard_filter(expression, 2) == expected
+
+
+def test_canonical():
+    a = Dimensions("SERVICE", ["EC2", "Athena", "EC2"])
+    b = Tags("Owner", ["alice"])
+    c = Dimensions("REGION", ["us-east-1"], ["EQUALS"])
+    f = And([And([b, a]), Not(Not(c))])
+    assert f.canonical() == And(
+        [
+            Dimensions("REGION", ["us-east-1"]),
+            Dimensions(
+                "SERVICE",
+                ["Amazon Athena", "Amazon Elastic Compute Cloud - Compute"],
+            ),
+            Tags("Owner", ["alice"]),
+        ]
+    )
+    assert Or([a]).canonical() == a.canonical()
+
+
+def test_fingerprint():
+    a = Dimensions("SERVICE", ["EC2"])
+    b = Tags("Owner", ["alice"])
+    assert And([a, b]).fingerprint() == And([b, a]).fingerprint()
+    assert (
+        Dimensions("SERVICE", ["Amazon Elastic Compute Cloud - Compute"]).fingerprint()
+        == a.fingerprint()
+    )
+    assert And([a, b]).fingerprint() != Or([a, b]).fingerprint()
+    assert And([a, b]).fingerprint() != And([a, Not(b)]).fingerprint()
+
+    # Filters can be used as keys of dictionaries.
+    assert {And([a, b]): "cached"}[And([a, b])] == "cached"
+    assert hash(And([a, b])) == hash(And([b, a]))
+
+
+@pytest.fixture
+def result():
+    return pd.DataFrame(
+        {
+            "Time": ["2020-01-01"] * 4,
+            "SERVICE": [
+                "Amazon Elastic Compute Cloud - Compute",
+                "Amazon Simple Storage Service",
+                "AWS Lambda",
+                None,
+            ],
+            "Owner": ["Owner$alice", "Owner$Bob", "Owner$", "Owner$alice"],
+            "UnblendedCost": [1.0, 2.0, 3.0, 4.0],
+        }
+    ).astype({"Time": "string", "SERVICE": "string", "Owner": "string"})
+
+
+@pytest.mark.parametrize(
+    "f,expected",
+    [
+        (Dimensions("SERVICE", ["EC2", "S3"]), [True, True, False, False]),
+        (
+            Dimensions("SERVICE", ["Amazon"], ["STARTS_WITH"]),
+            [True, True, False, False],
+        ),
+        (Dimensions("SERVICE", ["lambda"], ["CONTAINS"]), [False, False, False, False]),
+        (
+            Dimensions("SERVICE", ["lambda"], ["CONTAINS", "CASE_INSENSITIVE"]),
+            [False, False, True, False],
+        ),
+        (
+            Dimensions("SERVICE", ["Service"], ["ENDS_WITH"]),
+            [False, True, False, False],
+        ),
+        (Dimensions("SERVICE", [], ["ABSENT"]), [False, False, False, True]),
+        (Tags("Owner", ["alice"]), [True, False, False, True]),
+        (
+            Tags("Owner", ["bob"], ["EQUALS", "CASE_INSENSITIVE"]),
+            [False, True, False, False],
+        ),
+        (Tags("Owner", [], ["ABSENT"]), [False, False, True, False]),
+        (
+            And([Tags("Owner", ["alice"]), Dimensions("SERVICE", ["EC2"])]),
+            [True, False, False, False],
+        ),
+        (
+            Or([Tags("Owner", ["Bob"]), Dimensions("SERVICE", ["Lambda"])]),
+            [False, True, True, False],
+        ),
+        (Not(Tags("Owner", ["alice"])), [False, True, True, False]),
+    ],
+)
+def test_evaluate(result, f, expected):
+    mask = f.evaluate(result)
+    assert mask.tolist() == expected
+    assert mask.index.equals(result.index)
+
+
+def test_evaluate_missing_column(result):
+    with pytest.raises(exceptions.InvalidParameter):
+        Dimensions("REGION", ["us-east-1"]).evaluate(result)
+
+
+def test_filter_mixin_without_build_expression():
+    # The mixin relies on build_expression of the Filter classes.
+    assert not hasattr(_BaseFilter("key", ["value"]), "build_expression")
+    assert hash(Dimensions("key", ["a", "b"])) == hash(Dimensions("key", ["b", "a"]))
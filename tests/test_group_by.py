@@ -1,6 +1,6 @@
 import pytest
 
-from cepan._group_by import GroupBy
+from cepan._group_by import GroupBy, _split_group_by
 
 
 @pytest.mark.parametrize(
@@ -77,3 +77,26 @@ from cepan._group_by import GroupBy
 def test_group_by(args, expected):
     f = GroupBy(**args)
     assert f.build() == expected
+
+
+def test_split_group_by():
+    group_by = GroupBy(
+        dimensions=["SERVICE", "SERVICE", "REGION", "AZ"], tags=["Owner"]
+    ).build()
+    api, extra = _split_group_by(group_by)
+    assert api == [
+        {"Type": "DIMENSION", "Key": "SERVICE"},
+        {"Type": "DIMENSION", "Key": "REGION"},
+    ]
+    assert extra == [
+        {"Type": "DIMENSION", "Key": "AZ"},
+        {"Type": "TAG", "Key": "Owner"},
+    ]
+
+
+def test_group_by_fingerprint():
+    a = GroupBy(dimensions=["SERVICE", "AZ", "SERVICE"])
+    assert a.canonical() == GroupBy(dimensions=["SERVICE", "AZ"])
+    assert a.fingerprint() == GroupBy(dimensions=["SERVICE", "AZ"]).fingerprint()
+    assert a.fingerprint() != GroupBy(dimensions=["AZ", "SERVICE"]).fingerprint()
+    assert hash(a) == hash(a.canonical())
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+
+_HEAVY_MODULES = ["boto3", "botocore", "numpy", "pandas", "pyarrow"]
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import cepan",
+        "import cepan; cepan.show_dimensions()",
+        "import cepan; cepan.And([cepan.Dimensions('SERVICE', ['EC2']),"
+        " cepan.Not(cepan.Tags('Owner', ['alice']))]).build_expression()",
+        "import cepan, datetime; cepan.TimePeriod("
+        "start=datetime.datetime(2020, 1, 1), end=datetime.datetime(2020, 2, 1)"
+        ").build(); cepan.GroupBy(['SERVICE']).build()",
+    ],
+)
+def test_lazy_import(statement):
+    # Heavy dependencies are only imported by calls that need them.
+    code = f"{statement}; import sys; print(','.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    modules = result.stdout.strip().split(",")
+    assert [m for m in _HEAVY_MODULES if m in modules] == []
+
+
+def test_version():
+    import cepan
+
+    assert isinstance(cepan.__version__, str)
+    with pytest.raises(AttributeError):
+        cepan.no_such_attribute
+
+
+def test_without_pandas():
+    # Outputs other than pandas work without pandas installed.
+    code = """
+import sys
+from unittest import mock
+
+sys.modules["pandas"] = None
+import cepan
+
+client = mock.Mock()
+client.get_cost_and_usage.return_value = {
+    "ResultsByTime": [
+        {
+            "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+            "Total": {"UnblendedCost": {"Amount": "1.5", "Unit": "USD"}},
+            "Groups": [],
+            "Estimated": False,
+        }
+    ]
+}
+time_period = {"Start": "2020-01-01", "End": "2020-01-02"}
+with mock.patch("boto3.client", return_value=client):
+    print(cepan.get_cost_and_usage(time_period, "DAILY", output="tuples"))
+    try:
+        cepan.get_cost_and_usage(time_period, "DAILY")
+    except ImportError as e:
+        print(e)
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    rows, error = result.stdout.strip().split("\n")
+    assert rows == "[('2020-01-01', 1.5)]"
+    assert "pip install cepan[pandas]" in error
@@ -0,0 +1,148 @@
+import datetime
+
+import pytest
+
+from cepan import exceptions
+from cepan._incremental import IncrementalCostAndUsage
+
+
+def _results(start, end, estimated_from=None):
+    # One result per day in [start, end), estimated from estimated_from.
+    results = []
+    day = datetime.date.fromisoformat(start)
+    while day < datetime.date.fromisoformat(end):
+        next_day = day + datetime.timedelta(days=1)
+        estimated = estimated_from is not None and day.isoformat() >= estimated_from
+        results.append(
+            {
+                "TimePeriod": {"Start": day.isoformat(), "End": next_day.isoformat()},
+                "Total": {},
+                "Groups": [
+                    {
+                        "Keys": ["EC2"],
+                        "Metrics": {
+                            "UnblendedCost": {"Amount": str(day.day), "Unit": "USD"}
+                        },
+                    }
+                ],
+                "Estimated": estimated,
+            }
+        )
+        day = next_day
+    return results
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+    estimated_from = {"value": None}
+
+    def get_cost_and_usage(**kwargs):
+        time_period = kwargs["TimePeriod"]
+        return {
+            "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+            "ResultsByTime": _results(
+                time_period["Start"], time_period["End"], estimated_from["value"]
+            ),
+        }
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    client_mock.estimated_from = estimated_from
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+def _fetched_periods(client_mock):
+    return [
+        kwargs["TimePeriod"]
+        for _, kwargs in client_mock.get_cost_and_usage.call_args_list
+    ]
+
+
+def test_incremental_sync(client_mock, tmp_path):
+    store = IncrementalCostAndUsage(
+        str(tmp_path / "store.sqlite3"), datetime.timedelta(days=2)
+    )
+    df = store.sync(
+        {"Start": "2020-01-01", "End": "2020-01-11"},
+        "DAILY",
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+    )
+    assert len(df) == 10
+    assert df.columns.tolist() == ["Time", "SERVICE", "UnblendedCost"]
+
+    # Only days after the high-water mark minus the restatement window.
+    df = store.sync(
+        {"Start": "2020-01-01", "End": "2020-01-13"},
+        "DAILY",
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+    )
+    assert _fetched_periods(client_mock)[-1] == {
+        "Start": "2020-01-09",
+        "End": "2020-01-13",
+    }
+    assert df["Time"].tolist()[-3:] == ["2020-01-10", "2020-01-11", "2020-01-12"]
+    assert df["UnblendedCost"].sum() == sum(range(1, 13))
+
+
+def test_incremental_sync_estimated(client_mock, tmp_path):
+    # Estimated periods are refetched even before the restatement window.
+    store = IncrementalCostAndUsage(
+        str(tmp_path / "store.sqlite3"), datetime.timedelta(days=1)
+    )
+    client_mock.estimated_from["value"] = "2020-01-05"
+    store.sync({"Start": "2020-01-01", "End": "2020-01-11"}, "DAILY")
+    client_mock.estimated_from["value"] = None
+    store.sync({"Start": "2020-01-01", "End": "2020-01-12"}, "DAILY")
+    assert _fetched_periods(client_mock)[-1] == {
+        "Start": "2020-01-05",
+        "End": "2020-01-12",
+    }
+    store.sync({"Start": "2020-01-01", "End": "2020-01-12"}, "DAILY")
+    assert _fetched_periods(client_mock)[-1] == {
+        "Start": "2020-01-11",
+        "End": "2020-01-12",
+    }
+
+
+def test_incremental_sync_queries_are_separate(client_mock, tmp_path):
+    store = IncrementalCostAndUsage(str(tmp_path / "store.sqlite3"))
+    time_period = {"Start": "2020-01-01", "End": "2020-01-11"}
+    store.sync(time_period, "DAILY", metrics=["UnblendedCost"])
+    store.sync(time_period, "DAILY", metrics=["BlendedCost"])
+    assert _fetched_periods(client_mock) == [time_period, time_period]
+
+
+def test_incremental_sync_earlier_start(client_mock, tmp_path):
+    store = IncrementalCostAndUsage(str(tmp_path / "store.sqlite3"))
+    store.sync({"Start": "2020-01-05", "End": "2020-01-11"}, "DAILY")
+    df = store.sync({"Start": "2020-01-01", "End": "2020-01-11"}, "DAILY")
+    assert _fetched_periods(client_mock)[-1] == {
+        "Start": "2020-01-01",
+        "End": "2020-01-11",
+    }
+    assert len(df) == 10
+
+
+def test_incremental_sync_invalid_granularity(tmp_path):
+    store = IncrementalCostAndUsage(str(tmp_path / "store.sqlite3"))
+    with pytest.raises(exceptions.InvalidParameter):
+        store.sync({"Start": "2020-01-01", "End": "2020-01-02"}, "HOURLY")
+
+
+@pytest.mark.parametrize(
+    "first,second",
+    [
+        (("2020-01-01", "2020-01-10"), ("2020-02-01", "2020-02-10")),
+        (("2020-02-01", "2020-02-10"), ("2020-01-01", "2020-01-10")),
+    ],
+)
+def test_incremental_sync_gap(client_mock, tmp_path, first, second):
+    store = IncrementalCostAndUsage(str(tmp_path / "store.sqlite3"))
+    for start, end in [first, second]:
+        df = store.sync({"Start": start, "End": end}, "DAILY")
+        assert len(df) == 9
+    # The days between the two periods were fetched as well.
+    df = store.sync({"Start": "2020-01-01", "End": "2020-02-10"}, "DAILY")
+    assert len(df) == 40
+    assert df["Time"].tolist()[9] == "2020-01-10"
@@ -0,0 +1,106 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError, ProfileNotFound
+
+import cepan as ce
+from cepan import exceptions
+
+
+def _response(amount):
+    return {
+        "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+        "ResultsByTime": [
+            {
+                "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+                "Total": {},
+                "Groups": [
+                    {
+                        "Keys": ["EC2"],
+                        "Metrics": {"UnblendedCost": {"Amount": amount, "Unit": "USD"}},
+                    }
+                ],
+                "Estimated": False,
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def sessions(mocker):
+    sessions = {
+        "payer": boto3.Session(region_name="us-east-1"),
+        "broken": boto3.Session(region_name="us-east-1"),
+        "member": boto3.Session(region_name="us-east-1"),
+    }
+    clients = {}
+    for name, amount in [("payer", "1"), ("broken", None), ("member", "2")]:
+        client_mock = mocker.Mock()
+        if amount is None:
+            client_mock.get_cost_and_usage.side_effect = ClientError(
+                {"Error": {"Code": "AccessDeniedException"}}, "GetCostAndUsage"
+            )
+        else:
+            client_mock.get_cost_and_usage.return_value = _response(amount)
+        clients[id(sessions[name])] = client_mock
+    mocker.patch(
+        "boto3.Session.client",
+        autospec=True,
+        side_effect=lambda self, *args, **kwargs: clients[id(self)],
+    )
+    return sessions
+
+
+def test_get_cost_and_usage_multi_account(sessions):
+    result = ce.get_cost_and_usage_multi_account(
+        sessions,
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        "DAILY",
+        group_by=ce.GroupBy(["SERVICE"]),
+    )
+    df = result.data
+    assert df.columns.tolist() == ["Time", "SERVICE", "source", "UnblendedCost"]
+    assert df["source"].tolist() == ["payer", "member"]
+    assert df["UnblendedCost"].tolist() == [1.0, 2.0]
+    # The failed account is reported without sinking the others.
+    assert list(result.errors) == ["broken"]
+    assert isinstance(result.errors["broken"], ClientError)
+
+
+def test_get_cost_and_usage_multi_account_output(sessions):
+    result = ce.get_cost_and_usage_multi_account(
+        {"payer": sessions["payer"]},
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        "DAILY",
+        source_column="account",
+        output="tuples",
+    )
+    assert result.data == [("2020-01-01", "EC2", "payer", 1.0)]
+    assert result.errors == {}
+
+
+def test_get_cost_and_usage_multi_account_duplicate_names(sessions):
+    # Both sessions use the default profile.
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage_multi_account(
+            [sessions["payer"], sessions["member"]],
+            {"Start": "2020-01-01", "End": "2020-01-02"},
+            "DAILY",
+        )
+
+
+def test_get_cost_and_usage_multi_account_missing_profile(sessions, mocker):
+    def profile_session(profile_name):
+        if profile_name == "nope-xyz":
+            raise ProfileNotFound(profile=profile_name)
+        return sessions[profile_name]
+
+    mocker.patch("cepan._utils.profile_session", side_effect=profile_session)
+    result = ce.get_cost_and_usage_multi_account(
+        ["nope-xyz", "payer"],
+        {"Start": "2020-01-01", "End": "2020-01-02"},
+        "DAILY",
+        output="tuples",
+    )
+    assert result.data == [("2020-01-01", "EC2", "payer", 1.0)]
+    assert list(result.errors) == ["nope-xyz"]
+    assert isinstance(result.errors["nope-xyz"], ProfileNotFound)
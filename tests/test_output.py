@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cepan as ce
+from cepan import exceptions
+from cepan._builder import _CostAndUsageBuilder
+from cepan._output import _build_output
+
+_RESPONSE = {
+    "GroupDefinitions": [{"Type": "DIMENSION", "Key": "SERVICE"}],
+    "ResultsByTime": [
+        {
+            "TimePeriod": {"Start": "2020-01-01", "End": "2020-01-02"},
+            "Total": {},
+            "Groups": [
+                {
+                    "Keys": ["EC2"],
+                    "Metrics": {"UnblendedCost": {"Amount": "1.5", "Unit": "USD"}},
+                },
+                {
+                    "Keys": ["S3"],
+                    "Metrics": {"UnblendedCost": {"Amount": "2", "Unit": "USD"}},
+                },
+            ],
+            "Estimated": False,
+        }
+    ],
+}
+
+
+@pytest.fixture
+def builder():
+    builder = _CostAndUsageBuilder()
+    builder.add_page(_RESPONSE)
+    return builder
+
+
+def test_build_output_pandas(builder):
+    df = _build_output(builder.columns, len(builder), "pandas")
+    assert df.equals(builder.build())
+
+
+def test_build_output_numpy(builder):
+    records = _build_output(builder.columns, len(builder), "numpy")
+    assert isinstance(records, np.recarray)
+    assert records.dtype.names == ("Time", "SERVICE", "UnblendedCost")
+    assert records.SERVICE.tolist() == ["EC2", "S3"]
+    assert records.UnblendedCost.tolist() == [1.5, 2.0]
+
+
+def test_build_output_tuples(builder):
+    rows = _build_output(builder.columns, 1, "tuples")
+    assert rows == [("2020-01-01", "EC2", 1.5)]
+
+
+def test_build_output_pyarrow(builder):
+    pa = pytest.importorskip("pyarrow")
+    table = _build_output(builder.columns, len(builder), "pyarrow")
+    assert isinstance(table, pa.Table)
+    assert table.column("SERVICE").to_pylist() == ["EC2", "S3"]
+    assert pa.types.is_dictionary(table.schema.field("SERVICE").type)
+
+
+def test_build_output_pyarrow_micros():
+    pa = pytest.importorskip("pyarrow")
+    builder = _CostAndUsageBuilder("micros")
+    builder.add_page(_RESPONSE)
+    table = _build_output(builder.columns, len(builder), "pyarrow")
+    assert table.schema.field("UnblendedCost").type == pa.int64()
+    assert table.column("UnblendedCost").to_pylist() == [1500000, 2000000]
+    assert table.column("UnblendedCostUnit").to_pylist() == ["USD", "USD"]
+
+
+def test_build_output_polars(builder):
+    pytest.importorskip("pyarrow")
+    pl = pytest.importorskip("polars")
+    df = _build_output(builder.columns, len(builder), "polars")
+    assert isinstance(df, pl.DataFrame)
+    assert df["UnblendedCost"].to_list() == [1.5, 2.0]
+
+
+@pytest.mark.parametrize("output", ["numpy", "tuples"])
+def test_get_cost_and_usage_output(mocker, output):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.return_value = _RESPONSE
+    mocker.patch("boto3.client", return_value=client_mock)
+    result = ce.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-01-02"}, "DAILY", output=output
+    )
+    assert not isinstance(result, pd.DataFrame)
+    assert len(result) == 2
+
+
+def test_get_tags_and_dimension_values_output(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_tags.return_value = {"Tags": ["", "alice"]}
+    client_mock.get_dimension_values.return_value = {
+        "DimensionValues": [{"Value": "EC2", "Attributes": {}}],
+    }
+    mocker.patch("boto3.client", return_value=client_mock)
+    time_period = {"Start": "2020-01-01", "End": "2020-01-02"}
+    assert ce.get_tags(time_period, "Owner", output="tuples") == [("Owner", "alice")]
+    assert ce.get_dimension_values(time_period, "SERVICE", output="tuples") == [
+        ("SERVICE", "EC2")
+    ]
+
+
+def test_invalid_output():
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.get_cost_and_usage(
+            {"Start": "2020-01-01", "End": "2020-01-02"}, "DAILY", output="csv"
+        )
@@ -0,0 +1,112 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from cepan._rate_limit import RateLimiter, _get_rate_limiter, set_rate_limiter
+from cepan._utils import call_with_pagination, client
+
+
+def _client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": ""}}, "GetCostAndUsage")
+
+
+def test_rate_limiter_acquire(mocker):
+    mocker.patch("time.monotonic", return_value=0.0)
+    sleep_mock = mocker.patch("time.sleep")
+    limiter = RateLimiter(max_rate=2.0, burst=2.0)
+    limiter.acquire()
+    limiter.acquire()
+    sleep_mock.assert_not_called()
+    limiter.acquire()
+    sleep_mock.assert_called_once_with(0.5)
+
+
+def test_rate_limiter_retry_throttling(mocker):
+    sleep_mock = mocker.patch("time.sleep")
+    limiter = RateLimiter(max_rate=4.0, burst=100.0)
+    func = mocker.Mock(
+        side_effect=[
+            _client_error("ThrottlingException"),
+            _client_error("LimitExceededException"),
+            {"Result": "OK"},
+        ]
+    )
+    assert limiter.call(func, {"arg": "foo"}) == {"Result": "OK"}
+    assert func.call_count == 3
+    assert sleep_mock.call_count == 2
+    # Halved twice, then increased once by the success.
+    assert limiter.rate == pytest.approx(1.0 + 0.2)
+
+
+def test_rate_limiter_min_rate(mocker):
+    mocker.patch("time.sleep")
+    limiter = RateLimiter(max_rate=1.0, burst=100.0, min_rate=0.5, max_attempts=5)
+    func = mocker.Mock(side_effect=_client_error("ThrottlingException"))
+    with pytest.raises(ClientError):
+        limiter.call(func, {})
+    assert func.call_count == 5
+    assert limiter.rate == 0.5
+
+
+def test_rate_limiter_other_errors(mocker):
+    limiter = RateLimiter()
+    func = mocker.Mock(side_effect=_client_error("ValidationException"))
+    with pytest.raises(ClientError):
+        limiter.call(func, {})
+    assert func.call_count == 1
+
+
+def test_call_with_pagination_retries_page(mocker):
+    # A throttled page is retried without refetching earlier pages.
+    mocker.patch("time.sleep")
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage.side_effect = [
+        {"Result": "First", "NextPageToken": "Second"},
+        _client_error("ThrottlingException"),
+        {"Result": "Second"},
+    ]
+    pages = list(call_with_pagination(client_mock, "get_cost_and_usage", {}))
+    assert [page["Result"] for page in pages] == ["First", "Second"]
+    call_list = client_mock.get_cost_and_usage.call_args_list
+    assert [kwargs for _, kwargs in call_list] == [
+        {},
+        {"NextPageToken": "Second"},
+        {"NextPageToken": "Second"},
+    ]
+
+
+def test_rate_limiter_per_session(mocker):
+    mocker.patch("time.sleep")
+    mocker.patch(
+        "boto3.Session.client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    set_rate_limiter(RateLimiter(max_rate=4.0, burst=100.0))
+    throttled_session = boto3.Session(region_name="us-east-1")
+    other_session = boto3.Session(region_name="us-east-1")
+    throttled = client("ce", throttled_session)
+    throttled.get_cost_and_usage.side_effect = [
+        _client_error("ThrottlingException"),
+        {"Result": "OK"},
+    ]
+    list(call_with_pagination(throttled, "get_cost_and_usage", {}))
+
+    # Each session copies the default settings, and only the throttled
+    # session slows down.
+    assert _get_rate_limiter(throttled_session).rate < 4.0
+    assert _get_rate_limiter(other_session).rate == 4.0
+    assert _get_rate_limiter().rate == 4.0
+
+
+def test_set_rate_limiter_session(mocker):
+    mocker.patch(
+        "boto3.Session.client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    session = boto3.Session(region_name="us-east-1")
+    rate_limiter = RateLimiter()
+    call_mock = mocker.patch.object(rate_limiter, "call", return_value={})
+    set_rate_limiter(rate_limiter, session)
+    list(call_with_pagination(client("ce", session), "get_cost_and_usage", {}))
+    call_mock.assert_called_once()
+    # Replacing the default rate limiter resets the sessions.
+    set_rate_limiter(RateLimiter())
+    assert _get_rate_limiter(session) is not rate_limiter
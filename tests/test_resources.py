@@ -0,0 +1,93 @@
+import pytest
+
+import cepan as ce
+from cepan import exceptions
+
+
+def _page(day, resources, token=None):
+    page = {
+        "GroupDefinitions": [{"Type": "DIMENSION", "Key": "RESOURCE_ID"}],
+        "ResultsByTime": [
+            {
+                "TimePeriod": {
+                    "Start": f"2021-03-{day:02d}",
+                    "End": f"2021-03-{day + 1:02d}",
+                },
+                "Total": {},
+                "Groups": [
+                    {
+                        "Keys": [resource],
+                        "Metrics": {"UnblendedCost": {"Amount": "1.5", "Unit": "USD"}},
+                    }
+                    for resource in resources
+                ],
+                "Estimated": False,
+            }
+        ],
+    }
+    if token:
+        page["NextPageToken"] = token
+    return page
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_cost_and_usage_with_resources.side_effect = [
+        _page(1, ["i-1", "i-2", "i-3"], token="2"),
+        _page(2, ["i-1", "i-4"]),
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+def test_iter_cost_and_usage_with_resources(client_mock):
+    chunks = list(
+        ce.iter_cost_and_usage_with_resources(
+            {"Start": "2021-03-01", "End": "2021-03-03"},
+            "DAILY",
+            filter=ce.Dimensions("SERVICE", ["EC2"]),
+            chunk_size=2,
+        )
+    )
+    assert [len(df) for df in chunks] == [2, 2, 1]
+    assert [df["RESOURCE_ID"].tolist() for df in chunks] == [
+        ["i-1", "i-2"],
+        ["i-3", "i-1"],
+        ["i-4"],
+    ]
+    # Resources are dictionary encoded, and each chunk only carries the
+    # resources of the rows buffered with it.
+    assert chunks[1]["RESOURCE_ID"].dtype == "category"
+    assert chunks[2]["RESOURCE_ID"].cat.categories.tolist() == ["i-4"]
+    assert chunks[0]["UnblendedCost"].tolist() == [1.5, 1.5]
+
+    calls = client_mock.get_cost_and_usage_with_resources.call_args_list
+    assert len(calls) == 2
+    kwargs = calls[0].kwargs
+    assert kwargs["GroupBy"] == [{"Type": "DIMENSION", "Key": "RESOURCE_ID"}]
+    assert kwargs["Filter"]["Dimensions"]["Key"] == "SERVICE"
+    assert client_mock.get_cost_and_usage.call_count == 0
+
+
+def test_iter_cost_and_usage_with_resources_pyarrow(client_mock):
+    pa = pytest.importorskip("pyarrow")
+    tables = list(
+        ce.iter_cost_and_usage_with_resources(
+            {"Start": "2021-03-01", "End": "2021-03-03"},
+            "DAILY",
+            filter=ce.Dimensions("SERVICE", ["EC2"]),
+            output="pyarrow",
+        )
+    )
+    assert [table.num_rows for table in tables] == [3, 2]
+    assert pa.types.is_dictionary(tables[0].schema.field("RESOURCE_ID").type)
+
+
+def test_iter_cost_and_usage_with_resources_no_filter(client_mock):
+    with pytest.raises(exceptions.InvalidParameter):
+        next(
+            ce.iter_cost_and_usage_with_resources(
+                {"Start": "2021-03-01", "End": "2021-03-03"}, "DAILY", filter=None
+            )
+        )
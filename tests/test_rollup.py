@@ -0,0 +1,194 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+import cepan as ce
+from cepan._rollup import CostAndUsageView
+
+_GROUP_BY = [
+    {"Type": "DIMENSION", "Key": "SERVICE"},
+    {"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"},
+]
+
+
+def _results(start, end):
+    # Two services in two accounts each day, costing 1, 2, 3 and 4.
+    results = []
+    # Hourly periods have times, which are answered with daily rows here.
+    day = datetime.date.fromisoformat(start[:10])
+    while day < datetime.date.fromisoformat(end[:10]):
+        next_day = day + datetime.timedelta(days=1)
+        groups = []
+        for i, keys in enumerate(
+            [["EC2", "111"], ["EC2", "222"], ["S3", "111"], ["S3", "222"]]
+        ):
+            groups.append(
+                {
+                    "Keys": keys,
+                    "Metrics": {
+                        "UnblendedCost": {"Amount": str(i + 1), "Unit": "USD"},
+                        "UsageQuantity": {"Amount": "1", "Unit": "N/A"},
+                    },
+                }
+            )
+        results.append(
+            {
+                "TimePeriod": {"Start": day.isoformat(), "End": next_day.isoformat()},
+                "Total": {},
+                "Groups": groups,
+                "Estimated": False,
+            }
+        )
+        day = next_day
+    return results
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+
+    def get_cost_and_usage(**kwargs):
+        time_period = kwargs["TimePeriod"]
+        return {
+            "GroupDefinitions": kwargs.get("GroupBy", []),
+            "ResultsByTime": _results(time_period["Start"], time_period["End"]),
+        }
+
+    client_mock.get_cost_and_usage.side_effect = get_cost_and_usage
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+@pytest.fixture
+def view():
+    return CostAndUsageView(
+        {"Start": "2020-01-01", "End": "2020-03-01"},
+        "DAILY",
+        metrics=["UnblendedCost", "UsageQuantity"],
+        group_by=_GROUP_BY,
+    )
+
+
+def test_view_monthly_rollup(client_mock, view):
+    df = view.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-03-01"},
+        "MONTHLY",
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+    )
+    expected = pd.DataFrame(
+        {
+            "Time": ["2020-01-01", "2020-01-01", "2020-02-01", "2020-02-01"],
+            "SERVICE": ["EC2", "S3", "EC2", "S3"],
+            "UnblendedCost": [31 * 3.0, 31 * 7.0, 29 * 3.0, 29 * 7.0],
+        }
+    ).astype({"Time": "string", "SERVICE": "string"})
+    pd.testing.assert_frame_equal(df, expected)
+
+    # Further queries are answered from the view.
+    df = view.get_cost_and_usage(
+        {"Start": "2020-01-15", "End": "2020-02-01"},
+        "MONTHLY",
+        metrics=["UsageQuantity"],
+    )
+    assert df["Time"].tolist() == ["2020-01-15"]
+    assert df["UsageQuantity"].tolist() == [17 * 4.0]
+    assert client_mock.get_cost_and_usage.call_count == 1
+
+
+def test_view_daily_slice(client_mock, view):
+    df = view.get_cost_and_usage(
+        {"Start": "2020-02-10", "End": "2020-02-12"},
+        "DAILY",
+        group_by=[{"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"}],
+    )
+    assert df["Time"].tolist() == [
+        "2020-02-10",
+        "2020-02-10",
+        "2020-02-11",
+        "2020-02-11",
+    ]
+    assert df["LINKED_ACCOUNT"].tolist() == ["111", "222", "111", "222"]
+    assert df["UnblendedCost"].tolist() == [4.0, 6.0, 4.0, 6.0]
+    assert client_mock.get_cost_and_usage.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "time_period,granularity,kwargs",
+    [
+        ({"Start": "2020-01-01", "End": "2020-01-02"}, "HOURLY", {}),
+        ({"Start": "2019-12-01", "End": "2020-02-01"}, "MONTHLY", {}),
+        ({"Start": "2020-01-01", "End": "2020-02-01"}, "MONTHLY", {"metrics": ["A"]}),
+        (
+            {"Start": "2020-01-01", "End": "2020-02-01"},
+            "MONTHLY",
+            {"group_by": [{"Type": "DIMENSION", "Key": "REGION"}]},
+        ),
+        (
+            {"Start": "2020-01-01", "End": "2020-02-01"},
+            "MONTHLY",
+            {"filter": {"Dimensions": {"Key": "REGION", "Values": ["us-east-1"]}}},
+        ),
+    ],
+)
+def test_view_falls_back(mocker, client_mock, view, time_period, granularity, kwargs):
+    mocker.patch(
+        "cepan._time_period._utcnow", return_value=datetime.datetime(2020, 1, 10)
+    )
+    assert not view.can_answer(time_period, granularity, **kwargs)
+    view.get_cost_and_usage(time_period, granularity, **kwargs)
+    # The fallback query goes to the API without fetching the view.
+    assert client_mock.get_cost_and_usage.call_count == 1
+    assert client_mock.get_cost_and_usage.call_args[1]["Granularity"] == granularity
+
+
+def test_view_local_filter(client_mock, view):
+    df = view.get_cost_and_usage(
+        {"Start": "2020-01-01", "End": "2020-02-01"},
+        "MONTHLY",
+        filter=ce.Or(
+            [
+                ce.Dimensions("SERVICE", ["s"], ["STARTS_WITH", "CASE_INSENSITIVE"]),
+                ce.Dimensions("LINKED_ACCOUNT", ["111"]),
+            ]
+        ),
+        group_by=[{"Type": "DIMENSION", "Key": "SERVICE"}],
+    )
+    assert df["SERVICE"].tolist() == ["EC2", "S3"]
+    assert df["UnblendedCost"].tolist() == [31 * 1.0, 31 * 7.0]
+    assert client_mock.get_cost_and_usage.call_count == 1
+
+
+def test_view_filter_narrowing(client_mock):
+    view = CostAndUsageView(
+        {"Start": "2020-01-01", "End": "2020-02-01"},
+        "DAILY",
+        filter=ce.Dimensions("LINKED_ACCOUNT", ["111", "222"]),
+        group_by=_GROUP_BY,
+    )
+    time_period = {"Start": "2020-01-01", "End": "2020-02-01"}
+    narrowed = ce.And(
+        [
+            ce.Dimensions("LINKED_ACCOUNT", ["222", "111"]),
+            ce.Dimensions("SERVICE", ["S"], ["STARTS_WITH"]),
+        ]
+    )
+    assert view.can_answer(time_period, "MONTHLY", filter=narrowed)
+    # Conditions outside of the view filter can not be derived.
+    assert not view.can_answer(
+        time_period, "MONTHLY", filter=ce.Dimensions("SERVICE", ["S"], ["STARTS_WITH"])
+    )
+    assert not view.can_answer(time_period, "MONTHLY")
+    df = view.get_cost_and_usage(time_period, "MONTHLY", filter=narrowed)
+    assert df["UnblendedCost"].tolist() == [31 * 7.0]
+
+
+def test_view_can_answer(view):
+    assert view.can_answer({"Start": "2020-01-05", "End": "2020-01-06"}, "DAILY")
+    assert view.can_answer(
+        {"Start": "2020-01-01", "End": "2020-03-01"},
+        "MONTHLY",
+        metrics=["UNBLENDED_COST"],
+        group_by=[{"Type": "DIMENSION", "Key": "LINKED_ACCOUNT"}],
+    )
+    assert not view.can_answer({"Start": "2020-01-05", "End": "2020-01-05"}, "DAILY")
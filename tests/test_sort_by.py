@@ -22,3 +22,9 @@ from cepan._sort_by import SortBy
 def test_sort_by(args, expected):
     t = SortBy(**args)
     assert t.build() == expected
+
+
+def test_sort_by_fingerprint():
+    assert SortBy("BlendedCost").fingerprint() == SortBy("BlendedCost").fingerprint()
+    assert SortBy("BlendedCost").fingerprint() != SortBy("Usage").fingerprint()
+    assert {SortBy("BlendedCost"): 1}[SortBy("BlendedCost")] == 1
@@ -65,3 +65,37 @@ def test_get_tags(mocker):
     )
     assert len(df.index) == 3
     assert len(df.columns) == 2
+
+
+def test_get_tags_pagination(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_tags.side_effect = [
+        {"Tags": ["A"], "NextPageToken": "Next"},
+        {"Tags": ["B"]},
+    ]
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_tags(TimePeriod(start=datetime.datetime(2020, 1, 1)), "key")
+    assert df["value"].tolist() == ["A", "B"]
+
+
+def test_get_tag_catalog(mocker):
+    client_mock = mocker.Mock()
+
+    def get_tags(**kwargs):
+        if "TagKey" not in kwargs:
+            return {"Tags": ["Owner", "Team"]}
+        return {"Tags": ["", f"{kwargs['TagKey'].lower()}-1"]}
+
+    client_mock.get_tags.side_effect = get_tags
+    mocker.patch("boto3.client", return_value=client_mock)
+    df = ce.get_tag_catalog({"Start": "2020-01-01", "End": "2020-01-02"})
+    assert df["tag_key"].tolist() == ["Owner", "Team"]
+    assert df["value"].tolist() == ["owner-1", "team-1"]
+    assert client_mock.get_tags.call_count == 3
+
+    client_mock.get_tags.reset_mock()
+    df = ce.get_tag_catalog(
+        {"Start": "2020-01-01", "End": "2020-01-02"}, tag_keys=["Team"]
+    )
+    assert df["value"].tolist() == ["team-1"]
+    assert client_mock.get_tags.call_count == 1
@@ -2,7 +2,13 @@ import datetime
 
 import pytest
 
-from cepan._time_period import TimePeriod
+from cepan import exceptions
+from cepan._time_period import (
+    TimePeriod,
+    _build_time_period,
+    _check_hourly_time_period,
+    _split_time_period,
+)
 
 
 @pytest.mark.parametrize(
@@ -29,3 +35,92 @@ from cepan._time_period import TimePeriod
 def test_time_period(args, is_hourly, expected):
     t = TimePeriod(**args)
     assert t.build(is_hourly) == expected
+
+
+@pytest.mark.parametrize(
+    "time_period,expected",
+    [
+        (
+            TimePeriod(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2)),
+            {"Start": "2020-01-01T00:00:00Z", "End": "2020-01-02T00:00:00Z"},
+        ),
+        (
+            {"Start": "2020-01-01", "End": "2020-01-02T12:00:00Z"},
+            {"Start": "2020-01-01T00:00:00Z", "End": "2020-01-02T12:00:00Z"},
+        ),
+    ],
+)
+def test_build_time_period_hourly(time_period, expected):
+    assert _build_time_period(time_period, is_hourly=True) == expected
+
+
+@pytest.mark.parametrize(
+    "time_period,unit,expected",
+    [
+        (
+            {"Start": "2020-01-15", "End": "2020-03-10"},
+            "MONTHLY",
+            [
+                {"Start": "2020-01-15", "End": "2020-02-01"},
+                {"Start": "2020-02-01", "End": "2020-03-01"},
+                {"Start": "2020-03-01", "End": "2020-03-10"},
+            ],
+        ),
+        (
+            {"Start": "2020-12-01", "End": "2021-01-01"},
+            "MONTHLY",
+            [{"Start": "2020-12-01", "End": "2021-01-01"}],
+        ),
+        (
+            {"Start": "2020-01-30", "End": "2020-02-02"},
+            "DAILY",
+            [
+                {"Start": "2020-01-30", "End": "2020-01-31"},
+                {"Start": "2020-01-31", "End": "2020-02-01"},
+                {"Start": "2020-02-01", "End": "2020-02-02"},
+            ],
+        ),
+        (
+            {"Start": "2020-01-01T12:00:00Z", "End": "2020-01-02T06:00:00Z"},
+            "DAILY",
+            [
+                {"Start": "2020-01-01T12:00:00Z", "End": "2020-01-02T00:00:00Z"},
+                {"Start": "2020-01-02T00:00:00Z", "End": "2020-01-02T06:00:00Z"},
+            ],
+        ),
+        (
+            {"Start": "2020-01-02", "End": "2020-01-01"},
+            "DAILY",
+            [],
+        ),
+    ],
+)
+def test_split_time_period(time_period, unit, expected):
+    assert _split_time_period(time_period, unit) == expected
+
+
+def test_time_period_fingerprint():
+    a = TimePeriod(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2))
+    b = TimePeriod(datetime.datetime(2020, 1, 1), datetime.datetime(2020, 1, 2))
+    assert a.fingerprint() == b.fingerprint()
+    assert a.fingerprint() != a.fingerprint(is_hourly=True)
+    assert {a: 1}[b] == 1
+
+
+@pytest.mark.parametrize(
+    "start,valid",
+    [
+        ("2020-01-18T00:00:00Z", True),
+        ("2020-01-17T00:00:00Z", False),
+    ],
+)
+def test_check_hourly_time_period(mocker, start, valid):
+    mocker.patch(
+        "cepan._time_period._utcnow", return_value=datetime.datetime(2020, 2, 1, 12)
+    )
+    time_period = {"Start": start, "End": "2020-02-01T00:00:00Z"}
+    if valid:
+        _check_hourly_time_period(time_period)
+        return
+    with pytest.raises(exceptions.InvalidParameter):
+        _check_hourly_time_period(time_period)
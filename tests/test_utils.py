@@ -1,6 +1,21 @@
+import gc
+import threading
+import time
+
+import boto3
 import pytest
+from botocore.config import Config
 
-from cepan._utils import call_with_pagination
+from cepan import _utils
+from cepan._utils import (
+    SingleFlight,
+    call_with_pagination,
+    chain_concurrently,
+    clear_client_cache,
+    client,
+    map_concurrently,
+    profile_session,
+)
 
 
 @pytest.mark.parametrize(
@@ -26,3 +41,178 @@ def test_call_with_pagination(mocker, pagenation_token):
         {"arg1": "foo", "arg2": "bar", pagenation_token: "Second"},
         {"arg1": "foo", "arg2": "bar", pagenation_token: "Third"},
     ]
+
+
+@pytest.mark.parametrize(
+    "max_workers",
+    [None, 1, 3],
+)
+def test_map_concurrently(max_workers):
+    results = map_concurrently(lambda x: x * 2, range(10), max_workers)
+    assert list(results) == [x * 2 for x in range(10)]
+
+
+@pytest.mark.parametrize("max_workers", [None, 1, 3])
+def test_chain_concurrently(max_workers):
+    results = chain_concurrently(lambda x: [x] * x, range(5), max_workers)
+    assert list(results) == [1, 2, 2, 3, 3, 3, 4, 4, 4, 4]
+
+
+def test_chain_concurrently_streams():
+    produced = []
+
+    def func(item):
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    results = chain_concurrently(func, [0], 1)
+    assert next(results) == 0
+    time.sleep(0.05)
+    # At most one result is buffered while another one waits to be.
+    assert len(produced) <= 3
+    # Closing early stops the producers instead of hanging.
+    results.close()
+    assert len(produced) <= 3
+
+
+def test_chain_concurrently_exception():
+    def func(item):
+        yield item
+        if item == 1:
+            raise RuntimeError("failed")
+
+    results = chain_concurrently(func, range(3), 2)
+    assert next(results) == 0
+    assert next(results) == 1
+    with pytest.raises(RuntimeError):
+        next(results)
+
+
+def test_client_cache(mocker):
+    session = boto3.Session(region_name="us-east-1")
+    create_mock = mocker.patch.object(
+        session, "client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    first = client("ce", session)
+    assert client("ce", session) is first
+    assert create_mock.call_count == 1
+
+    # A different config or service gets its own client.
+    assert client("ce", session, Config(retries={"max_attempts": 1})) is not first
+    assert client("s3", session) is not first
+
+    clear_client_cache()
+    assert client("ce", session) is not first
+
+
+def test_client_cache_per_session(mocker):
+    mocker.patch(
+        "boto3.Session.client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    first = boto3.Session(region_name="us-east-1")
+    second = boto3.Session(region_name="us-east-1")
+    assert client("ce", first) is not client("ce", second)
+    assert client("ce", first) is client("ce", first)
+
+
+def test_client_cache_default_session(mocker):
+    client_mock = mocker.patch("boto3.client")
+    assert client("ce") is client("ce")
+    assert client_mock.call_count == 1
+
+
+def test_client_cache_thread_safe(mocker):
+    session = boto3.Session(region_name="us-east-1")
+    create_mock = mocker.patch.object(
+        session, "client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    clients = list(map_concurrently(lambda _: client("ce", session), range(20), 8))
+    assert all(created is clients[0] for created in clients)
+    assert create_mock.call_count == 1
+
+
+def test_single_flight():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(single_flight.do("key", func))
+    )
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(single_flight.do("key", func)))
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    # Followers are waiting for the leader.
+    followers[0].join(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("result", False)] + [("result", True)] * 3
+
+    # Calls that are not in flight run again.
+    assert single_flight.do("key", lambda: "again") == ("again", False)
+
+
+def test_single_flight_exception():
+    single_flight = SingleFlight()
+
+    def func():
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        single_flight.do("key", func)
+    assert single_flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_profile_session(mocker):
+    session_mock = mocker.patch("boto3.Session", side_effect=lambda **kwargs: object())
+    first = profile_session("payer")
+    assert profile_session("payer") is first
+    assert profile_session("member") is not first
+    assert session_mock.call_count == 2
+    session_mock.assert_any_call(profile_name="payer")
+
+    clear_client_cache()
+    profile_session("payer")
+    assert session_mock.call_count == 3
+
+
+def test_client_cache_drops_sessions(mocker):
+    mocker.patch(
+        "boto3.Session.client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    session = boto3.Session(region_name="us-east-1")
+    client("ce", session)
+    assert len(_utils._CLIENT_CACHE) == 1
+    del session
+    gc.collect()
+    assert len(_utils._CLIENT_CACHE) == 0
+
+
+def test_client_cache_bound(mocker):
+    session = boto3.Session(region_name="us-east-1")
+    mocker.patch.object(
+        session, "client", side_effect=lambda *args, **kwargs: mocker.Mock()
+    )
+    first = client("ce", session)
+    # Each call builds a new config, which gets its own client.
+    for _ in range(_utils._MAX_CLIENTS_PER_SESSION * 2):
+        client("ce", session, Config())
+    assert len(_utils._CLIENT_CACHE[session]) == _utils._MAX_CLIENTS_PER_SESSION
+    assert client("ce", session) is not first
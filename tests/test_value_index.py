@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+import cepan as ce
+from cepan import exceptions
+
+_TIME_PERIOD = {"Start": "2020-01-01", "End": "2020-02-01"}
+
+
+@pytest.fixture
+def client_mock(mocker):
+    client_mock = mocker.Mock()
+    client_mock.get_dimension_values.side_effect = [
+        {
+            "DimensionValues": [
+                {"Value": "Amazon Elastic Compute Cloud - Compute", "Attributes": {}},
+                {"Value": "EC2 - Other", "Attributes": {}},
+            ],
+            "NextPageToken": "Next",
+        },
+        {
+            "DimensionValues": [
+                {"Value": "Amazon Simple Storage Service", "Attributes": {}},
+                {"Value": "", "Attributes": {}},
+            ],
+        },
+    ]
+    client_mock.get_tags.return_value = {"Tags": ["alice", "Alfred", "bob"]}
+    mocker.patch("boto3.client", return_value=client_mock)
+    return client_mock
+
+
+def test_value_index_search(client_mock):
+    index = ce.ValueIndex()
+    assert index.search(_TIME_PERIOD, dimension="SERVICE", search_string="ec2") == [
+        "EC2 - Other",
+    ]
+    assert index.search(_TIME_PERIOD, dimension="SERVICE", search_string="AMAZON") == [
+        "Amazon Elastic Compute Cloud - Compute",
+        "Amazon Simple Storage Service",
+    ]
+    assert (
+        index.search(
+            _TIME_PERIOD, dimension="SERVICE", search_string="ec2", case_sensitive=True
+        )
+        == []
+    )
+    assert len(index.search(_TIME_PERIOD, dimension="SERVICE")) == 3
+    assert index.search(_TIME_PERIOD, dimension="SERVICE", limit=1) == [
+        "Amazon Elastic Compute Cloud - Compute"
+    ]
+    # Every page is fetched once, then searched locally.
+    assert client_mock.get_dimension_values.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "search_string,case_sensitive,expected",
+    [
+        ("al", False, ["Alfred", "alice"]),
+        ("AL", False, ["Alfred", "alice"]),
+        ("al", True, ["alice"]),
+        ("Al", True, ["Alfred"]),
+        ("b", False, ["bob"]),
+        ("c", False, []),
+    ],
+)
+def test_value_index_prefix(client_mock, search_string, case_sensitive, expected):
+    index = ce.ValueIndex()
+    found = index.search(
+        _TIME_PERIOD,
+        tag_key="Owner",
+        search_string=search_string,
+        match="prefix",
+        case_sensitive=case_sensitive,
+    )
+    assert found == expected
+
+
+def test_value_index_ttl(client_mock, mocker):
+    time_mock = mocker.patch("time.time", return_value=1000.0)
+    index = ce.ValueIndex()
+    index.search(_TIME_PERIOD, tag_key="Owner")
+    time_mock.return_value = 1000.0 + 3599
+    index.search(_TIME_PERIOD, tag_key="Owner")
+    assert client_mock.get_tags.call_count == 1
+    time_mock.return_value = 1000.0 + 3601
+    index.search(_TIME_PERIOD, tag_key="Owner")
+    assert client_mock.get_tags.call_count == 2
+    index.clear()
+    index.search(_TIME_PERIOD, tag_key="Owner")
+    assert client_mock.get_tags.call_count == 3
+    # Another time period is another entry.
+    index.search({"Start": "2020-02-01", "End": "2020-03-01"}, tag_key="Owner")
+    assert client_mock.get_tags.call_count == 4
+
+
+def test_value_index_concurrent(mocker):
+    client_mock = mocker.Mock()
+
+    def get_tags(**kwargs):
+        time.sleep(0.05)
+        return {"Tags": ["alice"]}
+
+    client_mock.get_tags.side_effect = get_tags
+    mocker.patch("boto3.client", return_value=client_mock)
+    index = ce.ValueIndex()
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(index.search(_TIME_PERIOD, tag_key="Owner"))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [["alice"]] * 4
+    assert client_mock.get_tags.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"dimension": "SERVICE", "tag_key": "Owner"},
+        {"dimension": "SERVICE", "match": "suffix"},
+    ],
+)
+def test_value_index_invalid(kwargs):
+    with pytest.raises(exceptions.InvalidParameter):
+        ce.ValueIndex().search(_TIME_PERIOD, **kwargs)